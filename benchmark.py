@@ -0,0 +1,582 @@
+import argparse
+import curses
+import importlib
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from plugin import Plugin
+
+PLUGIN_METADATA = {
+	"hooks": (),
+	"commands": {"bench": "benchmark"},
+	"lazy": True
+}
+
+# Read along the metadata, to describe the command before the plugin is loaded
+translations = {
+	"en": {
+		"benchmark": "Benchmark the plugins",
+		"running": "Benchmarking the plugins, please wait...",
+		"failed": "The benchmark failed :"
+	},
+	"fr": {
+		"benchmark": "Mesurer les performances des plugins",
+		"running": "Mesure des performances des plugins, veuillez patienter...",
+		"failed": "La mesure des performances a échoué :"
+	}
+}
+
+# Plugins that are not benchmarked unless explicitly asked for, as they reach the network or install packages on load
+SKIPPED_PLUGINS = ("benchmark", "updater", "discord-rpc")
+
+# Hooks of the plugins called for each keystroke
+BENCHMARKED_HOOKS = ("update_on_keypress", "update_on_syntax_highlight", "fixed_update")
+
+# Maximum amount of seconds the benchmark command waits for the benchmark to finish
+BENCHMARK_TIMEOUT = 300
+
+# Program typed during the sessions, in the algorithmic language of the editor
+SAMPLE_PROGRAM = """fx int factorial
+data
+int n
+desc Computes the factorial of n.
+vars
+int result
+result = 1
+for i 1 n+1
+result = result * i
+end
+return result
+end
+fx int main
+arr int values 5
+for i 0 5
+input values[i]
+print factorial(values[i]) ENDL
+end
+return 0
+end"""
+
+
+def typing_keys(text: str, typo_every: int = 0) -> List[str]:
+	"""
+	Turns a text into the keys a user would press to type it.
+	:param text: The text to type.
+	:param typo_every: If not 0, every so many characters, a wrong character is typed then erased.
+	:return: The keys to press, as returned by curses' getkey.
+	"""
+	keys = []
+	for i, char in enumerate(text):
+		if typo_every and i % typo_every == typo_every - 1 and char.isalpha():
+			keys.extend(("x", "KEY_BACKSPACE"))
+		keys.append(char)
+	return keys
+
+
+# Each session is a text already loaded in the editor, and the keys pressed by the user
+SESSIONS: Dict[str, Tuple[str, List[str]]] = {
+	"typing": ("", typing_keys(SAMPLE_PROGRAM)),
+	"editing": ("", typing_keys(SAMPLE_PROGRAM, typo_every=7) + ["KEY_LEFT"] * 40 + typing_keys("int unused\n")),
+	"long_file": ("\n".join((SAMPLE_PROGRAM,) * 20) + "\n", typing_keys(SAMPLE_PROGRAM))
+}
+
+
+class FakeStdscr:
+	"""
+	Stands in for the curses window, without needing a terminal.
+	Records every call to addstr, and returns the scripted keys from getkey and getch.
+	"""
+	def __init__(self, rows: int = 40, cols: int = 150, keys: Iterable[str] = ()):
+		"""
+		:param rows: The height of the fake terminal.
+		:param cols: The width of the fake terminal.
+		:param keys: The keys returned by getkey and getch, in order.
+		"""
+		self.rows = rows
+		self.cols = cols
+		self.keys = list(keys)
+		# Every addstr call, as (y, x, text, attributes)
+		self.addstr_calls: List[Tuple[int, int, str, int]] = []
+		self.clear_calls = 0
+		self.refresh_calls = 0
+
+
+	def addstr(self, *args):
+		"""
+		Records the call, and raises like curses does if it draws outside the window.
+		Accepts the same arguments as curses : (text), (text, attr), (y, x, text) or (y, x, text, attr).
+		"""
+		if len(args) <= 2:
+			y, x, text, attr = 0, 0, args[0], args[1] if len(args) == 2 else 0
+		else:
+			y, x, text, attr = args[0], args[1], args[2], args[3] if len(args) == 4 else 0
+		self.addstr_calls.append((y, x, str(text), attr))
+		if not (0 <= y < self.rows and 0 <= x < self.cols):
+			raise curses.error("addwstr() returned ERR")
+
+
+	def getkey(self) -> str:
+		"""
+		Returns the next scripted key, or raises like curses in no-delay mode if there are none left.
+		"""
+		if not self.keys:
+			raise curses.error("no input")
+		return self.keys.pop(0)
+
+
+	def getch(self) -> int:
+		"""
+		Returns the code of the next scripted key, or -1 if there are none left.
+		"""
+		if not self.keys:
+			return -1
+		key = self.keys.pop(0)
+		return ord(key) if len(key) == 1 else 0
+
+
+	def getmaxyx(self) -> Tuple[int, int]:
+		return self.rows, self.cols
+
+
+	def clear(self):
+		self.clear_calls += 1
+
+
+	def erase(self):
+		self.clear_calls += 1
+
+
+	def refresh(self):
+		self.refresh_calls += 1
+
+
+	def noutrefresh(self):
+		self.refresh_calls += 1
+
+
+	def move(self, y: int, x: int):
+		pass
+
+
+	def keypad(self, flag: bool):
+		pass
+
+
+	def nodelay(self, flag: bool):
+		pass
+
+
+	def timeout(self, delay: int):
+		pass
+
+
+class FakeApp:
+	"""
+	Stands in for the editor, with the attributes and methods plugins use.
+	"""
+	def __init__(self, stdscr: FakeStdscr, text: str = ""):
+		"""
+		:param stdscr: The fake window the app draws on.
+		:param text: The text loaded in the editor.
+		"""
+		self.stdscr = stdscr
+		self.rows, self.cols = stdscr.getmaxyx()
+		self.current_text = text
+		self.current_index = len(text)
+		self.cur = (0, 0)
+		self.tab_char = "\t"
+		self.language = "en"
+		self.command_symbol = ":"
+		self.input_locked = False
+		self.is_crash_reboot = False
+		self.last_save_action = "clipboard"
+		self.top_placement_shift = 0
+		self.left_placement_shift = 0
+		self.default_bg = curses.COLOR_BLACK
+		self.instructions_list = []
+		self.marked_lines = []
+		self.logs = []
+		self.plugins = {}
+		self.plugins_config = defaultdict(dict)
+		self.commands = {}
+		self.compilers = {}
+		self.color_pairs = defaultdict(int, {
+			"statement": 1, "function": 2, "variable": 3, "instruction": 4, "strings": 5, "special": 6
+		})
+		self.color_control_flow = {
+			"statement": ("if", "else", "elif", "for", "while", "switch", "case", "default"),
+			"function": ("fx", "return", "end"),
+			"variable": ("int", "float", "string", "bool", "char", "arr"),
+			"instruction": ("print", "input", "vars", "data", "datar", "result", "desc", "const")
+		}
+		self._compute_cursor()
+
+
+	def get_translation(self, *keys: str, **format_keys) -> str:
+		return "/".join(keys)
+
+
+	def log(self, *args):
+		self.logs.append(" ".join(str(arg) for arg in args))
+
+
+	def get_lineno_length(self) -> int:
+		return len(str(self.current_text.count("\n") + 1)) + 1
+
+
+	def add_char_to_text(self, key: str):
+		"""
+		Inserts the given text at the cursor position.
+		"""
+		self.current_text = self.current_text[:self.current_index] + key + self.current_text[self.current_index:]
+		self.current_index += len(key)
+
+
+	def handle_key(self, key: str):
+		"""
+		Applies a key to the text, like the editor does.
+		"""
+		if key in ("KEY_BACKSPACE", "\b", "\x7f"):
+			if self.current_index > 0:
+				self.current_text = self.current_text[:self.current_index - 1] + self.current_text[self.current_index:]
+				self.current_index -= 1
+		elif key == "KEY_LEFT":
+			self.current_index = max(self.current_index - 1, 0)
+		elif key == "KEY_RIGHT":
+			self.current_index = min(self.current_index + 1, len(self.current_text))
+		elif not self.input_locked:
+			self.add_char_to_text(key)
+		self._compute_cursor()
+
+
+	def _compute_cursor(self):
+		"""
+		Computes the screen position of the cursor from its index in the text.
+		"""
+		lines_before = self.current_text[:self.current_index].split("\n")
+		self.cur = (
+			min(len(lines_before) - 1 + self.top_placement_shift, self.rows - 1),
+			min(len(lines_before[-1]) + self.get_lineno_length() + self.left_placement_shift, self.cols - 1)
+		)
+
+
+	def syntax_highlighting(self, line: str, splitted_line: List[str], i: int):
+		"""
+		Calls the syntax highlighting of every plugin on the given line.
+		"""
+		for plugin_name, plugin in self.plugins.items():
+			if hasattr(plugin[1], "update_on_syntax_highlight"):
+				plugin[1].update_on_syntax_highlight(line, splitted_line, i)
+
+
+	def display_text(self):
+		"""
+		Draws the visible lines of the text, and highlights them.
+		"""
+		lineno_length = self.get_lineno_length()
+		for i, line in enumerate(self.current_text.split("\n")[:self.rows - 3 - self.top_placement_shift]):
+			y = i + self.top_placement_shift
+			self.stdscr.addstr(y, self.left_placement_shift, str(i + 1).zfill(lineno_length - 1))
+			self.stdscr.addstr(y, self.left_placement_shift + lineno_length, line[:self.cols - lineno_length - 1])
+			self.syntax_highlighting(line, line.replace(self.tab_char, "").split(" "), i)
+
+
+	def apply_stylings(self):
+		"""
+		Draws the whole screen.
+		"""
+		self.display_text()
+
+
+	def save(self, *args, **kwargs):
+		pass
+
+
+	def open(self, *args, **kwargs):
+		pass
+
+
+	def reload_theme(self, *args, **kwargs):
+		pass
+
+
+	def _declare_color_pairs(self, *args, **kwargs):
+		pass
+
+
+@contextmanager
+def headless_curses():
+	"""
+	Replaces the curses functions needing a terminal by harmless ones while the context is active.
+	"""
+	replacements = {
+		"color_pair": lambda pair_number: pair_number << 8,
+		"pair_number": lambda attr: (attr >> 8) & 0xff,
+		"init_pair": lambda *args: None,
+		"init_color": lambda *args: None,
+		"start_color": lambda: None,
+		"use_default_colors": lambda: None,
+		"has_colors": lambda: True,
+		"can_change_color": lambda: False,
+		"curs_set": lambda visibility: 1,
+		"beep": lambda: None,
+		"flash": lambda: None,
+		"napms": lambda ms: 0,
+		"COLORS": 256,
+		"COLOR_PAIRS": 256
+	}
+	missing = object()
+	originals = {name: getattr(curses, name, missing) for name in replacements}
+	for name, replacement in replacements.items():
+		setattr(curses, name, replacement)
+	try:
+		yield
+	finally:
+		for name, original in originals.items():
+			if original is missing:
+				delattr(curses, name)
+			else:
+				setattr(curses, name, original)
+
+
+def load_plugins(app: FakeApp, plugins_list: Iterable[str]) -> Dict[str, str]:
+	"""
+	Imports and initializes the given plugins into the fake app.
+	:param app: The fake app.
+	:param plugins_list: The names of the plugins to load.
+	:return: The plugins that failed to load, mapped to the error.
+	"""
+	failed_plugins = {}
+	for plugin_name in plugins_list:
+		try:
+			module = importlib.import_module(f"plugins.{plugin_name}")
+			app.plugins[plugin_name] = [module, module.init(app)]
+			app.plugins[plugin_name][1].config = app.plugins_config[plugin_name]
+			if hasattr(app.plugins[plugin_name][1], "init"):
+				app.plugins[plugin_name][1].init()
+			app.plugins[plugin_name][1].was_initialized = True
+		except Exception as e:
+			app.plugins.pop(plugin_name, None)
+			failed_plugins[plugin_name] = f"{type(e).__name__}: {e}"
+	return failed_plugins
+
+
+def measure_hooks(app: FakeApp) -> Dict[Tuple[str, str], List[float]]:
+	"""
+	Wraps the benchmarked hooks of every loaded plugin to measure them.
+	:param app: The fake app, with its plugins loaded.
+	:return: The durations of the calls to each hook of each plugin, filled as the hooks get called.
+	"""
+	durations = defaultdict(list)
+
+	def measured(plugin_name: str, hook: str, method):
+		def measured_method(*args, **kwargs):
+			start_time = time.perf_counter()
+			try:
+				return method(*args, **kwargs)
+			except Exception:
+				durations[plugin_name, "errors"].append(0.)
+			finally:
+				durations[plugin_name, hook].append(time.perf_counter() - start_time)
+		return measured_method
+
+	for plugin_name, plugin in app.plugins.items():
+		for hook in BENCHMARKED_HOOKS:
+			if hasattr(plugin[1], hook):
+				setattr(plugin[1], hook, measured(plugin_name, hook, getattr(plugin[1], hook)))
+	return durations
+
+
+def run_session(plugins_list: Iterable[str], session: str, rows: int = 40, cols: int = 150) -> dict:
+	"""
+	Replays a typing session through the hooks of the given plugins.
+	Each key is applied to the text, then goes through the keypress hooks, the display (and syntax highlighting
+	hooks), and the fixed updates, which makes one frame.
+	:param plugins_list: The names of the plugins to benchmark.
+	:param session: The name of the session, from SESSIONS.
+	:param rows: The height of the fake terminal.
+	:param cols: The width of the fake terminal.
+	:return: The results of the session.
+	"""
+	text, keys = SESSIONS[session]
+	with headless_curses():
+		stdscr = FakeStdscr(rows, cols)
+		app = FakeApp(stdscr, text)
+		failed_plugins = load_plugins(app, plugins_list)
+		durations = measure_hooks(app)
+
+		keystrokes_latencies = []
+		draw_calls = []
+		display_errors = 0
+		for key in keys:
+			stdscr.addstr_calls.clear()
+			start_time = time.perf_counter()
+
+			# Processes the key, then draws a frame, as the editor does
+			app.handle_key(key)
+			for plugin in tuple(app.plugins.values()):
+				if hasattr(plugin[1], "update_on_keypress"):
+					plugin[1].update_on_keypress(key)
+			try:
+				app.apply_stylings()
+			except Exception:
+				display_errors += 1
+			for plugin in tuple(app.plugins.values()):
+				if hasattr(plugin[1], "fixed_update"):
+					plugin[1].fixed_update()
+
+			keystrokes_latencies.append(time.perf_counter() - start_time)
+			draw_calls.append(len(stdscr.addstr_calls))
+
+	# Sums up the durations of each hook of each plugin
+	plugins_results = defaultdict(dict)
+	for (plugin_name, hook), hook_durations in durations.items():
+		if hook == "errors":
+			plugins_results[plugin_name]["errors"] = len(hook_durations)
+		else:
+			plugins_results[plugin_name][hook] = {
+				"calls": len(hook_durations),
+				"total": sum(hook_durations),
+				"mean": sum(hook_durations) / len(hook_durations)
+			}
+
+	sorted_latencies = sorted(keystrokes_latencies)
+	return {
+		"session": session,
+		"keystrokes": len(keys),
+		"latency": {
+			"mean": sum(sorted_latencies) / len(sorted_latencies),
+			"p50": percentile(sorted_latencies, 50),
+			"p99": percentile(sorted_latencies, 99),
+			"max": sorted_latencies[-1]
+		},
+		"draw_calls_per_frame": {
+			"mean": sum(draw_calls) / len(draw_calls),
+			"max": max(draw_calls)
+		},
+		"plugins": dict(plugins_results),
+		"display_errors": display_errors,
+		"failed_plugins": failed_plugins
+	}
+
+
+def percentile(sorted_values: List[float], percentage: float) -> float:
+	"""
+	Gets a percentile of already sorted values.
+	:param sorted_values: The values, sorted in ascending order.
+	:param percentage: The percentile to get, between 0 and 100.
+	:return: The percentile.
+	"""
+	return sorted_values[min(int(len(sorted_values) * percentage / 100), len(sorted_values) - 1)]
+
+
+def format_results(results: dict) -> str:
+	"""
+	Formats the results of a session as a text report, slowest plugins first.
+	:param results: The results returned by run_session.
+	:return: The report.
+	"""
+	lines = [
+		f"Session '{results['session']}' : {results['keystrokes']} keystrokes",
+		"  Keystroke latency : mean {mean:.3f}ms, p50 {p50:.3f}ms, p99 {p99:.3f}ms, max {max:.3f}ms".format(
+			**{name: value * 1000 for name, value in results["latency"].items()}
+		),
+		"  Draw calls per frame : mean {mean:.1f}, max {max}".format(**results["draw_calls_per_frame"]),
+		f"  Frames that failed to display : {results['display_errors']}",
+		"  {:<32}{:>20}{:>28}{:>14}{:>8}".format("Plugin (mean per call)", *BENCHMARKED_HOOKS, "errors")
+	]
+	sorted_plugins = sorted(
+		results["plugins"].items(),
+		key=lambda item: sum(hook["total"] for hook in item[1].values() if isinstance(hook, dict)),
+		reverse=True
+	)
+	for plugin_name, hooks in sorted_plugins:
+		lines.append("  {:<32}{:>20}{:>28}{:>14}{:>8}".format(
+			plugin_name,
+			*(f"{hooks[hook]['mean'] * 1000:.4f}ms" if hook in hooks else "-" for hook in BENCHMARKED_HOOKS),
+			hooks.get("errors", 0)
+		))
+	for plugin_name, error in results["failed_plugins"].items():
+		lines.append(f"  {plugin_name} failed to load : {error}")
+	return "\n".join(lines)
+
+
+def installed_plugins() -> List[str]:
+	"""
+	Lists the plugins of the plugins folder, except the skipped ones.
+	"""
+	return sorted(
+		plugin[:-3] for plugin in os.listdir(os.path.dirname(__file__))
+		if plugin.endswith(".py") and not plugin.startswith("__") and plugin[:-3] not in SKIPPED_PLUGINS
+	)
+
+
+def main(args: Optional[List[str]] = None):
+	"""
+	Runs the benchmark from the command line, from the root of the editor : python -m plugins.benchmark
+	"""
+	parser = argparse.ArgumentParser(description="Benchmarks the hooks of the plugins without a terminal.")
+	parser.add_argument("plugins", nargs="*", help="The plugins to benchmark. Defaults to every installed plugin.")
+	parser.add_argument("--session", choices=SESSIONS.keys(), action="append", help="The sessions to replay.")
+	parser.add_argument("--json", help="Writes the results to this JSON file.")
+	args = parser.parse_args(args)
+
+	all_results = []
+	for session in args.session or SESSIONS.keys():
+		all_results.append(run_session(args.plugins or installed_plugins(), session))
+		print(format_results(all_results[-1]), end="\n\n", flush=True)
+
+	if args.json:
+		with open(args.json, "w", encoding="utf-8") as f:
+			json.dump(all_results, f, indent=4)
+
+
+class BenchmarkPlugin(Plugin):
+	"""
+	Runs the benchmark of the plugins from the editor.
+	"""
+	def __init__(self, app):
+		super().__init__(app)
+		self.translations = translations
+		self.add_command("bench", self.run_benchmark, self.translate("benchmark"), True)
+
+
+	def run_benchmark(self):
+		"""
+		Runs the benchmark in another process, so the plugins of the editor are not affected, then shows the report.
+		"""
+		self.app.stdscr.clear()
+		msg = self.translate("running")
+		self.app.stdscr.addstr(self.app.rows // 2, self.app.cols // 2 - len(msg) // 2, msg)
+		self.app.stdscr.refresh()
+
+		try:
+			result = subprocess.run(
+				(sys.executable, "-m", "plugins.benchmark"),
+				cwd=os.path.join(os.path.dirname(__file__), ".."),
+				capture_output=True, text=True, timeout=BENCHMARK_TIMEOUT
+			)
+			report = result.stdout if result.returncode == 0 else "\n".join((self.translate("failed"), result.stderr))
+		except (OSError, subprocess.TimeoutExpired) as e:
+			report = "\n".join((self.translate("failed"), str(e)))
+
+		# Shows the report, cut to the size of the screen
+		self.app.stdscr.clear()
+		for i, line in enumerate(report.split("\n")[:self.app.rows - 1]):
+			self.app.stdscr.addstr(i, 0, line[:self.app.cols - 1])
+		self.app.stdscr.getch()
+		self.app.stdscr.clear()
+
+
+def init(app) -> BenchmarkPlugin:
+	return BenchmarkPlugin(app)
+
+
+if __name__ == "__main__":
+	main()
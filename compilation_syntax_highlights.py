@@ -1,13 +1,26 @@
 import curses
-import string
+import re
+from typing import List, Tuple
 
 from plugin import Plugin
 
+# Matches every C++ token the highlighting cares about, in a single pass over each line ; the whitespace and the other
+# characters are skipped. Comments and strings come first, so what they contain is not highlighted.
+CPP_TOKENS_REGEX = re.compile(
+	r"(?P<comment>//.*)"
+	r"|(?P<string>\"(?:[^\"\\]|\\.)*\"?|'(?:[^'\\]|\\.)*'?)"
+	r"|(?P<word>[A-Za-z_]\w*(?:::[A-Za-z_]\w*)*)"
+	r"|(?P<number>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?\w*)"
+	r"|(?P<operator>[-+*/%&|^!=<>]+)"
+	r"|(?P<brace>[{};])"
+	r"|(?P<parenthesis>[()])"
+)
+
 
 class CompilationSyntaxHighlights(Plugin):
 	"""
 	Creates a syntax highlighting during compilation.
-	Pretty janky and poorly coded, not the plugin I'm the most proud of.
+	Each line is tokenized once, and each run of characters of the same color is drawn with a single call.
 	"""
 	def __init__(self, app):
 		super().__init__(app)
@@ -17,6 +30,63 @@ class CompilationSyntaxHighlights(Plugin):
 			"variable": ('int', 'float', 'string', 'bool', 'char', 'std::string'),
 			"instruction": ("cout", "std::cout", "cin", "std::cin")
 		}
+		# Each keyword, mapped to the name of its color pair
+		self.keywords = {
+			keyword: color_pair
+			for color_pair, keywords in self.color_control_flow.items()
+			for keyword in keywords
+		}
+
+
+	def token_attributes(self) -> dict:
+		"""
+		:return: The attribute of each kind of token ; the words are mapped to the attribute of each keyword.
+		"""
+		return {
+			"comment": curses.A_REVERSE,
+			"string": curses.color_pair(self.app.color_pairs["strings"]),
+			"word": {
+				keyword: curses.color_pair(self.app.color_pairs[color_pair])
+				for keyword, color_pair in self.keywords.items()
+			},
+			"number": curses.color_pair(5),
+			"operator": curses.color_pair(self.app.color_pairs["statement"]),
+			"brace": curses.color_pair(self.app.color_pairs["statement"]),
+			"parenthesis": curses.color_pair(self.app.color_pairs["magenta"])
+		}
+
+
+	def highlight_spans(self, line: str, attributes: dict) -> List[Tuple[int, int, int]]:
+		"""
+		Tokenizes a line of C++, and gives the runs of characters to highlight.
+		:param line: The line, with its tabs expanded.
+		:param attributes: The attributes of the tokens, from token_attributes.
+		:return: The highlighted runs as (start, end, attribute), the adjacent runs of the same attribute (or only
+			separated by spaces) being merged.
+		"""
+		# Preprocessor directives are highlighted as a whole
+		if line.startswith("#"):
+			return [(0, len(line), curses.A_REVERSE)]
+
+		spans = []
+		for token in CPP_TOKENS_REGEX.finditer(line):
+			kind = token.lastgroup
+			if kind == "word":
+				attribute = attributes["word"].get(token.group())
+			# Only the assignments and comparisons are highlighted among the operators
+			elif kind == "operator" and not any(char in token.group() for char in "=<>"):
+				attribute = None
+			else:
+				attribute = attributes[kind]
+			if attribute is None:
+				continue
+
+			start, end = token.span()
+			if spans and spans[-1][2] == attribute and not line[spans[-1][1]:start].strip(" "):
+				spans[-1] = (spans[-1][0], end, attribute)
+			else:
+				spans.append((start, end, attribute))
+		return spans
 
 
 	def update_on_compilation(self, final_compiled_code:str, compilation_type:str):
@@ -27,92 +97,26 @@ class CompilationSyntaxHighlights(Plugin):
 			curses.init_pair(7, curses.COLOR_MAGENTA, curses.COLOR_BLACK)
 			self.app.color_pairs["magenta"] = 7
 
-		if compilation_type == "cpp" and self.app.tab_char == "\t":
-			for i, line in enumerate(final_compiled_code.split("\n")):
-				# Highlights for #include and preprocessor directives
-				if line.startswith("#"):
-					self.display(i, 0, line, curses.A_REVERSE)
-					continue
-
-				# Splits the line, and checks the first member
-				splitted_line = line.split(" ")
-				start_statement = splitted_line[0].replace(self.app.tab_char, "")
-				if start_statement in tuple(sum(self.color_control_flow.values(), tuple())):
-					if start_statement in self.color_control_flow["statement"]:
-						c_pair = "statement"
-					elif start_statement in self.color_control_flow["function"]:
-						c_pair = "function"
-					elif start_statement in self.color_control_flow["instruction"]:
-						c_pair = "instruction"
-					else:
-						c_pair = "variable"
-					self.display(i, 0, splitted_line[0], curses.color_pair(self.app.color_pairs[c_pair]))
-
-
-				# Highlights the equals signs and binary operators
-				for j, element in enumerate(splitted_line[1:]):
-					if "=" in element or "<" in element or ">" in element:
-						tab_count = line.count(self.app.tab_char)
-						self.display(
-							i,
-							len(
-								((self.app.tab_char
-								if self.app.tab_char != "\t" else
-								"        ") * tab_count)[:-tab_count] + \
-								" ".join(splitted_line[:j+1])
-							) + 1,
-							element,
-							curses.color_pair(self.app.color_pairs["statement"])
-						)
-
-
-				# Fetches individual characters
-				for j, char in enumerate(line):
-					if self.app.tab_char == "\t":
-						j += len("       ") * line.count(self.app.tab_char)
-					# Highlights curly brackets
-					if char in "{};":
-						self.display(i, j, char, curses.color_pair(self.app.color_pairs["statement"]))
-					# Highlights parentheses
-					elif char in "()":
-						self.display(i, j, char, curses.color_pair(self.app.color_pairs["magenta"]))
-					# Highlights digits
-					elif char in string.digits:
-						self.display(i, j, char, curses.color_pair(5))
-					# Highlights comments
-					elif char == "/":
-						if line[j+1] == "/" or (self.app.tab_char == "\t"
-								and line[j+1-len("       ") * line.count(self.app.tab_char)] == "/"):
-							self.display(i, j, line[j-(len("       ") * line.count(self.app.tab_char)
-								if self.app.tab_char == "\t" else 0):], curses.A_REVERSE)
-
-				# Finds all quotes and highlights them in the corresponding color
-				quotes_indexes = tuple(i for i, ltr in enumerate(line) if ltr == "\"")
-				for j, index in enumerate(quotes_indexes):
-					if j % 2 == 0:
-						try:
-							self.app.stdscr.addstr(
-								i,
-								index + (len("       ") * line.count(self.app.tab_char)
-								if self.app.tab_char == "\t" else 0), line[index:quotes_indexes[j + 1] + 1],
-								curses.color_pair(self.app.color_pairs["strings"] if not "=" in splitted_line[1] else 5)
-							)
-						except IndexError:
-							if len(splitted_line) > 1:
-								self.app.stdscr.addstr(
-									i,
-									index + (len("       ") * line.count(self.app.tab_char)
-									if self.app.tab_char == "\t" else 0), line[index:],
-									curses.color_pair(self.app.color_pairs["strings"] if not "=" in splitted_line[1] else 5)
-								)
+		if compilation_type == "cpp":
+			attributes = self.token_attributes()
+			y = 0
+			for line in final_compiled_code.split("\n"):
+				# The compiled code is displayed with tabs of 8 columns, and wraps at the edge of the screen
+				line = line.expandtabs(8)
+				for start, end, attribute in self.highlight_spans(line, attributes):
+					self.display(y + start // self.app.cols, start % self.app.cols, line[start:end], attribute)
+				y += len(line) // self.app.cols + 1
 
 		elif compilation_type == "algo":
 			pass
 
 
 	def display(self, y, x, text, color):
-		self.app.stdscr.addstr(y, x, text, color)
+		# The end of the code can be out of the screen
+		try:
+			self.app.stdscr.addstr(y, x, text, color)
+		except curses.error: pass
 
 
 def init(app) -> CompilationSyntaxHighlights:
-	return CompilationSyntaxHighlights(app)
\ No newline at end of file
+	return CompilationSyntaxHighlights(app)
@@ -0,0 +1,343 @@
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+from functools import partial
+from typing import Callable, Dict, List, Optional
+
+from plugin import Plugin
+from compiler import Compiler
+
+PLUGIN_METADATA = {
+	"hooks": ()
+}
+
+# Default memory the compiled outputs kept in the cache can take, in megabytes
+DEFAULT_CACHE_MEMORY = 32
+
+
+class CompilerExtensionsPlugin(Plugin):
+	"""
+	Lets plugins add instructions and processing steps to the compilers, without subclassing them.
+	Every extension is applied directly to the compiler instances : each instruction becomes an 'analyze_<name>'
+	attribute of the compiler, and the processing steps of each stage are chained in a single wrapper. Compiling with
+	any amount of extensions thus costs one lookup per line, whatever the order in which the plugins were loaded.
+	"""
+	__singleton = None
+
+	def __new__(cls, *args, **kwargs):
+		"""
+		Creates a singleton of the class.
+		"""
+		if cls.__singleton is None:
+			cls.__singleton = super().__new__(cls)
+		return cls.__singleton
+
+
+	def __init__(self, app):
+		super().__init__(app)
+
+		# The registrations are kept when the plugin is reloaded, as the instance is a singleton
+		# Compilers which are not in app.compilers (such as the Python compilers), by language and name
+		self.compilers: Dict[str, Dict[str, Compiler]] = getattr(self, "compilers", {})
+		# For each language : the instructions, mapped to their handler and the name of the block they open
+		self.instructions: Dict[str, Dict[str, tuple]] = getattr(self, "instructions", {})
+		# For each language : the var types, and the functions called by each stage of the compilation, by name
+		self.var_types: Dict[str, Dict[str, str]] = getattr(self, "var_types", {})
+		self.line_processors: Dict[str, Dict[str, Callable]] = getattr(self, "line_processors", {})
+		self.prepare_hooks: Dict[str, Dict[str, Callable]] = getattr(self, "prepare_hooks", {})
+		self.source_hooks: Dict[str, Dict[str, Callable]] = getattr(self, "source_hooks", {})
+		self.final_touches_hooks: Dict[str, Dict[str, Callable]] = getattr(self, "final_touches_hooks", {})
+		# For each language : functions returning the state of the options which change the compiled code
+		self.cache_states: Dict[str, Dict[str, Callable]] = getattr(self, "cache_states", {})
+
+		# Compiled outputs of every compiler, keyed by the compiler, its extensions and its source, mapped to the
+		# compiled code and lines, whether the compiler compiled the lines in place, and their size ; the least recently used ones are forgotten beyond the memory budget
+		self.compilation_cache: OrderedDict[tuple, tuple] = getattr(self, "compilation_cache", OrderedDict())
+		self.compilation_cache_size = getattr(self, "compilation_cache_size", 0)
+		# Some compilers compile in another thread (such as the ones of the previews)
+		self.cache_lock = getattr(self, "cache_lock", threading.Lock())
+		self.cache_memory = getattr(self, "cache_memory", DEFAULT_CACHE_MEMORY * 1024 * 1024)
+		# For each language, what identifies the extensions applied to its compiler
+		self.extensions_signatures: Dict[str, tuple] = getattr(self, "extensions_signatures", {})
+
+
+	def init(self):
+		self.cache_memory = self.get_config("cache_memory", DEFAULT_CACHE_MEMORY) * 1024 * 1024
+		with self.cache_lock:
+			self._trim_cache()
+		# Caches the compilations of every compiler, even the ones no plugin extends
+		self.apply()
+
+
+	@staticmethod
+	def _hook_name(hook: Callable) -> str:
+		"""
+		Names a hook after its module and qualified name, so registering it again after a reload replaces it.
+		:param hook: The hook.
+		:return: The name of the hook.
+		"""
+		hook = hook.func if isinstance(hook, partial) else hook
+		return f"{getattr(hook, '__module__', '')}.{getattr(hook, '__qualname__', repr(hook))}"
+
+
+	def add_compiler(self, language: str, compiler: Compiler, name: str = None):
+		"""
+		Registers a compiler which is not in app.compilers, so it gets the extensions of its language too.
+		A language can have several compilers, such as the compiler of a command and the one of a preview.
+		:param language: The language of the compiler, e.g. 'python'.
+		:param compiler: The compiler.
+		:param name: The name of the compiler, replacing the compiler added before under the same name. Defaults to the
+			name of its class.
+		"""
+		self.compilers.setdefault(language, {})[name or type(compiler).__qualname__] = compiler
+		self.apply(language)
+
+
+	def get_compiler(self, language: str) -> Optional[Compiler]:
+		"""
+		:param language: The language of the compiler.
+		:return: The main compiler of the given language, if there is one.
+		"""
+		return next(iter(self.get_compilers(language)), None)
+
+
+	def get_compilers(self, language: str) -> List[Compiler]:
+		"""
+		:param language: The language of the compilers.
+		:return: Every compiler of the given language, the one of app.compilers first.
+		"""
+		compilers = list(self.compilers.get(language, {}).values())
+		if language in self.app.compilers:
+			compilers.insert(0, self.app.compilers[language])
+		return compilers
+
+
+	def register_instruction(self, language: str, instruction_name: str, handler: Callable, block_name: str = None):
+		"""
+		Adds an instruction to the compiler of the given language.
+		:param language: The language of the compiler, e.g. 'C++'.
+		:param instruction_name: The name of the instruction, e.g. 'foreach'.
+		:param handler: Called as handler(compiler, instruction_name, instruction_params, line_number) to compile
+			each line using the instruction, like an 'analyze_<instruction_name>' method.
+		:param block_name: If the instruction opens a block, the name the compiler gives to the block.
+		"""
+		self.instructions.setdefault(language, {})[instruction_name] = (handler, block_name)
+		self.apply(language)
+
+
+	def register_var_type(self, language: str, var_type: str, translation: str):
+		"""
+		Adds a variable type to the compiler of the given language.
+		:param language: The language of the compiler.
+		:param var_type: The name of the type in the editor, e.g. 'image'.
+		:param translation: The name of the type in the language, e.g. 'Image'.
+		"""
+		self.var_types.setdefault(language, {})[var_type] = translation
+		self.apply(language)
+
+
+	def register_line_processor(self, language: str, processor: Callable):
+		"""
+		Adds a function called on each compiled line, after the final trim of the compiler.
+		:param language: The language of the compiler.
+		:param processor: Called as processor(compiler, instruction_name, line_number), and modifies
+			compiler.instructions_list[line_number] in place.
+		"""
+		self.line_processors.setdefault(language, {})[self._hook_name(processor)] = processor
+		self.apply(language)
+
+
+	def register_prepare_hook(self, language: str, hook: Callable):
+		"""
+		Adds a function called before each compilation, to reset the state of an extension.
+		:param language: The language of the compiler.
+		:param hook: Called as hook(compiler).
+		"""
+		self.prepare_hooks.setdefault(language, {})[self._hook_name(hook)] = hook
+		self.apply(language)
+
+
+	def register_source_hook(self, language: str, hook: Callable):
+		"""
+		Adds a function called with the source code before each compilation, to gather what an extension needs to know
+		about the whole program (such as the declared variables) before the lines are compiled.
+		:param language: The language of the compiler.
+		:param hook: Called as hook(compiler, instructions_list), the lines being the source code ; it must not
+			modify them.
+		"""
+		self.source_hooks.setdefault(language, {})[self._hook_name(hook)] = hook
+		self.apply(language)
+
+
+	def register_final_touches_hook(self, language: str, hook: Callable):
+		"""
+		Adds a function called on the compiled code, after the final touches of the compiler.
+		:param language: The language of the compiler.
+		:param hook: Called as hook(compiler, compiled_code), and returns the new compiled code.
+		"""
+		self.final_touches_hooks.setdefault(language, {})[self._hook_name(hook)] = hook
+		self.apply(language)
+
+
+	def register_cache_state(self, language: str, state: Callable):
+		"""
+		Adds a function giving the state of an option which changes the compiled code, so the compilation cache
+		doesn't give the code compiled with another value of the option.
+		:param language: The language of the compiler.
+		:param state: Called as state(compiler), and returns a hashable value.
+		"""
+		self.cache_states.setdefault(language, {})[self._hook_name(state)] = state
+		self.apply(language)
+
+
+	def _trim_cache(self):
+		"""
+		Forgets the least recently used compiled outputs until the cache fits in its memory budget.
+		Must be called with the cache lock.
+		"""
+		while self.compilation_cache and self.compilation_cache_size > self.cache_memory:
+			self.compilation_cache_size -= self.compilation_cache.popitem(last=False)[1][3]
+
+
+	def cached_compile(self, language: str, compiler: Compiler, instructions_list: List[str]) -> str:
+		"""
+		Compiles the given lines with the compiler, or gives the code compiled from the same lines before.
+		The compilations which raised errors are not cached, so their errors show up each time.
+		:param language: The language of the compiler.
+		:param compiler: The compiler.
+		:param instructions_list: The lines of code to compile. Modified in place into the compiled lines.
+		:return: The compiled code.
+		"""
+		source_hash = hashlib.sha1("\n".join(instructions_list).encode("utf-8", "surrogatepass")).digest()
+		cache_key = (
+			language, type(compiler).__qualname__, self.extensions_signatures.get(language), compiler.tab_char,
+			tuple(state(compiler) for state in self.cache_states.get(language, {}).values()), source_hash
+		)
+
+		with self.cache_lock:
+			cached_output = self.compilation_cache.get(cache_key)
+			if cached_output is not None:
+				self.compilation_cache.move_to_end(cache_key)
+		if cached_output is not None:
+			compiled_code, compiled_lines, in_place, _ = cached_output
+			# Resets the state of the previous compilation (errors...), and gives the compiled lines as the compiler would
+			compiler.prepare_new_compilation()
+			if in_place:
+				instructions_list[:] = compiled_lines
+				compiler.instructions_list = instructions_list
+			else:
+				compiler.instructions_list = list(compiled_lines)
+			return compiled_code
+
+		# Compiles the code, keeping in mind whether an error was raised
+		errors = []
+		def error(*args, **kwargs):
+			errors.append(args)
+			return type(compiler).error(compiler, *args, **kwargs)
+
+		compiler.error = error
+		try:
+			for hook in self.source_hooks.get(language, {}).values():
+				hook(compiler, instructions_list)
+			compiled_code = type(compiler).compile(compiler, instructions_list)
+		finally:
+			del compiler.error
+
+		if not errors and isinstance(compiled_code, str):
+			compiled_lines = tuple(compiler.instructions_list)
+			size = sys.getsizeof(compiled_code) + sum(map(sys.getsizeof, compiled_lines))
+			with self.cache_lock:
+				if cache_key not in self.compilation_cache:
+					self.compilation_cache[cache_key] = (
+						compiled_code, compiled_lines, compiler.instructions_list is instructions_list, size
+					)
+					self.compilation_cache_size += size
+					self._trim_cache()
+		return compiled_code
+
+
+	def apply(self, language: str = None):
+		"""
+		Applies the extensions to the compilers of the given language, replacing the ones applied before.
+		:param language: The language of the compilers. If None, applies the extensions to every compiler.
+		"""
+		if language is None:
+			for language in {*self.app.compilers, *self.compilers}:
+				self.apply(language)
+			return None
+
+		# Identifies the extensions, so the compilation cache doesn't give code compiled with other extensions
+		self.extensions_signatures[language] = (
+			tuple((name, self._hook_name(handler), block_name) for name, (handler, block_name) in sorted(
+				self.instructions.get(language, {}).items()
+			)),
+			tuple(sorted(self.var_types.get(language, {}).items())),
+			*(tuple(hooks.get(language, {})) for hooks in (
+				self.line_processors, self.prepare_hooks, self.source_hooks, self.final_touches_hooks, self.cache_states
+			))
+		)
+		for compiler in self.get_compilers(language):
+			self._apply_to_compiler(language, compiler)
+
+
+	def _apply_to_compiler(self, language: str, compiler: Compiler):
+		"""
+		Applies the extensions of the given language to one of its compilers.
+		:param language: The language of the compiler.
+		:param compiler: The compiler.
+		"""
+		# Adds the instructions, which the compiler will find as its own analyze methods
+		for instruction_name, (handler, block_name) in self.instructions.get(language, {}).items():
+			setattr(compiler, f"analyze_{instruction_name}", partial(handler, compiler))
+			if isinstance(compiler.other_instructions, list):
+				if instruction_name not in compiler.other_instructions:
+					compiler.other_instructions.append(instruction_name)
+			elif instruction_name not in compiler.other_instructions:
+				compiler.other_instructions = (*compiler.other_instructions, instruction_name)
+			if block_name is not None:
+				if isinstance(compiler.instruction_names, dict):
+					compiler.instruction_names[instruction_name] = block_name
+				elif instruction_name not in compiler.instruction_names:
+					compiler.instruction_names = (*compiler.instruction_names, instruction_name)
+		if self.var_types.get(language):
+			compiler.var_types = {**compiler.var_types, **self.var_types[language]}
+
+		compiler.compile = partial(self.cached_compile, language, compiler)
+
+		# Chains the hooks of each stage after the method of the compiler class
+		compiler_class = type(compiler)
+		line_processors = tuple(self.line_processors.get(language, {}).values())
+		prepare_hooks = tuple(self.prepare_hooks.get(language, {}).values())
+		final_touches_hooks = tuple(self.final_touches_hooks.get(language, {}).values())
+
+		def final_trim(instruction_name: str, line_number: int):
+			compiler_class.final_trim(compiler, instruction_name, line_number)
+			for processor in line_processors:
+				processor(compiler, instruction_name, line_number)
+
+		def prepare_new_compilation():
+			compiler_class.prepare_new_compilation(compiler)
+			for hook in prepare_hooks:
+				hook(compiler)
+
+		def final_touches():
+			compiled_code = compiler_class.final_touches(compiler)
+			for hook in final_touches_hooks:
+				compiled_code = hook(compiler, compiled_code)
+			return compiled_code
+
+		# Only shadows the methods of the class when there is something to chain
+		for method_name, hooks, method in (
+			("final_trim", line_processors, final_trim),
+			("prepare_new_compilation", prepare_hooks, prepare_new_compilation),
+			("final_touches", final_touches_hooks, final_touches)
+		):
+			if hooks:
+				setattr(compiler, method_name, method)
+			else:
+				compiler.__dict__.pop(method_name, None)
+
+
+def init(app) -> CompilerExtensionsPlugin:
+	return CompilerExtensionsPlugin(app)
@@ -2,6 +2,25 @@ import string
 
 from plugin import Plugin
 
+# Only adds commands, so it can be loaded the first time one of them is used
+PLUGIN_METADATA = {
+	"hooks": (),
+	"commands": {"e": "delete_word", "dl": "delete_line"},
+	"lazy": True
+}
+
+# Read along the metadata, to describe the commands before the plugin is loaded
+translations = {
+	"en": {
+		"delete_word": "Delete Word",
+		"delete_line": "Delete Line"
+	},
+	"fr": {
+		"delete_word": "Effacer Mot",
+		"delete_line": "Effacer Ligne"
+	}
+}
+
 
 class CtrlDel(Plugin):
 	"""
@@ -23,16 +42,7 @@ class CtrlDel(Plugin):
 		super().__init__(app)
 
 		# Creating translations
-		self.translations = {
-			"en": {
-				"delete_word": "Delete Word",
-				"delete_line": "Delete Line"
-			},
-			"fr": {
-				"delete_word": "Effacer Mot",
-				"delete_line": "Effacer Ligne"
-			}
-		}
+		self.translations = translations
 
 		# Creating commands
 		self.add_command("e", self.delete_word, self.translate("delete_word"))
@@ -2,6 +2,11 @@ from plugin import Plugin
 from datetime import datetime
 import curses
 
+PLUGIN_METADATA = {
+    "hooks": ("fixed_update",),
+    "essential": True
+}
+
 #-------------------------------------------------------
 
 
@@ -15,6 +15,11 @@ else:
 
 APP_PLACEMENT_SHIFT = 30  # MIN VALUE : 2
 
+PLUGIN_METADATA = {
+	"optional_dependencies": ("tabs",),
+	"hooks": ("update_on_keypress", "update_on_display")
+}
+
 
 class FileIndex(Plugin):
 	"""
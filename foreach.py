@@ -1,8 +1,11 @@
 import curses
+import sys
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Tuple
 
 from plugin import Plugin
-from algorithmic_compiler import AlgorithmicCompiler
-from cpp_compiler import CppCompiler
+from .compiler_extensions import CompilerExtensionsPlugin
 
 # Tries to load the autocomplete plugin
 try:
@@ -12,104 +15,220 @@ except ImportError:
 else:
 	AUTOCOMPLETE_PLUGIN_LOADED = True
 
+PLUGIN_METADATA = {
+	"dependencies": ("compiler_extensions",),
+	"optional_dependencies": ("autocomplete",)
+}
 
-class ForeachAlgorithmicCompiler(AlgorithmicCompiler):
+
+dataclass_params = {}
+if int(sys.version.split(" ")[0].split(".")[1]) >= 10:  # If Python version >= 3.10
+	dataclass_params["slots"] = True
+
+
+@dataclass(frozen=True, **dataclass_params)
+class ForeachType:
 	"""
-	Enhances the algorithmic compiler with grapic functions.
+	Type of a variable, as written in the editor (e.g. 'int', 'arr_int_3_3' or 'struct_Polygon').
 	"""
-	def __init__(self, algo_compiler: AlgorithmicCompiler):
-		try:
-			super().__init__(
-				algo_compiler.instruction_names,
-				algo_compiler.var_types,
-				algo_compiler.other_instructions,
-				algo_compiler.stdscr,
-				algo_compiler.translations,
-				algo_compiler.translate_method,
-				algo_compiler.app,
-				algo_compiler.tab_char
-			)
-		except TypeError:
-			super().__init__(algo_compiler)
-		self.instruction_names["foreach"] = "Pour Chaque"
-
-	def analyze_foreach(self, instruction_name:str, instruction_params:list, line_number:int):
+	# 'arr', 'struct', or 'var' for the other types
+	kind: str
+	# The type of the variable (of the elements for arrays), or the name of the structure
+	name: str
+	# The dimensions of the arrays
+	dimensions: Tuple[str, ...] = ()
+	# Whether the variable is a parameter of a function ; C++ can't loop over the arrays given as parameters by range
+	is_parameter: bool = False
+
+	@property
+	def element_type(self) -> "ForeachType":
 		"""
-		Analyzes the foreach loop.
+		The type of the elements of the array.
 		"""
-		self.instructions_stack.append("foreach")
-		if len(instruction_params) != 3:
-			self.error(f"{instruction_name} requires 3 params, got {len(instruction_params)}")
-		else:
-			# If the type is an array, we parse it correctly
-			if instruction_params[0].startswith("arr"):
-				vtype = f"Tableau[{']['.join(instruction_params[0].split('_')[2:])}] de " \
-				              f"{self.var_types[instruction_params[0].split('_')[1]]}s"
-
-			# If the type is a structure, we parse it correctly
-			elif instruction_params[0].startswith("struct_"):
-				vtype = f"Structure {instruction_params[0][7:]}"
-
-			# If the param is NOT an array nor a structure
-			else:
-				# We add it to the params as the type, followed by the name, of whose we remove the
-				# first char if it is '&' (no datar mode in algorithmic)
-				vtype = self.var_types[instruction_params[0]]
-
-			# Checks if the destination is in data/result mode
-			if instruction_params[1][0] == "&":
-				vname = f"{instruction_params[1][1:]} en donnée/résultat"
-			else:
-				vname = instruction_params[1]
-
-			# Description of the for loop
-			self.instructions_list[line_number] = f"Pour chaque élément de {instruction_params[2]} stockés dans " \
-			                                      f"{vname} (type {vtype})"
-
-
-class ForeachCppCompiler(CppCompiler):
-	"""
-	Enhances the algorithmic compiler with grapic functions.
-	"""
-	def __init__(self, cpp_compiler: CppCompiler):
-		try:
-			super().__init__(
-				cpp_compiler.instruction_names,
-				cpp_compiler.var_types,
-				cpp_compiler.other_instructions,
-				cpp_compiler.stdscr,
-				cpp_compiler.app,
-				cpp_compiler.use_struct_keyword
-			)
-		except TypeError:
-			super().__init__(cpp_compiler)
-		self.instruction_names = (*self.instruction_names, "foreach")
-
-
-	def analyze_foreach(self, instruction_name:str, instruction_params:list, line_number:int):
-		"""
-		Analyzes the foreach loop.
-		"""
-		self.instructions_stack.append("foreach")
-		if len(instruction_params) != 3:
-			self.error(f"{instruction_name} requires 3 params, got {len(instruction_params)}")
-		else:
-			# If the type is an array, we parse it correctly
-			if instruction_params[0].startswith("arr"):
-				split_type = instruction_params[0].split("_")
-				vtype = f"{self.var_types[split_type[1]]} {split_type[2]}[{']['.join(split_type[2:])}]"
+		if len(self.dimensions) > 1:
+			return ForeachType("arr", self.name, self.dimensions[1:])
+		return parse_type(self.name)
+
+
+@lru_cache(maxsize=None)
+def parse_type(type_string: str) -> ForeachType:
+	"""
+	Parses a type once, whatever the amount of lines using it.
+	:param type_string: The type, e.g. 'arr_int_3_3'.
+	:return: The parsed type.
+	"""
+	if type_string.startswith("arr_"):
+		_, name, *dimensions = type_string.split("_")
+		return ForeachType("arr", name, tuple(dimensions))
+	elif type_string.startswith("struct_"):
+		return ForeachType("struct", type_string[7:])
+	return ForeachType("var", type_string)
+
+
+def record_declarations(compiler, instructions_list:list):
+	"""
+	Builds the symbol table of the program before it is compiled : the type of each array, structure and variable,
+	so each foreach finds the type of its source in a single lookup.
+	The declarations of each function, including its parameters, are only visible in its own lines, so a name declared
+	in several functions keeps the type it has in each of them.
+	"""
+	global_symbols = {}
+	# The symbols of the function containing each line, or None outside of the functions
+	function_symbols = [None] * len(instructions_list)
+	# The blocks opened inside the current function, the function itself included
+	depth = 0
+	symbols = global_symbols
+	for line_number, line in enumerate(instructions_list):
+		instruction_name, *instruction_params = line.strip().split(" ")
+		# fx <return_type> <name> [<type> <name>] [...] ; the functions can't be nested, so a function also ends
+		# where the next one starts
+		if instruction_name == "fx":
+			symbols, depth = {}, 0
+			for i in range(2, len(instruction_params) - 1, 2):
+				param_type = parse_type(instruction_params[i].lstrip("&"))
+				symbols[instruction_params[i + 1]] = ForeachType(
+					param_type.kind, param_type.name, param_type.dimensions, True
+				)
+		# arr <type> <name> <dimension1> [dimension2] [...]
+		elif instruction_name == "arr" and len(instruction_params) >= 3:
+			symbols[instruction_params[1]] = ForeachType("arr", instruction_params[0], tuple(instruction_params[2:]))
+		# init <struct_name> <var_name> [...]
+		elif instruction_name == "init" and len(instruction_params) >= 2:
+			symbols[instruction_params[1]] = ForeachType("struct", instruction_params[0])
+		# <type> <name1> [name2] [...]
+		elif instruction_name in compiler.var_types:
+			for variable_name in instruction_params:
+				symbols[variable_name] = parse_type(instruction_name)
+
+		if symbols is not global_symbols:
+			function_symbols[line_number] = symbols
+			# Follows the blocks to find the 'end' of the function
+			if instruction_name == "end":
+				depth -= 1
+				if depth <= 0:
+					symbols = global_symbols
+			elif instruction_name == "fx" or (
+				instruction_name in compiler.instruction_names and instruction_name not in ("else", "elif")
+			):
+				depth += 1
+
+	compiler.foreach_symbols = global_symbols
+	compiler.foreach_function_symbols = function_symbols
+
+
+def find_symbol(compiler, name:str, line_number:int):
+	"""
+	Finds the type of a variable as seen from the given line : declared in the function containing the line, or else
+	outside of the functions.
+	:return: The type of the variable, or None if it was not declared.
+	"""
+	function_symbols = getattr(compiler, "foreach_function_symbols", ())
+	if line_number < len(function_symbols) and function_symbols[line_number] is not None \
+			and name in function_symbols[line_number]:
+		return function_symbols[line_number][name]
+	return getattr(compiler, "foreach_symbols", {}).get(name)
+
+
+def resolve_foreach(compiler, instruction_name:str, instruction_params:list, line_number:int):
+	"""
+	Finds the type of the destination of a foreach loop, and of its source if it was declared.
+	:return: The type of the destination, its name, the source, and the type of the source (or None if it was not
+		declared) ; or None if the loop is invalid.
+	"""
+	compiler.instructions_stack.append("foreach")
+
+	# The type of the destination can be omitted if the source was declared, as the type of its elements
+	source_type = find_symbol(compiler, instruction_params[-1], line_number) if instruction_params else None
+	if len(instruction_params) == 2 and source_type is not None and source_type.kind == "arr":
+		destination_type, destination, source = source_type.element_type, *instruction_params
+	elif len(instruction_params) == 3:
+		destination_type, (destination, source) = parse_type(instruction_params[0]), instruction_params[1:]
+	else:
+		compiler.error(f"{instruction_name} requires 3 params, got {len(instruction_params)}")
+		return None
+
+	if destination_type.kind != "struct" and destination_type.name not in compiler.var_types:
+		compiler.error(f"{instruction_name} : unknown type '{destination_type.name}'")
+		return None
+	return destination_type, destination, source, source_type
+
+
+def analyze_algorithmic_foreach(compiler, instruction_name:str, instruction_params:list, line_number:int):
+	"""
+	Analyzes the foreach loop.
+	"""
+	resolved_foreach = resolve_foreach(compiler, instruction_name, instruction_params, line_number)
+	if resolved_foreach is None:
+		return None
+	destination_type, destination, source, _ = resolved_foreach
+
+	# If the type is an array, we parse it correctly
+	if destination_type.kind == "arr":
+		vtype = f"Tableau[{']['.join(destination_type.dimensions)}] de {compiler.var_types[destination_type.name]}s"
+
+	# If the type is a structure, we parse it correctly
+	elif destination_type.kind == "struct":
+		vtype = f"Structure {destination_type.name}"
 
-			# If the type is a structure, we parse it correctly
-			elif instruction_params[0].startswith("struct_"):
-				vtype = "struct " * self.use_struct_keyword + f"{instruction_params[0][7:]}"
+	# If the param is NOT an array nor a structure
+	else:
+		vtype = compiler.var_types[destination_type.name]
 
-			# If the param is NOT an array nor a structure
-			else:
-				# We add it to the params as the type, followed by the name
-				vtype = self.var_types[instruction_params[0]]
+	# Checks if the destination is in data/result mode
+	if destination[0] == "&":
+		vname = f"{destination[1:]} en donnée/résultat"
+	else:
+		vname = destination
 
-			# Description of the for loop
-			self.instructions_list[line_number] = f"for ({vtype} {instruction_params[1]} : {instruction_params[2]})" + " {"
+	# Description of the for loop
+	compiler.instructions_list[line_number] = f"Pour chaque élément de {source} stockés dans {vname} (type {vtype})"
+
+
+def analyze_cpp_foreach(compiler, instruction_name:str, instruction_params:list, line_number:int):
+	"""
+	Analyzes the foreach loop.
+	"""
+	resolved_foreach = resolve_foreach(compiler, instruction_name, instruction_params, line_number)
+	if resolved_foreach is None:
+		return None
+	destination_type, destination, source, source_type = resolved_foreach
+
+	# If the type is an array, the elements can only be referenced, as arrays can't be copied
+	if destination_type.kind == "arr":
+		declaration = f"{compiler.var_types[destination_type.name]} (&{destination.lstrip('&')})" \
+		              f"[{']['.join(destination_type.dimensions)}]"
+
+	# If the type is a structure, we parse it correctly
+	elif destination_type.kind == "struct":
+		declaration = "struct " * compiler.use_struct_keyword + f"{destination_type.name} {destination}"
+
+	# If the param is NOT an array nor a structure
+	else:
+		declaration = f"{compiler.var_types[destination_type.name]} {destination}"
+
+	# Loops over the indexes when asked to, or when the source is an array given as parameter (which is only a pointer
+	# in C++, so can't be looped over by range)
+	if source_type is not None and source_type.kind == "arr" and source_type.dimensions and (
+		source_type.is_parameter or getattr(compiler, "foreach_index_loops", False)
+	):
+		index = f"{destination.lstrip('&')}_index"
+		compiler.instructions_list[line_number] = f"for (int {index} = 0; {index} < {source_type.dimensions[0]}; " \
+		                                          f"{index}++) {{ {declaration} = {source}[{index}];"
+	else:
+		compiler.instructions_list[line_number] = f"for ({declaration} : {source})" + " {"
+
+
+def analyze_python_foreach(compiler, instruction_name:str, instruction_params:list, line_number:int):
+	"""
+	Analyzes the foreach loop.
+	"""
+	resolved_foreach = resolve_foreach(compiler, instruction_name, instruction_params, line_number)
+	if resolved_foreach is None:
+		return None
+	_, destination, source, _ = resolved_foreach
+
+	# Python has no references, the elements being modified in place if they are mutable
+	compiler.instructions_list[line_number] = f"for {destination.lstrip('&')} in {source}:"
 
 
 class ForeachPlugin(Plugin):
@@ -126,6 +245,17 @@ class ForeachPlugin(Plugin):
 
 	def __init__(self, app):
 		super().__init__(app)
+		self.compiler_extensions = CompilerExtensionsPlugin(app)
+
+		# Creating translations
+		self.translations = {
+			"en": {
+				"index_loops": "Loop over the indexes of the arrays in C++ foreach"
+			},
+			"fr": {
+				"index_loops": "Boucler sur les indices des tableaux dans les foreach C++"
+			}
+		}
 
 		# Adds the foreach keyword to the instructions
 		self.app.color_control_flow["statement"] = (
@@ -142,31 +272,48 @@ class ForeachPlugin(Plugin):
 		"""
 		Reloads the autocompletion if available, and adds everything to the compilers.
 		"""
-		# Inits the autocomplete plugin if necessary
-		if AUTOCOMPLETE_PLUGIN_LOADED and not self.autocomplete_plugin.was_initialized:
-			self.autocomplete_plugin.init()
-			self.autocomplete_plugin.was_initialized = True
+		self.index_loops = self.get_config("index_loops", False)
+		self.add_option(self.translate("index_loops"), lambda: self.index_loops, self.toggle_index_loops)
 
 		# Tries to reload the autocomplete if it was loaded, we make sure those keywords are available to it
 		if "autocomplete" in self.app.plugins:
 			self.app.plugins["autocomplete"][-1].reload_autocomplete()
 
-		# Adds all the foreach components to the compilers
-		for compiler in self.app.compilers.values():
-			compiler.other_instructions.append("foreach")
-
-		# Changes the superclass from the compilers to be the current compiler class
-		ForeachAlgorithmicCompiler.__bases__ = (self.app.compilers["algorithmic"].__class__,)
-		ForeachCppCompiler.__bases__ = (self.app.compilers["C++"].__class__,)
-
-		# Replaces the compilers with the enhanced compilers
-		self.app.compilers["algorithmic"] = ForeachAlgorithmicCompiler(self.app.compilers["algorithmic"])
-		self.app.compilers["C++"] = ForeachCppCompiler(self.app.compilers["C++"])
+		# Adds the foreach loop to the compilers
+		self.compiler_extensions.register_instruction("algorithmic", "foreach", analyze_algorithmic_foreach, "Pour Chaque")
+		self.compiler_extensions.register_instruction("C++", "foreach", analyze_cpp_foreach, "foreach")
+		self.compiler_extensions.register_instruction("python", "foreach", analyze_python_foreach, "foreach")
+		for language in ("algorithmic", "C++", "python"):
+			self.compiler_extensions.register_source_hook(language, record_declarations)
+		self.compiler_extensions.register_prepare_hook("C++", self.prepare_index_loops)
+		self.compiler_extensions.register_cache_state("C++", self.index_loops_state)
 
 		# Adds the autocomplete to the plugin
 		if AUTOCOMPLETE_PLUGIN_LOADED:
-			self.autocomplete_plugin.documentation["foreach"] = "foreach <type> <destination_var> <source_array>"
-			self.autocomplete_plugin.examples["foreach"] = ["foreach string fruit fruits"]
+			self.autocomplete_plugin.documentation["foreach"] = "foreach [type] <destination_var> <source_array>"
+			self.autocomplete_plugin.examples["foreach"] = ["foreach string fruit fruits", "foreach fruit fruits"]
+
+
+	def prepare_index_loops(self, compiler):
+		"""
+		Tells the C++ compiler whether to loop over the indexes of the declared arrays before each compilation.
+		"""
+		compiler.foreach_index_loops = self.index_loops
+
+
+	def index_loops_state(self, compiler) -> bool:
+		"""
+		Whether the C++ compiler loops over the indexes of the declared arrays, as it changes the compiled code.
+		"""
+		return self.index_loops
+
+
+	def toggle_index_loops(self):
+		"""
+		Toggles looping over the indexes of the declared arrays in C++ in the live app and the config.
+		"""
+		self.index_loops = not self.index_loops
+		self.config["index_loops"] = self.index_loops
 
 
 	def update_on_syntax_highlight(self, line: str, splitted_line: list, i: int):
@@ -0,0 +1,254 @@
+import curses
+import time
+from collections import deque
+from functools import wraps
+from typing import Callable, Dict, Optional, Tuple
+
+from plugin import Plugin
+from utils import input_text
+
+PLUGIN_METADATA = {
+	"hooks": ("fixed_update",),
+	"essential": True
+}
+
+# Default time the fixed updates of all plugins can take each frame, in milliseconds
+DEFAULT_FRAME_BUDGET = 8
+
+# Amount of frames between each adjustment of the throttling, which is based on the average of these frames
+ADJUST_INTERVAL = 30
+
+# Maximum amount of frames between two fixed updates of a non-essential plugin
+MAX_SKIP_FACTOR = 16
+
+# Methods of the app drawing each frame, whose time counts in the frame time along with the fixed updates
+MEASURED_APP_METHODS = ("display_text", "apply_stylings")
+
+
+def _is_budgeted(function: Callable) -> bool:
+	"""
+	Checks whether a function is a wrapper of the frame budget, or wraps one (e.g. the wrapper of the profiler).
+	:param function: The function to check.
+	:return: True if a wrapper of the frame budget is in the chain of wrapped functions.
+	"""
+	while function is not None:
+		if getattr(function, "_frame_budget_wrapped", False):
+			return True
+		function = getattr(function, "__wrapped__", None)
+	return False
+
+
+class FrameBudgetPlugin(Plugin):
+	"""
+	Measures the time spent drawing each frame (the fixed updates of the plugins and the display of the app), and
+	updates non-essential plugins less often when it exceeds the frame budget.
+	"""
+	__singleton = None
+
+	def __new__(cls, *args, **kwargs):
+		"""
+		Creates a singleton of the class.
+		"""
+		if cls.__singleton is None:
+			cls.__singleton = super().__new__(cls)
+		return cls.__singleton
+
+
+	def __init__(self, app):
+		super().__init__(app)
+
+		# Creating translations
+		self.translations = {
+			"en": {
+				"toggle_throttling": "Throttle plugins exceeding the frame budget",
+				"frame_budget": "Frame budget (ms)",
+				"input_frame_budget": "Input the time drawing each frame can take, in milliseconds :",
+				"degraded": " Slow plugins : updated every {skip_factor} frames ({frame_time:.1f}/{frame_budget}ms) "
+			},
+			"fr": {
+				"toggle_throttling": "Ralentir les plugins dépassant le budget par image",
+				"frame_budget": "Budget par image (ms)",
+				"input_frame_budget": "Entrez le temps que peut prendre l'affichage de chaque image, en millisecondes :",
+				"degraded": " Plugins lents : actualisés toutes les {skip_factor} images ({frame_time:.1f}/{frame_budget}ms) "
+			}
+		}
+
+		# Creates the use vars
+		self.throttling = True
+		self.frame_budget = DEFAULT_FRAME_BUDGET
+		# Only one in skip_factor frames updates the non-essential plugins
+		self.skip_factor = 1
+		self.frame_index = 0
+		# Time spent drawing the current frame, and the last frames, in seconds
+		self.current_frame_time = 0.
+		self.frames_times = deque(maxlen=ADJUST_INTERVAL)
+		# Amount of measured functions currently running, so the functions they call are not counted twice
+		self.measure_depth = 0
+		# Name of the plugin whose fixed update starts each frame
+		self.first_plugin: Optional[str] = None
+		# Plugin instance, original fixed update and wrapper of each wrapped plugin
+		self.wrapped_plugins: Dict[str, Tuple[Plugin, Callable, Callable]] = {}
+		# Original method and wrapper of each measured method of the app
+		self.wrapped_app_methods: Dict[str, Tuple[Callable, Callable]] = {}
+
+
+	def init(self):
+		"""
+		Gets the config and creates the options.
+		"""
+		self.throttling = self.get_config("throttling", True)
+		self.frame_budget = self.get_config("frame_budget", DEFAULT_FRAME_BUDGET)
+		self.add_option(self.translate("toggle_throttling"), lambda: self.throttling, self.toggle_throttling)
+		self.add_option(self.translate("frame_budget"), lambda: self.frame_budget, self.change_frame_budget)
+
+
+	def toggle_throttling(self):
+		"""
+		Toggles the throttling of the plugins in the live app and the config.
+		"""
+		self.throttling = not self.throttling
+		self.config["throttling"] = self.throttling
+		if not self.throttling:
+			self.skip_factor = 1
+
+
+	def change_frame_budget(self):
+		"""
+		Asks the user for a new frame budget.
+		"""
+		self.app.stdscr.addstr(
+			self.app.rows // 2 - 1,
+			self.app.cols // 2 - len(self.translate("input_frame_budget")) // 2,
+			self.translate("input_frame_budget")
+		)
+		frame_budget = input_text(self.app.stdscr, self.app.cols // 2, self.app.rows // 2)
+
+		# Checks if the budget is a positive number
+		try:
+			frame_budget = float(frame_budget)
+			if frame_budget > 0:
+				self.frame_budget = frame_budget
+				self.config["frame_budget"] = frame_budget
+		except ValueError:
+			return
+
+
+	def _wrap_plugins(self):
+		"""
+		Wraps the fixed update of every loaded plugin which is not wrapped yet, to measure and throttle it, and the
+		drawing methods of the app, to measure them.
+		"""
+		self.first_plugin = None
+		for i, (plugin_name, plugin) in enumerate(self.app.plugins.items()):
+			if len(plugin) < 2 or not hasattr(plugin[1], "fixed_update"):
+				continue
+			if self.first_plugin is None:
+				self.first_plugin = plugin_name
+
+			# If the plugin is already wrapped, even under the wrapper of another plugin, there's nothing to do
+			if _is_budgeted(plugin[1].fixed_update):
+				continue
+
+			# Essential plugins (e.g. the ones drawing every frame) are measured, but never throttled
+			metadata = getattr(plugin[0], "PLUGIN_METADATA", {})
+			essential = plugin[1] is self or metadata.get("essential", False)
+			self._wrap(plugin_name, plugin[1], essential, i)
+
+		for method in MEASURED_APP_METHODS:
+			if hasattr(self.app, method) and not _is_budgeted(getattr(self.app, method)):
+				original_method = getattr(self.app, method)
+				measured_method = self._measured(original_method)
+				setattr(self.app, method, measured_method)
+				self.wrapped_app_methods[method] = (original_method, measured_method)
+
+
+	def _measured(self, function: Callable) -> Callable:
+		"""
+		Creates a function adding the time spent in the given function to the time of the current frame.
+		:param function: The function to measure.
+		:return: The measuring function, marked as a wrapper of the frame budget.
+		"""
+		@wraps(function)
+		def measured_function(*args, **kwargs):
+			# Functions called by another measured function are already counted in its time
+			if self.measure_depth > 0:
+				return function(*args, **kwargs)
+
+			self.measure_depth += 1
+			start_time = time.perf_counter()
+			try:
+				return function(*args, **kwargs)
+			finally:
+				self.current_frame_time += time.perf_counter() - start_time
+				self.measure_depth -= 1
+
+		measured_function._frame_budget_wrapped = True
+		return measured_function
+
+
+	def _wrap(self, plugin_name: str, plugin: Plugin, essential: bool, offset: int):
+		"""
+		Replaces the fixed update of a plugin by a function measuring it, and skipping it if the plugin is throttled.
+		:param plugin_name: The name of the plugin.
+		:param plugin: The instance of the plugin.
+		:param essential: Whether the plugin must be updated every frame.
+		:param offset: Shifts the frames in which the plugin is updated, so throttled plugins don't all run in the
+			same frame.
+		"""
+		original_fixed_update = plugin.fixed_update
+		measured_fixed_update = self._measured(original_fixed_update)
+
+		@wraps(original_fixed_update)
+		def budgeted_fixed_update(*args, **kwargs):
+			# The first plugin to be updated starts a new frame
+			if plugin_name == self.first_plugin:
+				self._end_frame()
+
+			# Skips the update of throttled plugins, except once every skip_factor frames
+			if not essential and (self.frame_index + offset) % self.skip_factor != 0:
+				return None
+
+			return measured_fixed_update(*args, **kwargs)
+
+		budgeted_fixed_update._frame_budget_wrapped = True
+		plugin.fixed_update = budgeted_fixed_update
+		self.wrapped_plugins[plugin_name] = (plugin, original_fixed_update, budgeted_fixed_update)
+
+
+	def _end_frame(self):
+		"""
+		Records the time of the frame that just ended, and adjusts the throttling every ADJUST_INTERVAL frames.
+		"""
+		self.frames_times.append(self.current_frame_time)
+		self.current_frame_time = 0.
+		self.frame_index += 1
+
+		if not self.throttling or self.frame_index % ADJUST_INTERVAL != 0:
+			return None
+
+		# Throttles the plugins twice as much if the frames exceed the budget, or half as much if they are well under it
+		average_frame_time = sum(self.frames_times) / len(self.frames_times) * 1000
+		if average_frame_time > self.frame_budget:
+			self.skip_factor = min(self.skip_factor * 2, MAX_SKIP_FACTOR)
+		elif average_frame_time < self.frame_budget / 2:
+			self.skip_factor = max(self.skip_factor // 2, 1)
+
+
+	def fixed_update(self):
+		"""
+		Wraps the newly loaded plugins, and warns the user in the status bar if plugins are throttled.
+		"""
+		self._wrap_plugins()
+
+		if self.skip_factor > 1 and self.frames_times:
+			msg = self.translate(
+				"degraded",
+				skip_factor=self.skip_factor,
+				frame_time=sum(self.frames_times) / len(self.frames_times) * 1000,
+				frame_budget=self.frame_budget
+			)[:self.app.cols - 1]
+			self.app.stdscr.addstr(self.app.rows - 1, self.app.cols - len(msg) - 1, msg, curses.A_REVERSE)
+
+
+def init(app) -> FrameBudgetPlugin:
+	return FrameBudgetPlugin(app)
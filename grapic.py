@@ -1,9 +1,19 @@
+import re
+import string
+import sys
 import typing_extensions
-from typing import Callable
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable, Dict, Optional, Tuple
 
 from plugin import Plugin
-from algorithmic_compiler import AlgorithmicCompiler
-from cpp_compiler import CppCompiler
+from .compiler_extensions import CompilerExtensionsPlugin
+
+# Reloads the keywords of the autocomplete plugin if it is installed, so it has to be initialized first
+PLUGIN_METADATA = {
+	"dependencies": ("compiler_extensions",),
+	"optional_dependencies": ("autocomplete",)
+}
 
 
 translations = {
@@ -24,658 +34,364 @@ translations = {
 }
 
 
-
-
-class GrapicAlgorithmicCompiler(AlgorithmicCompiler):
+def function_mappings_regex(function_mappings: Dict[str, str]) -> re.Pattern:
 	"""
-	Enhances the algorithmic compiler with grapic functions.
+	Creates the regex matching in a single pass the calls to the given functions, along with string literals so the
+	calls written inside strings are left untouched. Methods with the same name (such as grapic.wdisplay) are not
+	matched.
+	:param function_mappings: The names of the grapic functions, mapped to their translation.
+	:return: The compiled regex.
 	"""
-	def __init__(self, algo_compiler: AlgorithmicCompiler, tr_method: Callable):
-		try:
-			super().__init__(
-				algo_compiler.instruction_names,
-				{**algo_compiler.var_types, "image": "Image"},
-				algo_compiler.other_instructions,
-				algo_compiler.stdscr,
-				algo_compiler.translations,
-				algo_compiler.translate_method,
-				algo_compiler.app,
-				algo_compiler.tab_char
-			)
-		except TypeError:
-			super().__init__(algo_compiler)
-		# Keeps track of whether we initialized the window already (cannot use any other function prior to this)
-		self.did_winit = False
-		# Keeps in mind the translate method
-		self.translate = tr_method
-
-
-	def prepare_new_compilation(self):
-		super().prepare_new_compilation()
-		self.did_winit = False
-
-
-
-
-	def final_trim(self, instruction_name:str, line_number:int):
-		super().final_trim(instruction_name, line_number)
-		for algo_function, equivalent in (
-			("wdisplay(", "AfficherFenêtre("),
-			("etime(", "TempsÉcoulé("),
-		):
-			self.instructions_list[line_number] = self.instructions_list[line_number].replace(algo_function, equivalent)
-
-
-	def analyze_winit(self, instruction_name:str, instruction_params:list, line_number:int):
-		"""
-		Analyzes the winInit method.
-		"""
-		# Puts the string back together
-		if instruction_params[0].startswith("\""):
-			try:
-				while not instruction_params[0].endswith("\""):
-					instruction_params[0] += " " + instruction_params.pop(1)
-			except IndexError:
-				self.error(self.translate("error", "winit_finished_string", line_number=line_number+1))
-
-		# Creates the function compilation
-		if len(instruction_params) != 3:
-			self.error(
-				self.translate("error", "param_number", line_number=line_number+1, instruction_name=instruction_name, nb_params=3, given_params_nb=len(instruction_params))
-			)
-			#self.error(f"Error on line {line_number + 1} : winit method requires 3 params, got {len(instruction_params)}")
-		else:
-			self.instructions_list[line_number] = f"Initialisation de la fenêtre avec pour nom {instruction_params[0]}," \
-			                                      f" largeur {instruction_params[1]}, et hauteur {instruction_params[2]}"
-			self.did_winit = True
-
-
-	def analyze_wclear(self, instruction_name:str, instruction_params:list, line_number:int):
-		"""
-		Analyzes the winClear method.
-		"""
-		# Checks if we can call this function
-		if not self.did_winit:
-			self.error(
-				self.translate("error", "no_winit", line_number=line_number+1, instruction_name=instruction_name)
-			)
-
-		# Creates the function compilation
-		else:
-			self.instructions_list[line_number] = "Effaçage de la fenêtre"
-
-
-	def analyze_wdisplay(self, instruction_name:str, instruction_params:list, line_number:int):
-		"""
-		Analyzes the winDisplay method.
-		"""
-		# Checks if we can call this function
-		if not self.did_winit:
-			self.error(
-				self.translate("error", "no_winit", line_number=line_number + 1, instruction_name=instruction_name)
-			)
-
-		# Creates the function compilation
-		else:
-			self.instructions_list[line_number] = "Affichage de la fenêtre"
-
-
-	def analyze_wquit(self, instruction_name:str, instruction_params:list, line_number:int):
-		"""
-		Analyzes the winQuit method.
-		"""
-		# Checks if we can call this function
-		if not self.did_winit:
-			self.error(
-				self.translate("error", "no_winit", line_number=line_number + 1, instruction_name=instruction_name)
-			)
-
-		# Creates the function compilation
-		else:
-			self.instructions_list[line_number] = "Fermeture de la fenêtre"
+	functions = "|".join(sorted(map(re.escape, function_mappings), key=len, reverse=True))
+	return re.compile(rf"(?P<string>\"(?:[^\"\\]|\\.)*\")|(?<![\w.])(?P<function>{functions})\(")
 
 
-	def analyze_color(self, instruction_name:str, instruction_params:list, line_number:int):
-		"""
-		Analyzes the color method.
-		"""
-		# Checks if we can call this function
-		if not self.did_winit:
-			self.error(
-				self.translate("error", "no_winit", line_number=line_number + 1, instruction_name=instruction_name)
-			)
-
-		# Creates the function compilation
-		else:
-			if len(instruction_params) != 3:
-				self.error(
-					self.translate("error", "param_number", line_number=line_number + 1, instruction_name=instruction_name, nb_params=3, given_params_nb=len(instruction_params))
-				)
-			else:
-				self.instructions_list[line_number] = f"Changement de la couleur vers ({', '.join(instruction_params)})"
-
-
-	def analyze_bcolor(self, instruction_name:str, instruction_params:list, line_number:int):
-		"""
-		Analyzes the backgroundColor method.
-		"""
-		# Checks if we can call this function
-		if not self.did_winit:
-			self.error(
-				self.translate("error", "no_winit", line_number=line_number + 1, instruction_name=instruction_name)
-			)
-
-		# Creates the function compilation
-		else:
-			if len(instruction_params) != 3:
-				self.error(
-					self.translate("error", "param_number", line_number=line_number + 1, instruction_name=instruction_name, nb_params=3, given_params_nb=len(instruction_params))
-				)
-			else:
-				self.instructions_list[line_number] = f"Changement de la couleur d'arrière plan vers ({', '.join(instruction_params)})"
-
-
-	def analyze_pspace(self, instruction_name: str, instruction_params: list, line_number: int):
-		"""
-		Analyzes the pressSpace method.
-		"""
-		# Checks if we can call this function
-		if not self.did_winit:
-			self.error(
-				self.translate("error", "no_winit", line_number=line_number + 1, instruction_name=instruction_name)
-			)
-
-		# Creates the function compilation
-		else:
-			self.instructions_list[line_number] = "Attente d'un appui sur Espace de l'utilisateur"
-
-
-	def analyze_circle(self, instruction_name:str, instruction_params:list, line_number:int):
-		"""
-		Analyzes the circle method.
-		"""
-		# Checks if we can call this function
-		if not self.did_winit:
-			self.error(
-				self.translate("error", "no_winit", line_number=line_number + 1, instruction_name=instruction_name)
-			)
-
-		# Creates the function compilation
-		else:
-			if len(instruction_params) != 3:
-				self.error(
-					self.translate("error", "param_number", line_number=line_number + 1, instruction_name=instruction_name, nb_params=3, given_params_nb=len(instruction_params))
-				)
-			else:
-				self.instructions_list[line_number] = f"Trace un cercle de centre ({instruction_params[0]}, " \
-				                                      f"{instruction_params[1]}) et de rayon {instruction_params[2]}"
-
-
-	def analyze_circlef(self, instruction_name:str, instruction_params:list, line_number:int):
-		"""
-		Analyzes the circleFill method.
-		"""
-		# Checks if we can call this function
-		if not self.did_winit:
-			self.error(
-				self.translate("error", "no_winit", line_number=line_number + 1, instruction_name=instruction_name)
-			)
-
-		# Creates the function compilation
-		else:
-			if len(instruction_params) != 3:
-				self.error(
-					self.translate("error", "param_number", line_number=line_number + 1, instruction_name=instruction_name, nb_params=3, given_params_nb=len(instruction_params))
-				)
-			else:
-				self.instructions_list[line_number] = f"Trace un cercle REMPLI de centre ({instruction_params[0]}, " \
-				                                      f"{instruction_params[1]}) et de rayon {instruction_params[2]}"
-
-
-	def analyze_line(self, instruction_name:str, instruction_params:list, line_number:int):
-		"""
-		Analyzes the line method.
-		"""
-		# Checks if we can call this function
-		if not self.did_winit:
-			self.error(
-				self.translate("error", "no_winit", line_number=line_number + 1, instruction_name=instruction_name)
-			)
-
-		# Creates the function compilation
-		else:
-			if len(instruction_params) != 4:
-				self.error(
-					self.translate("error", "param_number", line_number=line_number + 1, instruction_name=instruction_name, nb_params=4, given_params_nb=len(instruction_params))
-				)
-			else:
-				self.instructions_list[line_number] = f"Trace une ligne de ({', '.join(instruction_params[:2])}) à ({', '.join(instruction_params[2:])})"
+def rewrite_function_calls(line: str, function_mappings: Dict[str, str], regex: re.Pattern) -> str:
+	"""
+	Rewrites the calls to grapic functions in the given line.
+	:param line: The line to rewrite.
+	:param function_mappings: The names of the grapic functions, mapped to their translation.
+	:param regex: The regex created by function_mappings_regex for these function mappings.
+	:return: The rewritten line.
+	"""
+	return regex.sub(
+		lambda match: match.group("string") or function_mappings[match.group("function")] + "(",
+		line
+	)
+
+
+# Grapic functions used without parameters check, mapped to their translation in each language
+ALGORITHMIC_FUNCTION_MAPPINGS = {"wdisplay": "AfficherFenêtre", "etime": "TempsÉcoulé"}
+ALGORITHMIC_FUNCTIONS_REGEX = function_mappings_regex(ALGORITHMIC_FUNCTION_MAPPINGS)
+CPP_FUNCTION_MAPPINGS = {"wdisplay": "winDisplay", "etime": "elapsedTime"}
+CPP_FUNCTIONS_REGEX = function_mappings_regex(CPP_FUNCTION_MAPPINGS)
+PYTHON_FUNCTION_MAPPINGS = {"wdisplay": "grapic.wdisplay", "etime": "grapic.etime"}
+PYTHON_FUNCTIONS_REGEX = function_mappings_regex(PYTHON_FUNCTION_MAPPINGS)
+
+# Added before the Python programs using grapic : the calls go to the 'grapic' object given by whoever runs the
+# program (such as the grapic preview), and are ignored when the program is run on its own
+PYTHON_GRAPIC_HEADER = (
+	"try:\n"
+	"{tab}grapic\n"
+	"except NameError:\n"
+	"{tab}class _IgnoredGrapic:\n"
+	"{tab}{tab}def __getattr__(self, name):\n"
+	"{tab}{tab}{tab}return lambda *args: 0\n"
+	"{tab}grapic = _IgnoredGrapic()\n"
+)
+
+dataclass_params = {}
+if int(sys.version.split(" ")[0].split(".")[1]) >= 10:  # If Python version >= 3.10
+	dataclass_params["slots"] = True
+
+
+@dataclass(**dataclass_params)
+class GrapicInstruction:
+	"""
+	Describes how a grapic instruction is checked and translated.
+	"""
+	# The accepted amounts of parameters, or None if the parameters are not checked
+	params_numbers: Optional[Tuple[int, ...]]
+	# Whether the instruction can only be used once the window is initialized
+	needs_winit: bool
+	# Translation in algorithmic, C++ and Python, formatted with each parameter ({0}, {1}...) and all of them as
+	# {params} ; None if the compiler translates the instruction with its own method
+	algorithmic: Optional[str]
+	cpp: Optional[str]
+	python: Optional[str]
+
+
+# Every grapic instruction ; a new one only needs a line here
+GRAPIC_INSTRUCTIONS = {
+	# winInit(str name, int width, int height)
+	"winit": GrapicInstruction((3,), False, None, None, None),
+	# winClear()
+	"wclear": GrapicInstruction(None, True, "Effaçage de la fenêtre", "winClear()", "grapic.wclear()"),
+	# winDisplay()
+	"wdisplay": GrapicInstruction(None, True, "Affichage de la fenêtre", "winDisplay()", "grapic.wdisplay()"),
+	# winQuit()
+	"wquit": GrapicInstruction(None, True, "Fermeture de la fenêtre", "winQuit()", "grapic.wquit()"),
+	# color(unsigned char r, unsigned char g, unsigned char b)
+	"color": GrapicInstruction(
+		(3,), True, "Changement de la couleur vers ({params})", "color({params})", "grapic.color({params})"
+	),
+	# backgroundColor(unsigned char r, unsigned char g, unsigned char b)
+	"bcolor": GrapicInstruction(
+		(3,), True, "Changement de la couleur d'arrière plan vers ({params})", "backgroundColor({params})",
+		"grapic.bcolor({params})"
+	),
+	# pressSpace()
+	"pspace": GrapicInstruction(
+		None, True, "Attente d'un appui sur Espace de l'utilisateur", "pressSpace()", "grapic.pspace()"
+	),
+	# circle(int xc, int yc, int radius)
+	"circle": GrapicInstruction(
+		(3,), True, "Trace un cercle de centre ({0}, {1}) et de rayon {2}", "circle({params})", "grapic.circle({params})"
+	),
+	# circleFill(int xc, int yc, int radius)
+	"circlef": GrapicInstruction(
+		(3,), True, "Trace un cercle REMPLI de centre ({0}, {1}) et de rayon {2}", "circleFill({params})",
+		"grapic.circlef({params})"
+	),
+	# line(int x1, int y1, int x2, int y2)
+	"line": GrapicInstruction(
+		(4,), True, "Trace une ligne de ({0}, {1}) à ({2}, {3})", "line({params})", "grapic.line({params})"
+	),
+	# rectangle(int x1, int y1, int x2, int y2)
+	"rect": GrapicInstruction(
+		(4,), True, "Trace un rectangle de ({0}, {1}) à ({2}, {3})", "rectangle({params})", "grapic.rect({params})"
+	),
+	# rectangleFill(int x1, int y1, int x2, int y2)
+	"rectf": GrapicInstruction(
+		(4,), True, "Trace un rectangle REMPLI de ({0}, {1}) à ({2}, {3})", "rectangleFill({params})",
+		"grapic.rectf({params})"
+	),
+	# putPixel(int x, int y, unsigned char r, unsigned char g, unsigned char b, unsigned char a=255)
+	"ppixel": GrapicInstruction((5, 6), True, None, "put_pixel({params})", "grapic.ppixel({params})"),
+	# delay(int duration)
+	"delay": GrapicInstruction((1,), True, "Attendre {0} ms", "delay({0})", "grapic.delay({0})"),
+	# image(str filename)
+	"img": GrapicInstruction(None, True, None, None, None)
+}
 
 
-	def analyze_rect(self, instruction_name:str, instruction_params:list, line_number:int):
-		"""
-		Analyzes the rectangle method.
-		"""
-		# Checks if we can call this function
-		if not self.did_winit:
-			self.error(
-				self.translate("error", "no_winit", line_number=line_number + 1, instruction_name=instruction_name)
-			)
+def check_grapic_call(compiler, translate: Callable, instruction_name: str, instruction_params: list, line_number: int,
+                      instruction: GrapicInstruction) -> bool:
+	"""
+	Checks that a grapic instruction is called after winit and with the right amount of parameters, showing an error
+	otherwise.
+	:param compiler: The compiler compiling the instruction.
+	:param translate: The translate method of the plugin.
+	:param instruction_name: The name of the instruction.
+	:param instruction_params: The parameters of the instruction.
+	:param line_number: The index of the line.
+	:param instruction: The spec of the instruction.
+	:return: Whether the call is valid.
+	"""
+	# Checks if we can call this function
+	if instruction.needs_winit and not compiler.did_winit:
+		compiler.error(translate("error", "no_winit", line_number=line_number + 1, instruction_name=instruction_name))
+		return False
 
-		# Creates the function compilation
-		else:
-			if len(instruction_params) != 4:
-				self.error(
-					self.translate("error", "param_number", line_number=line_number + 1, instruction_name=instruction_name, nb_params=4, given_params_nb=len(instruction_params))
-				)
-			else:
-				self.instructions_list[line_number] = f"Trace un rectangle de ({', '.join(instruction_params[:2])}) à ({', '.join(instruction_params[2:])})"
+	if instruction.params_numbers is not None and len(instruction_params) not in instruction.params_numbers:
+		compiler.error(translate(
+			"error", "param_number", line_number=line_number + 1, instruction_name=instruction_name,
+			nb_params="/".join(map(str, instruction.params_numbers)), given_params_nb=len(instruction_params)
+		))
+		return False
+	return True
 
 
-	def analyze_rectf(self, instruction_name:str, instruction_params:list, line_number:int):
-		"""
-		Analyzes the rectangleFill method.
-		"""
-		# Checks if we can call this function
-		if not self.did_winit:
-			self.error(
-				self.translate("error", "no_winit", line_number=line_number + 1, instruction_name=instruction_name)
-			)
-
-		# Creates the function compilation
-		else:
-			if len(instruction_params) != 4:
-				self.error(
-					self.translate("error", "param_number", line_number=line_number + 1, instruction_name=instruction_name, nb_params=4, given_params_nb=len(instruction_params))
-				)
-			else:
-				self.instructions_list[line_number] = f"Trace un rectangle REMPLI de ({', '.join(instruction_params[:2])}) à ({', '.join(instruction_params[2:])})"
+def join_winit_string(compiler, translate: Callable, instruction_params: list, line_number: int) -> bool:
+	"""
+	Puts back together the name of the window given to winit, which was split on its spaces.
+	:param compiler: The compiler compiling the instruction.
+	:param translate: The translate method of the plugin.
+	:param instruction_params: The parameters of the instruction, modified in place.
+	:param line_number: The index of the line.
+	:return: Whether the string is finished.
+	"""
+	if instruction_params and instruction_params[0].startswith("\""):
+		try:
+			while not instruction_params[0].endswith("\""):
+				instruction_params[0] += " " + instruction_params.pop(1)
+		except IndexError:
+			compiler.error(translate("error", "winit_finished_string", line_number=line_number+1))
+			return False
+	return True
 
-	def analyze_ppixel(self, instruction_name: str, instruction_params: list, line_number: int):
-		"""
-		Analyzes the put_pixel method.
-		"""
-		# Checks if we can call this function
-		if not self.did_winit:
-			self.error(
-				self.translate("error", "no_winit", line_number=line_number + 1, instruction_name=instruction_name)
-			)
 
-		# Creates the function compilation
+def make_analyzer(instruction: GrapicInstruction, template: str, translate: Callable) -> Callable:
+	"""
+	Creates the handler compiling a grapic instruction translated with a template.
+	The checks and the translation are specialized once here, so compiling a line only does what the template needs.
+	:param instruction: The spec of the instruction.
+	:param template: The translation of the instruction.
+	:param translate: The translate method of the plugin, for the error messages.
+	:return: The handler, taking the same parameters as the analyze methods of the compilers.
+	"""
+	fields = {field for _, field, _, _ in string.Formatter().parse(template) if field is not None}
+	# Templates without parameters are constant, and templates only using all the parameters are a concatenation
+	is_constant = not fields
+	prefix, suffix = template.split("{params}") if fields == {"params"} else (None, None)
+
+	needs_winit = instruction.needs_winit
+	params_numbers = instruction.params_numbers
+	def analyze(compiler, instruction_name: str, instruction_params: list, line_number: int):
+		# Only goes through the full check (and its error messages) if the call looks invalid
+		if (needs_winit and not compiler.did_winit) or (
+			params_numbers is not None and len(instruction_params) not in params_numbers
+		):
+			check_grapic_call(compiler, translate, instruction_name, instruction_params, line_number, instruction)
 		else:
-			if len(instruction_params) < 5 or len(instruction_params) > 6:
-				self.error(
-					self.translate("error", "param_number", line_number=line_number + 1, instruction_name=instruction_name, nb_params="5/6", given_params_nb=len(instruction_params))
-				)
+			if is_constant:
+				compiler.instructions_list[line_number] = template
+			elif prefix is not None:
+				compiler.instructions_list[line_number] = prefix + ", ".join(instruction_params) + suffix
 			else:
-				self.instructions_list[line_number] = f"Pose un pixel sur la fenêtre aux coordonnées " \
-				                                      f"({', '.join(instruction_params[:2])}) avec une couleur" \
-				                                      f" ({', '.join(instruction_params[2:])})"
-
-
-	def analyze_delay(self, instruction_name:str, instruction_params:list, line_number:int):
-		"""
-		Analyzes the delay method.
-		"""
-		# Checks if we can call this function
-		if not self.did_winit:
-			self.error(
-				self.translate("error", "no_winit", line_number=line_number + 1, instruction_name=instruction_name)
-			)
-
-		# Creates the function compilation
-		else:
-			if len(instruction_params) != 1:
-				self.error(
-					self.translate("error", "param_number", line_number=line_number + 1, instruction_name=instruction_name, nb_params=1, given_params_nb=len(instruction_params))
+				compiler.instructions_list[line_number] = template.format(
+					*instruction_params, params=", ".join(instruction_params)
 				)
-			else:
-				self.instructions_list[line_number] = f"Attendre {instruction_params[0]} ms"
-
+			compiler.uses_grapic = True
+	return analyze
 
-	def analyze_img(self, instruction_name:str, instruction_params:list, line_number:int):
-		"""
-		Analyzes the image method.
-		"""
-		# Checks if we can call this function
-		if not self.did_winit:
-			self.error(
-				self.translate("error", "no_winit", line_number=line_number + 1, instruction_name=instruction_name)
-			)
 
-		# Creates the function compilation
-		else:
-			if len(instruction_params) > 2 and instruction_params[-2]  in ("->", "<-"):
-				self.instructions_list[line_number] = f"Charge l'image au chemin {' '.join(instruction_params[:-2])} dans la variable {instruction_params[-1]}"
-			else:
-				self.instructions_list[line_number] = f"Charge l'image au chemin {' '.join(instruction_params)}"
-
-
-class GrapicCppCompiler(CppCompiler):
+def analyze_algorithmic_winit(compiler, instruction_name:str, instruction_params:list, line_number:int, translate:Callable):
 	"""
-	Enhances the algorithmic compiler with grapic functions.
+	Analyzes the winInit method.
 	"""
-	def __init__(self, cpp_compiler: CppCompiler, tr_method: Callable):
-		try:
-			super().__init__(
-				cpp_compiler.instruction_names,
-				{**cpp_compiler.var_types, "image": "Image"},
-				cpp_compiler.other_instructions,
-				cpp_compiler.stdscr,
-				cpp_compiler.app,
-				cpp_compiler.use_struct_keyword
-			)
-		except TypeError:
-			super().__init__(cpp_compiler)
-		# Keeps track of whether we initialized the window already (cannot use any other function prior to this)
-		self.did_winit = False
-		# Keeps in mind the translation function
-		self.translate = tr_method
-
-
-	def prepare_new_compilation(self):
-		super().prepare_new_compilation()
-		self.did_winit = False
-
-
-	def final_trim(self, instruction_name:str, line_number:int):
-		super().final_trim(instruction_name, line_number)
-		for algo_function, cpp_equivalent in (
-			("wdisplay(", "winDisplay("),
-			("etime(", "elapsedTime("),
-		):
-			self.instructions_list[line_number] = self.instructions_list[line_number].replace(algo_function, cpp_equivalent)
-
-
-
-	def final_touches(self):
-		"""
-		Adds the grapic import and namespace before iostream.
-		"""
-		final_compiled_code = super().final_touches()
-		if self.did_winit:
-			final_compiled_code = "#include <Grapic.h>\nusing namespace grapic;\n" + final_compiled_code
-		return final_compiled_code
-
-
-	def analyze_winit(self, instruction_name:str, instruction_params:list, line_number:int):
-		"""
-		Analyzes the winInit method.
-		"""
-		# Puts the string back together
-		if instruction_params[0].startswith("\""):
-			try:
-				while not instruction_params[0].endswith("\""):
-					instruction_params[0] += " " + instruction_params.pop(1)
-			except IndexError:
-				self.error(self.translate("error", "winit_finished_string", line_number=line_number+1))
-
-		# Creates the function compilation
-		if len(instruction_params) != 3:
-			self.error(
-				self.translate("error", "param_number", line_number=line_number + 1, instruction_name=instruction_name, nb_params=3, given_params_nb=len(instruction_params))
-			)
-		else:
-			self.instructions_list[line_number] = f"winInit({', '.join(instruction_params)})"
-			self.did_winit = True
-
-
-	def analyze_wclear(self, instruction_name:str, instruction_params:list, line_number:int):
-		"""
-		Analyzes the winClear method.
-		"""
-		# Checks if we can call this function
-		if not self.did_winit:
-			self.error(
-				self.translate("error", "no_winit", line_number=line_number + 1, instruction_name=instruction_name)
-			)
-
-		# Creates the function compilation
-		else:
-			self.instructions_list[line_number] = "winClear()"
-
-
-	def analyze_wdisplay(self, instruction_name:str, instruction_params:list, line_number:int):
-		"""
-		Analyzes the winDisplay method.
-		"""
-		# Checks if we can call this function
-		if not self.did_winit:
-			self.error(
-				self.translate("error", "no_winit", line_number=line_number + 1, instruction_name=instruction_name)
-			)
-
-		# Creates the function compilation
-		else:
-			self.instructions_list[line_number] = "winDisplay()"
-
-
-	def analyze_wquit(self, instruction_name:str, instruction_params:list, line_number:int):
-		"""
-		Analyzes the winQuit method.
-		"""
-		# Checks if we can call this function
-		if not self.did_winit:
-			self.error(
-				self.translate("error", "no_winit", line_number=line_number + 1, instruction_name=instruction_name)
-			)
-
-		# Creates the function compilation
-		else:
-			self.instructions_list[line_number] = "winQuit()"
+	if join_winit_string(compiler, translate, instruction_params, line_number) and check_grapic_call(
+		compiler, translate, instruction_name, instruction_params, line_number, GRAPIC_INSTRUCTIONS["winit"]
+	):
+		compiler.instructions_list[line_number] = f"Initialisation de la fenêtre avec pour nom {instruction_params[0]}," \
+		                                          f" largeur {instruction_params[1]}, et hauteur {instruction_params[2]}"
+		compiler.did_winit = True
 
 
-	def analyze_color(self, instruction_name:str, instruction_params:list, line_number:int):
-		"""
-		Analyzes the color method.
-		"""
-		# Checks if we can call this function
-		if not self.did_winit:
-			self.error(
-				self.translate("error", "no_winit", line_number=line_number + 1, instruction_name=instruction_name)
-			)
-
-		# Creates the function compilation
-		else:
-			if len(instruction_params) != 3:
-				self.error(
-					self.translate("error", "param_number", line_number=line_number + 1, instruction_name=instruction_name, nb_params=3, given_params_nb=len(instruction_params))
-				)
-			else:
-				self.instructions_list[line_number] = f"color({', '.join(instruction_params)})"
-
+def analyze_algorithmic_ppixel(compiler, instruction_name:str, instruction_params:list, line_number:int, translate:Callable):
+	"""
+	Analyzes the put_pixel method.
+	"""
+	if check_grapic_call(
+		compiler, translate, instruction_name, instruction_params, line_number, GRAPIC_INSTRUCTIONS["ppixel"]
+	):
+		compiler.instructions_list[line_number] = f"Pose un pixel sur la fenêtre aux coordonnées " \
+		                                          f"({', '.join(instruction_params[:2])}) avec une couleur" \
+		                                          f" ({', '.join(instruction_params[2:])})"
 
-	def analyze_bcolor(self, instruction_name:str, instruction_params:list, line_number:int):
-		"""
-		Analyzes the backgroundColor method.
-		"""
-		# Checks if we can call this function
-		if not self.did_winit:
-			self.error(
-				self.translate("error", "no_winit", line_number=line_number + 1, instruction_name=instruction_name)
-			)
 
-		# Creates the function compilation
+def analyze_algorithmic_img(compiler, instruction_name:str, instruction_params:list, line_number:int, translate:Callable):
+	"""
+	Analyzes the image method.
+	"""
+	if check_grapic_call(compiler, translate, instruction_name, instruction_params, line_number, GRAPIC_INSTRUCTIONS["img"]):
+		if len(instruction_params) > 2 and instruction_params[-2]  in ("->", "<-"):
+			compiler.instructions_list[line_number] = f"Charge l'image au chemin {' '.join(instruction_params[:-2])} dans la variable {instruction_params[-1]}"
 		else:
-			if len(instruction_params) != 3:
-				self.error(
-					self.translate("error", "param_number", line_number=line_number + 1, instruction_name=instruction_name, nb_params=3, given_params_nb=len(instruction_params))
-				)
-			else:
-				self.instructions_list[line_number] = f"backgroundColor({', '.join(instruction_params)})"
+			compiler.instructions_list[line_number] = f"Charge l'image au chemin {' '.join(instruction_params)}"
 
 
-	def analyze_pspace(self, instruction_name:str, instruction_params:list, line_number:int):
-		"""
-		Analyzes the pressSpace method.
-		"""
-		# Checks if we can call this function
-		if not self.did_winit:
-			self.error(
-				self.translate("error", "no_winit", line_number=line_number + 1, instruction_name=instruction_name)
-			)
-
-		# Creates the function compilation
-		else:
-			self.instructions_list[line_number] = "pressSpace()"
-
+def analyze_cpp_winit(compiler, instruction_name:str, instruction_params:list, line_number:int, translate:Callable):
+	"""
+	Analyzes the winInit method.
+	"""
+	if join_winit_string(compiler, translate, instruction_params, line_number) and check_grapic_call(
+		compiler, translate, instruction_name, instruction_params, line_number, GRAPIC_INSTRUCTIONS["winit"]
+	):
+		compiler.instructions_list[line_number] = f"winInit({', '.join(instruction_params)})"
+		compiler.did_winit = True
 
-	def analyze_circle(self, instruction_name:str, instruction_params:list, line_number:int):
-		"""
-		Analyzes the circle method.
-		"""
-		# Checks if we can call this function
-		if not self.did_winit:
-			self.error(
-				self.translate("error", "no_winit", line_number=line_number + 1, instruction_name=instruction_name)
-			)
 
-		# Creates the function compilation
+def analyze_cpp_img(compiler, instruction_name:str, instruction_params:list, line_number:int, translate:Callable):
+	"""
+	Analyzes the image method.
+	"""
+	if check_grapic_call(compiler, translate, instruction_name, instruction_params, line_number, GRAPIC_INSTRUCTIONS["img"]):
+		if len(instruction_params) > 2 and instruction_params[-2] in ("->", "<-"):
+			compiler.instructions_list[line_number] = f"Image {instruction_params[-1]} = image({' '.join(instruction_params[:-2])})"
 		else:
-			if len(instruction_params) != 3:
-				self.error(
-					self.translate("error", "param_number", line_number=line_number + 1, instruction_name=instruction_name, nb_params=3, given_params_nb=len(instruction_params))
-				)
-			else:
-				self.instructions_list[line_number] = f"circle({', '.join(instruction_params)})"
+			compiler.instructions_list[line_number] = f"image({' '.join(instruction_params)})"
 
 
-	def analyze_circlef(self, instruction_name:str, instruction_params:list, line_number:int):
-		"""
-		Analyzes the circleFill method.
-		"""
-		# Checks if we can call this function
-		if not self.did_winit:
-			self.error(
-				self.translate("error", "no_winit", line_number=line_number + 1, instruction_name=instruction_name)
-			)
-
-		# Creates the function compilation
-		else:
-			if len(instruction_params) != 3:
-				self.error(
-					self.translate("error", "param_number", line_number=line_number + 1, instruction_name=instruction_name, nb_params=3, given_params_nb=len(instruction_params))
-				)
-			else:
-				self.instructions_list[line_number] = f"circleFill({', '.join(instruction_params)})"
+def analyze_python_winit(compiler, instruction_name:str, instruction_params:list, line_number:int, translate:Callable):
+	"""
+	Analyzes the winInit method.
+	"""
+	if join_winit_string(compiler, translate, instruction_params, line_number) and check_grapic_call(
+		compiler, translate, instruction_name, instruction_params, line_number, GRAPIC_INSTRUCTIONS["winit"]
+	):
+		compiler.instructions_list[line_number] = f"grapic.winit({', '.join(instruction_params)})"
+		compiler.did_winit = True
+		compiler.uses_grapic = True
 
 
-	def analyze_line(self, instruction_name:str, instruction_params:list, line_number:int):
-		"""
-		Analyzes the line method.
-		"""
-		# Checks if we can call this function
-		if not self.did_winit:
-			self.error(
-				self.translate("error", "no_winit", line_number=line_number + 1, instruction_name=instruction_name)
-			)
-
-		# Creates the function compilation
+def analyze_python_img(compiler, instruction_name:str, instruction_params:list, line_number:int, translate:Callable):
+	"""
+	Analyzes the image method.
+	"""
+	if check_grapic_call(compiler, translate, instruction_name, instruction_params, line_number, GRAPIC_INSTRUCTIONS["img"]):
+		if len(instruction_params) > 2 and instruction_params[-2] in ("->", "<-"):
+			compiler.instructions_list[line_number] = f"{instruction_params[-1]} = grapic.image({' '.join(instruction_params[:-2])})"
 		else:
-			if len(instruction_params) != 4:
-				self.error(
-					self.translate("error", "param_number", line_number=line_number + 1, instruction_name=instruction_name, nb_params=4, given_params_nb=len(instruction_params))
-				)
-			else:
-				self.instructions_list[line_number] = f"line({', '.join(instruction_params)})"
+			compiler.instructions_list[line_number] = f"grapic.image({' '.join(instruction_params)})"
+		compiler.uses_grapic = True
 
 
-	def analyze_rect(self, instruction_name:str, instruction_params:list, line_number:int):
-		"""
-		Analyzes the rectangle method.
-		"""
-		# Checks if we can call this function
-		if not self.did_winit:
-			self.error(
-				self.translate("error", "no_winit", line_number=line_number + 1, instruction_name=instruction_name)
-			)
-
-		# Creates the function compilation
-		else:
-			if len(instruction_params) != 4:
-				self.error(
-					self.translate("error", "param_number", line_number=line_number + 1, instruction_name=instruction_name, nb_params=4, given_params_nb=len(instruction_params))
-				)
-			else:
-				self.instructions_list[line_number] = f"rectangle({', '.join(instruction_params)})"
-
+def reset_winit(compiler):
+	"""
+	Forgets about the window and the grapic calls before each compilation.
+	"""
+	compiler.did_winit = False
+	compiler.uses_grapic = False
 
-	def analyze_rectf(self, instruction_name:str, instruction_params:list, line_number:int):
-		"""
-		Analyzes the rectangleFill method.
-		"""
-		# Checks if we can call this function
-		if not self.did_winit:
-			self.error(
-				self.translate("error", "no_winit", line_number=line_number + 1, instruction_name=instruction_name)
-			)
 
-		# Creates the function compilation
-		else:
-			if len(instruction_params) != 4:
-				self.error(
-					self.translate("error", "param_number", line_number=line_number + 1, instruction_name=instruction_name, nb_params=4, given_params_nb=len(instruction_params))
-				)
-			else:
-				self.instructions_list[line_number] = f"rectangleFill({', '.join(instruction_params)})"
+def rewrite_algorithmic_calls(compiler, instruction_name:str, line_number:int):
+	"""
+	Rewrites the calls to the grapic functions in a compiled algorithmic line.
+	"""
+	compiler.instructions_list[line_number] = rewrite_function_calls(
+		compiler.instructions_list[line_number], ALGORITHMIC_FUNCTION_MAPPINGS, ALGORITHMIC_FUNCTIONS_REGEX
+	)
 
 
-	def analyze_ppixel(self, instruction_name:str, instruction_params:list, line_number:int):
-		"""
-		Analyzes the put_pixel method.
-		"""
-		# Checks if we can call this function
-		if not self.did_winit:
-			self.error(
-				self.translate("error", "no_winit", line_number=line_number + 1, instruction_name=instruction_name)
-			)
+def rewrite_cpp_calls(compiler, instruction_name:str, line_number:int):
+	"""
+	Rewrites the calls to the grapic functions in a compiled C++ line.
+	"""
+	compiler.instructions_list[line_number] = rewrite_function_calls(
+		compiler.instructions_list[line_number], CPP_FUNCTION_MAPPINGS, CPP_FUNCTIONS_REGEX
+	)
 
-		# Creates the function compilation
-		else:
-			if len(instruction_params) < 5 or len(instruction_params) > 6:
-				self.error(
-					self.translate("error", "param_number", line_number=line_number + 1, instruction_name=instruction_name, nb_params="5/6", given_params_nb=len(instruction_params))
-				)
-			else:
-				self.instructions_list[line_number] = f"put_pixel({', '.join(instruction_params)})"
 
+def rewrite_python_calls(compiler, instruction_name:str, line_number:int):
+	"""
+	Rewrites the calls to the grapic functions in a compiled Python line.
+	"""
+	line = compiler.instructions_list[line_number]
+	rewritten_line = rewrite_function_calls(line, PYTHON_FUNCTION_MAPPINGS, PYTHON_FUNCTIONS_REGEX)
+	if rewritten_line != line:
+		compiler.instructions_list[line_number] = rewritten_line
+		compiler.uses_grapic = True
 
-	def analyze_delay(self, instruction_name:str, instruction_params:list, line_number:int):
-		"""
-		Analyzes the delay method.
-		"""
-		# Checks if we can call this function
-		if not self.did_winit:
-			self.error(
-				self.translate("error", "no_winit", line_number=line_number + 1, instruction_name=instruction_name)
-			)
 
-		# Creates the function compilation
-		else:
-			if len(instruction_params) != 1:
-				self.error(
-					self.translate("error", "param_number", line_number=line_number + 1, instruction_name=instruction_name, nb_params=1, given_params_nb=len(instruction_params))
-				)
-			else:
-				self.instructions_list[line_number] = f"delay({instruction_params[0]})"
+def include_python_grapic(compiler, final_compiled_code:str) -> str:
+	"""
+	Adds the grapic backend before the Python code using it.
+	"""
+	if compiler.uses_grapic:
+		final_compiled_code = PYTHON_GRAPIC_HEADER.format(tab=compiler.app.tab_char) + final_compiled_code
+	return final_compiled_code
 
 
-	def analyze_img(self, instruction_name:str, instruction_params:list, line_number:int):
-		"""
-		Analyzes the image method.
-		"""
-		# Checks if we can call this function
-		if not self.did_winit:
-			self.error(
-				self.translate("error", "no_winit", line_number=line_number + 1, instruction_name=instruction_name)
-			)
+def include_grapic(compiler, final_compiled_code:str) -> str:
+	"""
+	Adds the grapic import and namespace before iostream.
+	"""
+	if compiler.did_winit:
+		final_compiled_code = "#include <Grapic.h>\nusing namespace grapic;\n" + final_compiled_code
+	return final_compiled_code
+
+
+# For each language : the field of the templates in GRAPIC_INSTRUCTIONS, the handlers of the instructions without
+# template, the rewriting of the function calls, and the final touches
+GRAPIC_LANGUAGES = {
+	"algorithmic": (
+		"algorithmic",
+		{"winit": analyze_algorithmic_winit, "ppixel": analyze_algorithmic_ppixel, "img": analyze_algorithmic_img},
+		rewrite_algorithmic_calls,
+		None
+	),
+	"C++": ("cpp", {"winit": analyze_cpp_winit, "img": analyze_cpp_img}, rewrite_cpp_calls, include_grapic),
+	"python": (
+		"python",
+		{"winit": analyze_python_winit, "img": analyze_python_img},
+		rewrite_python_calls,
+		include_python_grapic
+	)
+}
 
-		# Creates the function compilation
-		else:
-			if len(instruction_params) > 2 and instruction_params[-2] in ("->", "<-"):
-				self.instructions_list[line_number] = f"Image {instruction_params[-1]} = image({' '.join(instruction_params[:-2])})"
-			else:
-				self.instructions_list[line_number] = f"image({' '.join(instruction_params)})"
+# Type of the images in each language ; Python evaluates the annotations of the global variables
+IMAGE_TYPES = {"algorithmic": "Image", "C++": "Image", "python": "object"}
 
 
 class GrapicPlugin(Plugin):
@@ -692,25 +408,10 @@ class GrapicPlugin(Plugin):
 
 	def __init__(self, app):
 		super().__init__(app)
+		self.compiler_extensions = CompilerExtensionsPlugin(app)
 
 		# Adds all the grapic keywords to the instructions
-		self.grapic_components = (
-			"winit",     # winInit(str name, int width, int height)
-			"wclear",    # winClear()
-			"wdisplay",  # winDisplay()
-			"wquit",     # winQuit()
-			"color",     # color(unsigned char r, unsigned char g, unsigned char b)
-			"bcolor",    # backgroundColor(unsigned char r, unsigned char g, unsigned char b)
-			"pspace",    # pressSpace()
-			"circle",    # circle(int xc, int yc, int radius)
-			"circlef",   # circleFill(int xc, int yc, int radius)
-			"line",      # line(int x1, int y1, int x2, int y2)
-			"rect",      # rectangle(int x1, int y1, int x2, int y2)
-			"rectf",     # rectangleFill(int x1, int y1, int x2, int y2)
-			"ppixel",    # putPixel(int x, int y, unsigned char r, unsigned char g, unsigned char b, unsigned char a=255)
-			"delay",     # delay(int duration)
-			"img",       # image(str filename)
-		)
+		self.grapic_components = tuple(GRAPIC_INSTRUCTIONS)
 		self.app.color_control_flow["instruction"] = (
 			*self.app.color_control_flow["instruction"],
 			*self.grapic_components
@@ -728,18 +429,20 @@ class GrapicPlugin(Plugin):
 		# Also sets up the translation
 		self.translations = translations
 
-		# Adds all the grapic components to the compilers
-		for compiler in self.app.compilers.values():
-			for component in self.grapic_components:
-				compiler.other_instructions.append(component)
-
-		# Changes the superclass from the compilers to be the current compiler class
-		GrapicAlgorithmicCompiler.__bases__ = (self.app.compilers["algorithmic"].__class__,)
-		GrapicCppCompiler.__bases__ = (self.app.compilers["C++"].__class__,)
-
-		# Replaces the compilers with the enhanced compilers
-		self.app.compilers["algorithmic"] = GrapicAlgorithmicCompiler(self.app.compilers["algorithmic"], self.translate)
-		self.app.compilers["C++"] = GrapicCppCompiler(self.app.compilers["C++"], self.translate)
+		# Adds the grapic instructions and their processing to the compilers
+		for language, (template_field, handlers, line_processor, final_touches_hook) in GRAPIC_LANGUAGES.items():
+			for instruction_name, instruction in GRAPIC_INSTRUCTIONS.items():
+				template = getattr(instruction, template_field)
+				self.compiler_extensions.register_instruction(
+					language, instruction_name,
+					make_analyzer(instruction, template, self.translate) if template is not None else
+					partial(handlers[instruction_name], translate=self.translate)
+				)
+			self.compiler_extensions.register_var_type(language, "image", IMAGE_TYPES[language])
+			self.compiler_extensions.register_prepare_hook(language, reset_winit)
+			self.compiler_extensions.register_line_processor(language, line_processor)
+			if final_touches_hook is not None:
+				self.compiler_extensions.register_final_touches_hook(language, final_touches_hook)
 
 
 def init(app):
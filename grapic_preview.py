@@ -0,0 +1,977 @@
+import ast
+import bisect
+import curses
+import json
+import operator
+import os
+import struct
+import subprocess
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from plugin import Plugin
+from utils import input_text
+
+# NumPy renders the drawings ; without it, the preview is unavailable
+try:
+	import numpy as np
+except ImportError:
+	NUMPY_AVAILABLE = False
+else:
+	NUMPY_AVAILABLE = True
+
+# With the Python compilation, the programs are compiled to Python and executed, so loops and variables work ;
+# otherwise, only the grapic instructions are interpreted
+try:
+	from .compiler_extensions import CompilerExtensionsPlugin
+	from .python_compilation import PreviewPythonCompiler, PYTHON_COMPILER_PARAMS, memory_limited_command
+except ImportError:
+	PYTHON_EXECUTION_AVAILABLE = False
+else:
+	PYTHON_EXECUTION_AVAILABLE = True
+
+PLUGIN_METADATA = {
+	"hooks": ("fixed_update",),
+	"optional_dependencies": ("grapic", "python_compilation", "compiler_extensions"),
+	"essential": True
+}
+
+# Default file in which the drawing is exported, at the root of the editor
+EXPORT_FILE = os.path.join(os.path.dirname(__file__), "..", "grapic_preview.png")
+
+# Value of each dot of a braille character, for a block of 4 rows and 2 columns of pixels
+BRAILLE_WEIGHTS = ((1, 8), (2, 16), (4, 32), (64, 128))
+
+# Maximum amount of values computed at once when drawing a batch of shapes, to bound the memory used
+BATCH_SIZE = 1 << 22
+
+# Size (in pixels) above which the shapes of a batch are drawn one by one rather than stamped
+STAMP_SIZE = 32
+
+# Memory the frames of an animation can take ; beyond it, only one in two frames is kept
+FRAMES_MEMORY = 64 * 1024 * 1024
+
+# Speeds at which the animations can be played in the preview
+PLAYBACK_SPEEDS = (1, 2, 4, 8, 16)
+
+# Default amount of seconds after which an executed program is stopped, keeping the frames it rendered, and default
+# memory (in megabytes) it can use
+DEFAULT_PROGRAM_TIMEOUT = 2
+DEFAULT_PROGRAM_MEMORY_LIMIT = 256
+
+# Amount of seconds without modification of the text before the program gets drawn again
+PREVIEW_DEBOUNCE = 0.15
+
+# Script executing a program in its own process : its grapic calls are sent back as lines of JSON on its output, to be
+# drawn by the editor. The virtual clock is also kept on this side, so etime doesn't have to wait for the editor
+GRAPIC_PROGRAM_RUNNER = """
+import json, os, sys
+channel = open(sys.stdout.fileno(), "w", encoding="utf-8", buffering=1 << 16, closefd=False)
+sys.stdout = open(os.devnull, "w")
+def send(name, params):
+	channel.write(json.dumps((name, params)) + "\\n")
+	if name == "wdisplay":
+		channel.flush()
+class Grapic:
+	clock = 0
+	def __getattr__(self, name):
+		return lambda *params: send(name, params)
+	def delay(self, duration):
+		self.clock += duration
+		send("delay", (duration,))
+	def etime(self):
+		return self.clock / 1000
+	def image(self, file_path):
+		return None
+namespace = {
+	"__name__": "__grapic_preview__", "grapic": Grapic(),
+	"print": lambda *args, **kwargs: None, "input": lambda *args: ""
+}
+try:
+	exec(compile(sys.stdin.buffer.read().decode("utf-8"), "<grapic preview>", "exec"), namespace)
+except Exception as e:
+	send("error", f"{type(e).__name__} {e}")
+channel.flush()
+"""
+
+# Operators allowed in the parameters of the instructions
+OPERATORS = {
+	ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv,
+	ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod, ast.Pow: operator.pow,
+	ast.USub: operator.neg, ast.UAdd: operator.pos
+}
+
+
+class GrapicCanvas:
+	"""
+	RGBA framebuffer in which the grapic instructions are drawn.
+	Like grapic, the origin is at the bottom left of the window, with y going up.
+	"""
+	def __init__(self, width: int, height: int):
+		self.width = width
+		self.height = height
+		self.pixels = np.zeros((height, width, 4), dtype=np.uint8)
+		self.color = np.array((0, 0, 0, 255), dtype=np.uint8)
+		self.background = np.array((255, 255, 255, 255), dtype=np.uint8)
+		self.clear()
+
+
+	def clear(self):
+		"""
+		Fills the window with the background color.
+		"""
+		self.pixels[:] = self.background
+
+
+	def set_color(self, r: int, g: int, b: int, a: int = 255):
+		"""
+		Changes the color of the next shapes.
+		"""
+		self.color = np.array((r, g, b, a), dtype=np.uint8)
+
+
+	def set_background(self, r: int, g: int, b: int, a: int = 255):
+		"""
+		Changes the color used to clear the window.
+		"""
+		self.background = np.array((r, g, b, a), dtype=np.uint8)
+
+
+	def _paint(self, pixels, selection, color=None):
+		"""
+		Paints the selected pixels, blending the color with the window if it is transparent.
+		:param pixels: The pixels, or a view of a region of them.
+		:param selection: A boolean mask of the pixels to paint, or the arrays of their rows and columns.
+		:param color: The RGBA color. Defaults to the current color.
+		"""
+		color = self.color if color is None else color
+		if color[3] == 255:
+			pixels[selection] = color
+		else:
+			# Blends the colors, and makes the window as opaque as both colors put together
+			alpha = color[3] / 255
+			background = pixels[selection].astype(float)
+			blended = color * alpha + background * (1 - alpha)
+			blended[..., 3] = color[3] + background[..., 3] * (1 - alpha)
+			pixels[selection] = blended.astype(np.uint8)
+
+
+	def _region(self, x_min: float, y_min: float, x_max: float, y_max: float):
+		"""
+		Gets the pixels of a bounding box, so a shape only computes the pixels it can cover.
+		:return: The view of the pixels of the box (clipped to the window), and the x and y coordinates of its columns
+			and rows ; or None if the box is outside the window.
+		"""
+		x_start, x_end = max(int(np.floor(x_min)), 0), min(int(np.ceil(x_max)), self.width - 1)
+		y_start, y_end = max(int(np.floor(y_min)), 0), min(int(np.ceil(y_max)), self.height - 1)
+		if x_start > x_end or y_start > y_end:
+			return None
+		# The rows of the array go down while y goes up
+		ys, xs = np.ogrid[y_end:y_start - 1:-1, x_start:x_end + 1]
+		return self.pixels[self.height - 1 - y_end:self.height - y_start, x_start:x_end + 1], xs, ys
+
+
+	def put_pixel(self, x: int, y: int, r: int, g: int, b: int, a: int = 255):
+		"""
+		Paints a single pixel.
+		"""
+		if 0 <= x < self.width and 0 <= y < self.height:
+			self._paint(self.pixels, (self.height - 1 - int(y), int(x)), np.array((r, g, b, a), dtype=np.uint8))
+
+
+	@staticmethod
+	def _sample_lines(params):
+		"""
+		Samples lines with one point per pixel of their longest side, so every way of drawing a line gives the same
+		pixels.
+		:param params: The lines, as an array of rows (x1, y1, x2, y2).
+		:return: The x and y coordinates of the points of all the lines.
+		"""
+		x1, y1, x2, y2 = np.asarray(params, dtype=float).T
+		steps = (np.maximum(np.abs(x2 - x1), np.abs(y2 - y1))).astype(int) + 1
+		line_index = np.repeat(np.arange(len(steps)), steps)
+		position = np.arange(steps.sum()) - np.repeat(np.cumsum(steps) - steps, steps)
+		ratio = position / np.maximum(steps - 1, 1)[line_index]
+		xs = np.rint(x1[line_index] + (x2 - x1)[line_index] * ratio).astype(int)
+		ys = np.rint(y1[line_index] + (y2 - y1)[line_index] * ratio).astype(int)
+		return xs, ys
+
+
+	def line(self, x1: int, y1: int, x2: int, y2: int):
+		"""
+		Draws a line between two points.
+		"""
+		xs, ys = self._sample_lines([(x1, y1, x2, y2)])
+		inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+		self._paint(self.pixels, (self.height - 1 - ys[inside], xs[inside]))
+
+
+	def rectangle(self, x1: int, y1: int, x2: int, y2: int, filled: bool = False):
+		"""
+		Draws a rectangle from two opposite corners.
+		"""
+		x_min, x_max = sorted((x1, x2))
+		y_min, y_max = sorted((y1, y2))
+		region = self._region(x_min, y_min, x_max, y_max)
+		if region is None:
+			return None
+		pixels, xs, ys = region
+		inside = (xs >= x_min) & (xs <= x_max) & (ys >= y_min) & (ys <= y_max)
+		if not filled:
+			inside &= (xs <= x_min) | (xs >= x_max) | (ys <= y_min) | (ys >= y_max)
+		self._paint(pixels, inside)
+
+
+	def circle(self, xc: int, yc: int, radius: int, filled: bool = False):
+		"""
+		Draws a circle from its center and radius.
+		"""
+		region = self._region(xc - radius - 1, yc - radius - 1, xc + radius + 1, yc + radius + 1)
+		if region is None:
+			return None
+		pixels, xs, ys = region
+		distances = (xs - xc) ** 2 + (ys - yc) ** 2
+		if filled:
+			self._paint(pixels, distances <= radius ** 2)
+		else:
+			self._paint(pixels, (distances <= (radius + .5) ** 2) & (distances >= (radius - .5) ** 2))
+
+
+	def draw_batch(self, commands: List[tuple]):
+		"""
+		Draws a list of commands, each consecutive run of shapes of the same kind and color being drawn at once.
+		:param commands: The commands, as (kind, parameters, color) ; the kind being 'clear', 'circle', 'circlef',
+			'line', 'rect', 'rectf' or 'ppixel'.
+		"""
+		i = 0
+		while i < len(commands):
+			kind, params, color = commands[i]
+			if kind == "clear":
+				self.background = color
+				self.clear()
+				i += 1
+				continue
+
+			# Transparent shapes are blended one by one, as overlapping shapes must be blended several times
+			if color[3] != 255:
+				self.color = color
+				self._draw_single(kind, params)
+				i += 1
+				continue
+
+			# Gathers the following opaque shapes of the same kind and color (pixels have their own color)
+			j = i + 1
+			while j < len(commands) and commands[j][0] == kind and commands[j][2][3] == 255 and (
+				kind == "ppixel" or np.array_equal(commands[j][2], color)
+			):
+				j += 1
+			self.color = color
+			self._draw_group(kind, commands[i:j])
+			i = j
+
+
+	def _draw_single(self, kind: str, params: tuple):
+		"""
+		Draws a single shape with the current color.
+		"""
+		if kind in ("circle", "circlef"):
+			self.circle(*params, kind == "circlef")
+		elif kind in ("rect", "rectf"):
+			self.rectangle(*params, kind == "rectf")
+		elif kind == "line":
+			self.line(*params)
+		else:
+			self.put_pixel(*params[:2], *self.color)
+
+
+	def _draw_group(self, kind: str, commands: List[tuple]):
+		"""
+		Draws shapes of the same kind and color with a few NumPy operations, however many shapes there are.
+		Circles and rectangles are stamped : the offsets of the biggest shape are computed once, and each shape keeps
+		the offsets it covers.
+		"""
+		params = np.array([command[1][:4] for command in commands], dtype=float)
+
+		if kind == "ppixel":
+			xs, ys = params[:, 0].astype(int), params[:, 1].astype(int)
+			inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+			colors = np.array([command[2] for command in commands], dtype=np.uint8)
+			self.pixels[self.height - 1 - ys[inside], xs[inside]] = colors[inside]
+			return None
+
+		if kind == "line":
+			# Samples all the lines at once
+			xs, ys = self._sample_lines(params)
+			inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+			self.pixels[self.height - 1 - ys[inside], xs[inside]] = self.color
+			return None
+
+		# Origin (integer) and size of the stamp of each shape
+		if kind in ("circle", "circlef"):
+			xc, yc, radius = params[:, 0], params[:, 1], np.abs(params[:, 2])
+			origin_x, origin_y = np.floor(xc - radius - 1), np.floor(yc - radius - 1)
+			sizes = np.ceil(2 * radius + 3).astype(int)
+		else:
+			x_min, x_max = np.minimum(params[:, 0], params[:, 2]), np.maximum(params[:, 0], params[:, 2])
+			y_min, y_max = np.minimum(params[:, 1], params[:, 3]), np.maximum(params[:, 1], params[:, 3])
+			origin_x, origin_y = np.ceil(x_min), np.ceil(y_min)
+			sizes = np.maximum(x_max - origin_x, y_max - origin_y).astype(int) + 1
+
+		# Big shapes only compute the pixels of their bounding box, so stamping them would be slower
+		for i in np.flatnonzero(sizes > STAMP_SIZE):
+			self._draw_single(kind, commands[i][1])
+
+		# The other shapes are stamped with the shapes of similar sizes, so small shapes don't pay for the big ones
+		buckets = np.ceil(np.log2(np.maximum(sizes, 1))).astype(int)
+		for bucket in np.unique(buckets[sizes <= STAMP_SIZE]):
+			indexes = np.flatnonzero((buckets == bucket) & (sizes <= STAMP_SIZE))
+			size = 1 << int(bucket)
+			offsets_y, offsets_x = (offsets.ravel() for offsets in np.mgrid[0:size, 0:size])
+
+			# Stamps the shapes by chunks, so the memory used stays bounded
+			for start in range(0, len(indexes), max(BATCH_SIZE // (size * size), 1)):
+				chunk = indexes[start:start + max(BATCH_SIZE // (size * size), 1), None]
+				xs = origin_x[chunk] + offsets_x[None, :]
+				ys = origin_y[chunk] + offsets_y[None, :]
+				if kind in ("circle", "circlef"):
+					distances = (xs - xc[chunk]) ** 2 + (ys - yc[chunk]) ** 2
+					radii = radius[chunk]
+					covered = distances <= radii ** 2 if kind == "circlef" else \
+						(distances <= (radii + .5) ** 2) & (distances >= (radii - .5) ** 2)
+				else:
+					covered = (xs <= x_max[chunk]) & (ys <= y_max[chunk])
+					if kind == "rect":
+						covered &= (xs <= x_min[chunk]) | (xs >= x_max[chunk]) | \
+							(ys <= y_min[chunk]) | (ys >= y_max[chunk])
+				covered &= (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+				self.pixels[self.height - 1 - ys[covered].astype(int), xs[covered].astype(int)] = self.color
+
+
+	def to_braille(self, columns: int, rows: int, pixels=None, background=None) -> List[str]:
+		"""
+		Downsamples the window to braille characters, a dot being raised where the window is not of the background color.
+		:param columns: The maximum width of the preview, in characters.
+		:param rows: The maximum height of the preview, in characters.
+		:param pixels: The pixels to downsample, such as a recorded frame. Defaults to the pixels of the window.
+		:param background: The background color of these pixels. Defaults to the background color of the window.
+		:return: The lines of the preview.
+		"""
+		pixels = self.pixels if pixels is None else pixels
+		background = self.background if background is None else background
+
+		# Keeps the aspect ratio, each character showing 2x4 dots
+		scale = max(self.width / (columns * 2), self.height / (rows * 4))
+		width, height = max(int(self.width / scale) // 2, 1) * 2, max(int(self.height / scale) // 4, 1) * 4
+
+		# A dot is raised if any of the pixels it covers is raised, so thin lines don't disappear
+		raised = np.any(pixels[..., :3] != background[:3], axis=-1).view(np.uint8)
+		rows_starts = np.minimum((np.arange(height) * scale).astype(int), self.height - 1)
+		columns_starts = np.minimum((np.arange(width) * scale).astype(int), self.width - 1)
+		dots = np.maximum.reduceat(np.maximum.reduceat(raised, rows_starts, axis=0), columns_starts, axis=1)
+
+		# Sums the weights of the raised dots of each 2x4 block
+		blocks = dots.reshape(height // 4, 4, width // 2, 2)
+		codes = (blocks * np.array(BRAILLE_WEIGHTS)[None, :, None, :]).sum(axis=(1, 3))
+		return ["".join(map(chr, row)) for row in (0x2800 + codes).tolist()]
+
+
+	def to_png(self) -> bytes:
+		"""
+		:return: The window as a PNG file.
+		"""
+		def chunk(chunk_type: bytes, data: bytes) -> bytes:
+			return struct.pack(">I", len(data)) + chunk_type + data + \
+				struct.pack(">I", zlib.crc32(chunk_type + data) & 0xffffffff)
+
+		# Each row starts with the byte of its filter (0, none)
+		rows = np.concatenate((np.zeros((self.height, 1), dtype=np.uint8), self.pixels.reshape(self.height, -1)), axis=1)
+		return b"\x89PNG\r\n\x1a\n" + \
+			chunk(b"IHDR", struct.pack(">IIBBBBB", self.width, self.height, 8, 6, 0, 0, 0)) + \
+			chunk(b"IDAT", zlib.compress(rows.tobytes())) + \
+			chunk(b"IEND", b"")
+
+
+	def to_ppm(self) -> bytes:
+		"""
+		:return: The window as a binary PPM file (without transparency).
+		"""
+		return f"P6 {self.width} {self.height} 255\n".encode("ascii") + self.pixels[..., :3].tobytes()
+
+
+class ProgramStopped(BaseException):
+	"""
+	Raised by the runtime to stop drawing a program. Not an Exception, so it isn't taken for an error of the drawing.
+	"""
+
+
+class GrapicRuntime:
+	"""
+	Executes grapic calls on a canvas.
+	The shapes are buffered between wclear and wdisplay, then drawn at once ; delay only advances a virtual clock, so
+	animations are rendered as fast as possible, and each displayed frame is recorded with its time to be played back.
+	"""
+	def __init__(self, frames_memory: int = FRAMES_MEMORY):
+		"""
+		:param frames_memory: The memory the recorded frames can take, in bytes.
+		"""
+		self.frames_memory = frames_memory
+		self.canvas: Optional[GrapicCanvas] = None
+		# Shapes drawn since the last displayed frame, as (kind, parameters, color)
+		self.commands: List[tuple] = []
+		self.current_color = (0, 0, 0, 255)
+		self.background = (255, 255, 255, 255)
+		# Virtual time of the animation, in milliseconds
+		self.clock = 0.
+		# Recorded frames, as (virtual time, pixels, background) ; only one in frames_stride frames is kept
+		self.frames: List[Tuple[float, "np.ndarray", "np.ndarray"]] = []
+		self.frames_stride = 1
+		self.frames_count = 0
+		# Time spent drawing, in seconds
+		self.render_time = 0.
+		# Set to stop the program at its next grapic call
+		self.stop_requested = False
+
+
+	@property
+	def fps(self) -> float:
+		"""
+		:return: The amount of frames drawn per second of real time.
+		"""
+		return self.frames_count / self.render_time if self.render_time > 0 else 0.
+
+
+	def winit(self, name: str, width: int, height: int):
+		if not (0 < width <= 4096 and 0 < height <= 4096):
+			raise ValueError(f"{width}x{height}")
+		self.canvas = GrapicCanvas(int(width), int(height))
+		self.commands.clear()
+
+
+	def _draw(self, kind: str, params: tuple, color: tuple = None):
+		"""
+		Buffers a shape, to be drawn with the next frame.
+		"""
+		if self.stop_requested:
+			raise ProgramStopped
+		if self.canvas is None:
+			raise RuntimeError("winit")
+		self.commands.append((kind, params, np.array(self.current_color if color is None else color, dtype=np.uint8)))
+
+
+	def wclear(self):
+		# Whatever was drawn before will be covered, so it doesn't need to be drawn
+		self.commands.clear()
+		self._draw("clear", (), self.background)
+
+	def color(self, r: int, g: int, b: int, a: int = 255):
+		self.current_color = (r, g, b, a)
+
+	def bcolor(self, r: int, g: int, b: int, a: int = 255):
+		self.background = (r, g, b, a)
+
+	def circle(self, xc: int, yc: int, radius: int):
+		self._draw("circle", (xc, yc, radius))
+
+	def circlef(self, xc: int, yc: int, radius: int):
+		self._draw("circlef", (xc, yc, radius))
+
+	def line(self, x1: int, y1: int, x2: int, y2: int):
+		self._draw("line", (x1, y1, x2, y2))
+
+	def rect(self, x1: int, y1: int, x2: int, y2: int):
+		self._draw("rect", (x1, y1, x2, y2))
+
+	def rectf(self, x1: int, y1: int, x2: int, y2: int):
+		self._draw("rectf", (x1, y1, x2, y2))
+
+	def ppixel(self, x: int, y: int, r: int, g: int, b: int, a: int = 255):
+		self._draw("ppixel", (x, y), (r, g, b, a))
+
+	def delay(self, duration: int):
+		if self.stop_requested:
+			raise ProgramStopped
+		self.clock += duration
+
+	def etime(self) -> float:
+		return self.clock / 1000
+
+	def pspace(self):
+		pass
+
+	def wquit(self):
+		self.flush()
+
+	def image(self, file_path: str):
+		# The images are not drawn by the preview
+		return None
+
+
+	def flush(self):
+		"""
+		Draws the buffered shapes.
+		"""
+		if self.canvas is None or not self.commands:
+			return None
+		start_time = time.perf_counter()
+		self.canvas.draw_batch(self.commands)
+		self.commands.clear()
+		self.render_time += time.perf_counter() - start_time
+
+
+	def wdisplay(self):
+		"""
+		Draws the buffered shapes and records the frame.
+		"""
+		if self.stop_requested:
+			raise ProgramStopped
+		if self.canvas is None:
+			raise RuntimeError("winit")
+		self.flush()
+		self.frames_count += 1
+		if (self.frames_count - 1) % self.frames_stride != 0:
+			return None
+
+		# If the frames take too much memory, keeps one in two, and records half as many from now on
+		if (len(self.frames) + 1) * self.canvas.pixels.nbytes > self.frames_memory and len(self.frames) > 1:
+			self.frames = self.frames[::2]
+			self.frames_stride *= 2
+			if (self.frames_count - 1) % self.frames_stride != 0:
+				return None
+		self.frames.append((self.clock, self.canvas.pixels.copy(), self.canvas.background.copy()))
+
+
+	def finish(self):
+		"""
+		Draws what remains once the program ended, as the last frame if it wasn't displayed.
+		"""
+		if self.canvas is not None and (self.commands or not self.frames):
+			self.flush()
+			self.frames.append((self.clock, self.canvas.pixels.copy(), self.canvas.background.copy()))
+
+
+class GrapicInterpreter:
+	"""
+	Runs the grapic instructions of a program in a runtime.
+	The parameters can be numbers or arithmetic expressions ; the other lines of the program are ignored.
+	"""
+	def __init__(self):
+		self.runtime = GrapicRuntime()
+		# Errors of the last run, as (line number, message)
+		self.errors: List[Tuple[int, str]] = []
+		# Instructions run by the interpreter
+		self.instructions = (
+			"wclear", "wdisplay", "wquit", "color", "bcolor", "pspace", "circle", "circlef", "line", "rect", "rectf",
+			"ppixel", "delay"
+		)
+
+
+	@staticmethod
+	def evaluate(expression: str) -> float:
+		"""
+		Evaluates a parameter, which can only contain numbers and arithmetic operators.
+		:param expression: The parameter.
+		:return: Its value.
+		"""
+		def evaluate_node(node):
+			if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+				return node.value
+			elif isinstance(node, ast.BinOp) and type(node.op) in OPERATORS:
+				return OPERATORS[type(node.op)](evaluate_node(node.left), evaluate_node(node.right))
+			elif isinstance(node, ast.UnaryOp) and type(node.op) in OPERATORS:
+				return OPERATORS[type(node.op)](evaluate_node(node.operand))
+			raise ValueError(expression)
+		return evaluate_node(ast.parse(expression, mode="eval").body)
+
+
+	def run(self, lines: List[str]) -> GrapicRuntime:
+		"""
+		Runs the grapic instructions of the given lines.
+		:param lines: The lines of the program.
+		:return: The runtime, with the frames of the program ; its canvas is None if the program never calls winit.
+		"""
+		self.runtime = GrapicRuntime()
+		self.errors = []
+		for line_number, line in enumerate(lines):
+			instruction_name, *instruction_params = line.strip().split(" ")
+			try:
+				if instruction_name == "winit":
+					# The name of the window can contain spaces, so the size is given by the last two parameters
+					self.runtime.winit("", *(int(self.evaluate(param)) for param in instruction_params[-2:]))
+				elif instruction_name in self.instructions and self.runtime.canvas is not None:
+					getattr(self.runtime, instruction_name)(
+						*(self.evaluate(param) for param in instruction_params if param)
+					)
+			except (TypeError, ValueError, SyntaxError, ArithmeticError, IndexError) as e:
+				self.errors.append((line_number, f"{instruction_name} : {type(e).__name__} {e}"))
+		self.runtime.finish()
+		return self.runtime
+
+
+class GrapicPreviewPlugin(Plugin):
+	"""
+	Previews the drawings of the grapic instructions next to the code, without compiling them.
+	"""
+	__singleton = None
+
+	def __new__(cls, *args, **kwargs):
+		"""
+		Creates a singleton of the class.
+		"""
+		if cls.__singleton is None:
+			cls.__singleton = super().__new__(cls)
+		return cls.__singleton
+
+
+	def __init__(self, app):
+		super().__init__(app)
+
+		# Creating translations
+		self.translations = {
+			"en": {
+				"toggle_preview": "Toggle grapic preview",
+				"export": "Export grapic drawing",
+				"preview_title": " Grapic preview ",
+				"no_winit": "No window initialized (winit).",
+				"numpy_missing": "The grapic preview requires NumPy ('pip install numpy').",
+				"input_export_file": "Path of the exported image (.png or .ppm) :",
+				"exported": "Drawing exported to '{file}'.",
+				"export_failed": "The drawing could not be exported : {error}",
+				"playback_speed": "Change grapic animation speed",
+				"animation_status": "Frame {frame}/{frames} - rendered at {fps:.0f} FPS - x{speed}",
+				"running": "Running the program...",
+				"program_stopped": "The program was stopped after {timeout}s.",
+				"program_error": "Python : {error}"
+			},
+			"fr": {
+				"toggle_preview": "Afficher/masquer l'aperçu grapic",
+				"export": "Exporter le dessin grapic",
+				"preview_title": " Aperçu grapic ",
+				"no_winit": "Aucune fenêtre initialisée (winit).",
+				"numpy_missing": "L'aperçu grapic nécessite NumPy ('pip install numpy').",
+				"input_export_file": "Chemin de l'image exportée (.png ou .ppm) :",
+				"exported": "Dessin exporté dans '{file}'.",
+				"export_failed": "Le dessin n'a pas pu être exporté : {error}",
+				"playback_speed": "Changer la vitesse des animations grapic",
+				"animation_status": "Image {frame}/{frames} - rendue à {fps:.0f} IPS - x{speed}",
+				"running": "Exécution du programme...",
+				"program_stopped": "Le programme a été arrêté après {timeout}s.",
+				"program_error": "Python : {error}"
+			}
+		}
+
+		# Creates the use vars
+		self.preview_enabled = False
+		self.interpreter = GrapicInterpreter()
+		self.previewed_text: Optional[str] = None
+		# Lines of the preview, for the size it was rendered at
+		self.preview_lines: List[str] = []
+		self.preview_size: Tuple[int, int] = (0, 0)
+		# Runtime of the last run, and its frames converted to braille when they are first played
+		self.runtime: Optional[GrapicRuntime] = None
+		self.frames_lines: Dict[int, List[str]] = {}
+		self.errors_lines: List[str] = []
+		self.playback_start = 0.
+		self.playback_speed = self.get_config("playback_speed", PLAYBACK_SPEEDS[0])
+		# Compiler used to execute the programs, the process of the running program, and the runtime drawing it
+		self.compiler: Optional["PreviewPythonCompiler"] = None
+		self.program_process: Optional[subprocess.Popen] = None
+		self.program_runtime: Optional[GrapicRuntime] = None
+		self.program_timeout = DEFAULT_PROGRAM_TIMEOUT
+		self.program_memory_limit = DEFAULT_PROGRAM_MEMORY_LIMIT
+		# The thread drawing the programs is woken up when the text changes, draws one program at a time, and gives
+		# back the last one drawn as (text, runtime, errors)
+		self.text_changed = threading.Event()
+		self.preview_stopped = threading.Event()
+		self.last_text_change = 0.
+		self.run_lock = threading.Lock()
+		self.results_lock = threading.Lock()
+		self.drawn_run: Optional[tuple] = None
+		self.drawn_text: Optional[str] = None
+
+		self.add_command("gp", self.toggle_preview, self.translate("toggle_preview"))
+		self.add_command("gpe", self.export, self.translate("export"))
+		self.add_command("gpf", self.change_playback_speed, self.translate("playback_speed"))
+
+
+	def init(self):
+		"""
+		Creates the compiler executing the programs, if the Python compilation is available.
+		"""
+		self.program_timeout = self.get_config("program_timeout", DEFAULT_PROGRAM_TIMEOUT)
+		self.program_memory_limit = self.get_config("program_memory_limit", DEFAULT_PROGRAM_MEMORY_LIMIT)
+		if PYTHON_EXECUTION_AVAILABLE:
+			self.compiler = PreviewPythonCompiler(*PYTHON_COMPILER_PARAMS, self.app.stdscr, self.app)
+			CompilerExtensionsPlugin(self.app).add_compiler("python", self.compiler, "grapic_preview")
+
+
+	def _draw_program(self, text: str) -> Tuple[GrapicRuntime, List[str]]:
+		"""
+		Draws the given program : executes it if it can be compiled to Python, or interprets its grapic instructions.
+		Only one program is drawn at a time.
+		:param text: The code of the program.
+		:return: The runtime with the frames of the program, and the errors to show.
+		"""
+		with self.run_lock:
+			# The grapic instructions only compile to Python if the grapic plugin is loaded
+			if self.compiler is not None and "grapic" in self.app.plugins:
+				compiled_code = self.compiler.compile(text.split("\n"))
+				if not self.compiler.errors:
+					return self._execute_program(compiled_code)
+				# A program which doesn't compile can't be executed, but its grapic instructions can still be drawn
+				return self.interpreter.run(text.split("\n")), list(self.compiler.errors)
+			runtime = self.interpreter.run(text.split("\n"))
+			return runtime, [f"{line_number + 1} : {error}" for line_number, error in self.interpreter.errors]
+
+
+	def _execute_program(self, compiled_code: str) -> Tuple[GrapicRuntime, List[str]]:
+		"""
+		Executes the compiled program in another process with a memory limit, drawing its grapic calls as they come.
+		The process is killed once it ran for program_timeout seconds, or when _stop_program is called.
+		:param compiled_code: The Python code of the program.
+		:return: The runtime with the frames of the program, and the errors of the program.
+		"""
+		runtime, errors = GrapicRuntime(), []
+		try:
+			process = subprocess.Popen(
+				memory_limited_command(self.program_memory_limit * 1024 * 1024, "-c", GRAPIC_PROGRAM_RUNNER),
+				stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, encoding="utf-8"
+			)
+		except OSError as e:
+			return runtime, [self.translate("program_error", error=e)]
+		self.program_process, self.program_runtime = process, runtime
+
+		# Kills the program once it took too long, keeping the frames it rendered
+		timed_out = threading.Event()
+		def stop():
+			timed_out.set()
+			process.kill()
+		timer = threading.Timer(self.program_timeout, stop)
+		timer.start()
+
+		try:
+			# The program reads its whole code before running it, but it may already be dead (e.g. out of memory)
+			try:
+				process.stdin.write(compiled_code)
+				process.stdin.close()
+			except OSError:
+				pass
+			for message in process.stdout:
+				try:
+					name, params = json.loads(message)
+				# What the program wrote on its output by itself
+				except (ValueError, TypeError):
+					continue
+				if name == "error":
+					errors.append(self.translate("program_error", error=params))
+				elif name == "winit" or name in self.interpreter.instructions:
+					getattr(runtime, name)(*params)
+		# The text changed, so the drawing is not needed anymore
+		except ProgramStopped:
+			pass
+		except (TypeError, ValueError, RuntimeError, IndexError) as e:
+			errors.append(self.translate("program_error", error=f"{type(e).__name__} {e}"))
+		finally:
+			timer.cancel()
+			process.kill()
+			process.wait()
+			process.stdout.close()
+
+		if timed_out.is_set():
+			errors.append(self.translate("program_stopped", timeout=self.program_timeout))
+		runtime.finish()
+		return runtime, errors
+
+
+	def _program_worker(self, stopped: threading.Event):
+		"""
+		Draws the program in the background whenever the text changed, once the user stopped typing for
+		PREVIEW_DEBOUNCE seconds.
+		:param stopped: Event set when this thread should stop.
+		"""
+		while not stopped.is_set():
+			self.text_changed.wait()
+			self.text_changed.clear()
+
+			# Waits for the user to stop typing
+			while not stopped.is_set() and time.time() - self.last_text_change < PREVIEW_DEBOUNCE:
+				time.sleep(PREVIEW_DEBOUNCE)
+			if stopped.is_set():
+				break
+
+			text = self.app.current_text
+			runtime, errors = self._draw_program(text)
+			# A program stopped because the text changed gets drawn again
+			if not runtime.stop_requested:
+				with self.results_lock:
+					self.drawn_run = (text, runtime, errors)
+
+
+	def _stop_program(self):
+		"""
+		Stops the running program, if any : its process is killed, and the calls it already sent are not drawn.
+		"""
+		if self.program_runtime is not None:
+			self.program_runtime.stop_requested = True
+		if self.program_process is not None and self.program_process.poll() is None:
+			self.program_process.kill()
+
+
+	def _show_runtime(self, runtime: GrapicRuntime, errors: List[str]):
+		"""
+		Shows the frames of a run in the preview, from the first one.
+		:param runtime: The runtime of the run.
+		:param errors: The errors of the run.
+		"""
+		self.runtime = runtime
+		self.errors_lines = errors
+		self.playback_start = time.perf_counter()
+		self.frames_lines.clear()
+
+
+	def _show_message(self, message: str):
+		"""
+		Displays a message in the middle of the screen until the user presses a key.
+		"""
+		self.app.stdscr.clear()
+		message = message[:self.app.cols - 1]
+		self.app.stdscr.addstr(self.app.rows // 2, self.app.cols // 2 - len(message) // 2, message)
+		self.app.stdscr.getch()
+		self.app.stdscr.clear()
+
+
+	def toggle_preview(self):
+		"""
+		Shows or hides the preview on the right half of the screen.
+		"""
+		if not NUMPY_AVAILABLE:
+			return self._show_message(self.translate("numpy_missing"))
+		self.preview_enabled = not self.preview_enabled
+		self.previewed_text = None
+		if self.preview_enabled:
+			self.preview_stopped = threading.Event()
+			threading.Thread(target=self._program_worker, args=(self.preview_stopped,), daemon=True).start()
+		else:
+			# Wakes up the thread drawing the programs so it stops
+			self.preview_stopped.set()
+			self.text_changed.set()
+			self._stop_program()
+
+
+	def change_playback_speed(self):
+		"""
+		Plays the animations faster, going back to normal speed after the fastest one, in the live app and the config.
+		"""
+		speed_index = PLAYBACK_SPEEDS.index(self.playback_speed) if self.playback_speed in PLAYBACK_SPEEDS else -1
+		self.playback_speed = PLAYBACK_SPEEDS[(speed_index + 1) % len(PLAYBACK_SPEEDS)]
+		self.config["playback_speed"] = self.playback_speed
+		self.playback_start = time.perf_counter()
+
+
+	def _current_frame(self) -> int:
+		"""
+		:return: The index of the frame to show, according to the time elapsed since the animation started playing.
+			The animation loops once its last frame was shown.
+		"""
+		frames = self.runtime.frames
+		duration = frames[-1][0]
+		if len(frames) == 1 or duration <= 0:
+			return len(frames) - 1
+		virtual_time = (time.perf_counter() - self.playback_start) * 1000 * self.playback_speed % duration
+		# Last frame recorded before the virtual time
+		return bisect.bisect_right([frame[0] for frame in frames], virtual_time) - 1
+
+
+	def export(self):
+		"""
+		Draws the program and exports the drawing as a PNG or PPM file.
+		"""
+		if not NUMPY_AVAILABLE:
+			return self._show_message(self.translate("numpy_missing"))
+		# Draws the program if the preview didn't, waiting for it to end so the drawing is complete
+		if self.app.current_text != self.drawn_text or self.runtime is None:
+			self.drawn_text = self.app.current_text
+			self._show_runtime(*self._draw_program(self.app.current_text))
+		canvas = self.runtime.canvas
+		if canvas is None:
+			return self._show_message(self.translate("no_winit"))
+
+		# Asks where to export the drawing, the extension giving the format
+		self.app.stdscr.clear()
+		self.app.stdscr.addstr(
+			self.app.rows // 2 - 1,
+			self.app.cols // 2 - len(self.translate("input_export_file")) // 2,
+			self.translate("input_export_file")
+		)
+		file_path = input_text(self.app.stdscr, self.app.cols // 4, self.app.rows // 2) or EXPORT_FILE
+
+		try:
+			with open(file_path, "wb") as f:
+				f.write(canvas.to_ppm() if file_path.lower().endswith(".ppm") else canvas.to_png())
+			self._show_message(self.translate("exported", file=os.path.normpath(file_path)))
+		except OSError as e:
+			self._show_message(self.translate("export_failed", error=e))
+
+
+	def fixed_update(self):
+		"""
+		Draws the program again when the text changed, and displays the preview next to the code.
+		"""
+		if not self.preview_enabled:
+			return None
+
+		start_x = self.app.cols // 2
+		width = self.app.cols - start_x - 3
+		top = self.app.top_placement_shift
+		height = self.app.rows - 4 - top
+
+		# The program is only drawn again when the text changes, and the frames are converted again when the pane is
+		# resized
+		if self.app.current_text != self.previewed_text:
+			self.previewed_text = self.app.current_text
+			self.last_text_change = time.time()
+			# The program of the previous text is not needed anymore
+			self._stop_program()
+			self.text_changed.set()
+		with self.results_lock:
+			drawn_run, self.drawn_run = self.drawn_run, None
+		if drawn_run is not None:
+			self.drawn_text = drawn_run[0]
+			self._show_runtime(*drawn_run[1:])
+		if self.preview_size != (width, height):
+			self.preview_size = (width, height)
+			self.frames_lines.clear()
+
+		# Keeps room for the errors, and for the status of the animation, under the drawing
+		errors = self.errors_lines[:height // 2]
+		if self.runtime is None:
+			self.preview_lines = [self.translate("running")]
+		elif self.runtime.canvas is None:
+			self.preview_lines = [self.translate("no_winit")] + errors
+		else:
+			frames = self.runtime.frames
+			frame_index = self._current_frame()
+			status = []
+			if len(frames) > 1:
+				status = [self.translate(
+					"animation_status", frame=frame_index + 1, frames=len(frames), fps=self.runtime.fps,
+					speed=self.playback_speed
+				)]
+			if frame_index not in self.frames_lines:
+				drawing_height = height - len(errors) - len(status)
+				self.frames_lines[frame_index] = self.runtime.canvas.to_braille(
+					width, drawing_height, *frames[frame_index][1:]
+				) if width > 0 and drawing_height > 0 else []
+			self.preview_lines = self.frames_lines[frame_index] + status + errors
+
+		try:
+			self.app.stdscr.addstr(top, start_x, "|" + self.translate("preview_title").center(width + 1, "-"), curses.A_BOLD)
+			for i in range(max(height, 0)):
+				line = self.preview_lines[i] if i < len(self.preview_lines) else ""
+				self.app.stdscr.addstr(top + 1 + i, start_x, "| " + line[:width].ljust(width))
+		except curses.error: pass
+
+
+def init(app) -> GrapicPreviewPlugin:
+	return GrapicPreviewPlugin(app)
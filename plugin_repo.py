@@ -1,13 +1,27 @@
 import curses
-import requests
-from bs4 import BeautifulSoup
 import os
 import importlib
 import re
 import hashlib
+import json
+import ast
+import sys
+import time
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlparse
+import typing_extensions
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
 
 from plugin import Plugin
 from utils import display_menu, input_text
+from custom_types import CommandType
+
+# requests and BeautifulSoup take a while to import, so they are only imported once something gets downloaded, and
+# not when the plugins are loaded on startup
+if TYPE_CHECKING:
+	import requests
 
 # Creates the 'disabled_plugins' folder if it doesn't exist
 if not os.path.exists(os.path.join(os.path.dirname(__file__), 'disabled_plugins')):
@@ -29,6 +43,8 @@ translations = {
 			"read_online_plugins_doc": "Read online plugins documentation",
 			"download_theme": "Download theme",
 			"plugins_with_updates": "Check for plugin updates",
+			"build_mirror": "Build mirror snapshot",
+			"startup_profile": "Startup profile",
 			"leave": "Leave"
 		},
 		"list_plugins": {
@@ -97,6 +113,30 @@ translations = {
 				"pending": "Pending...",
 				"error": "An error occurred."
 			}
+		},
+		"mirror": {
+			"option": "Plugins mirror (folder or URL, empty for GitHub)",
+			"input_mirror": "Input the folder or URL of the mirror, or leave blank to use GitHub :",
+			"input_folder": "Input the folder in which to build the mirror, or leave blank to cancel :",
+			"building": "Building mirror snapshot, please wait...",
+			"built": "Mirror built in '{folder}' with {nb_files} files."
+		},
+		"startup_profile": {
+			"option": "Profile plugins startup",
+			"title": "-- PLUGINS STARTUP PROFILE --",
+			"columns": {
+				"plugin": "Plugin",
+				"import_time": "import",
+				"init_time": "__init__",
+				"setup_time": "init()",
+				"total_time": "total",
+				"modules": "modules"
+			},
+			"empty": "No profile recorded. Enable the '{option}' option, then restart the editor.\n"
+				"The editor must load its plugins with plugin_repo's load_plugins(app) for them to be profiled.",
+			"partial": "{nb_plugins} loaded plugins were not profiled : they were not loaded through plugin_repo's "
+				"load_plugins(app), or they were not reloaded since the option was enabled.",
+			"saved": "Saved to '{file}'."
 		}
 	},
 	"fr": {
@@ -112,6 +152,8 @@ translations = {
 			"read_online_plugins_doc": "Lire la documentation de plugins en ligne",
 			"download_theme": "Télécharger un thème",
 			"plugins_with_updates": "Vérifier si des mises à jour sont disponibles",
+			"build_mirror": "Créer une copie miroir",
+			"startup_profile": "Profil de démarrage",
 			"leave": "Quitter"
 		},
 		"list_plugins": {
@@ -180,27 +222,254 @@ translations = {
 				"pending": "En attente...",
 				"error": "Une erreur est survenue."
 			}
+		},
+		"mirror": {
+			"option": "Miroir des plugins (dossier ou URL, vide pour GitHub)",
+			"input_mirror": "Entrez le dossier ou l'URL du miroir, ou laissez vide pour utiliser GitHub :",
+			"input_folder": "Entrez le dossier dans lequel créer le miroir, ou laissez vide pour annuler :",
+			"building": "Création de la copie miroir, veuillez patienter...",
+			"built": "Miroir créé dans '{folder}' avec {nb_files} fichiers."
+		},
+		"startup_profile": {
+			"option": "Profiler le démarrage des plugins",
+			"title": "-- PROFIL DE DÉMARRAGE DES PLUGINS --",
+			"columns": {
+				"plugin": "Plugin",
+				"import_time": "import",
+				"init_time": "__init__",
+				"setup_time": "init()",
+				"total_time": "total",
+				"modules": "modules"
+			},
+			"empty": "Aucun profil enregistré. Activez l'option '{option}', puis redémarrez l'éditeur.\n"
+				"L'éditeur doit charger ses plugins avec load_plugins(app) de plugin_repo pour qu'ils soient profilés.",
+			"partial": "{nb_plugins} plugins chargés n'ont pas été profilés : ils n'ont pas été chargés par "
+				"load_plugins(app) de plugin_repo, ou n'ont pas été rechargés depuis l'activation de l'option.",
+			"saved": "Enregistré dans '{file}'."
 		}
 	}
 }
 # --------------------------------------
 
+# Name of the file listing the contents of each folder of a mirror
+MIRROR_MANIFEST_NAME = "manifest.json"
+
+# File in which the startup profile of the plugins is written, at the root of the editor
+STARTUP_PROFILE_FILE = os.path.join(os.path.dirname(__file__), "..", "startup_profile.json")
+
+# Layout of each row of the startup profile table
+STARTUP_PROFILE_ROW = "{plugin:<30}{import_time:>10}{init_time:>12}{setup_time:>10}{total_time:>10}{modules:>9}"
+
+# Metadata of a plugin which doesn't declare any. Plugins declare theirs in a PLUGIN_METADATA dict literal :
+# - dependencies : Names of the plugins (or capabilities) the plugin needs to work.
+# - optional_dependencies : Names of the plugins (or capabilities) the plugin uses if they are installed.
+# - provides : Capabilities the plugin provides, besides its own name.
+# - hooks : The hooks the plugin uses (e.g. 'update_on_keypress'). None if unknown.
+# - commands : The commands the plugin adds, mapped to the key of their description in the 'translations' dict literal
+#   of the plugin module (or to the description itself, if the plugin has no such dict).
+# - lazy : Whether the plugin can be loaded the first time one of its commands is used. Only plugins without hooks can.
+# - essential : Whether the fixed update of the plugin must run every frame, even when plugins exceed the frame budget.
+DEFAULT_PLUGIN_METADATA = {
+	"dependencies": (),
+	"optional_dependencies": (),
+	"provides": (),
+	"hooks": None,
+	"commands": {},
+	"lazy": False,
+	"essential": False
+}
+
 
-def r_get(url: str) -> requests.Response:
+def _local_path(url: str) -> Optional[str]:
 	"""
-	Tries to make a request to the given URL. If so, returns it. If a connection error occurs,
+	Gets the path on the disk a URL points to, if it points to the disk.
+	:param url: A URL, or a 'file://' URL.
+	:return: The path of the file on the disk, or None if the URL points to a server.
+	"""
+	if url.startswith("file://"):
+		# urllib.request imports most of the HTTP client, so it is only imported for local mirrors
+		from urllib.request import url2pathname
+		return url2pathname(urlparse(url).path)
+	return None
+
+
+def mirror_url(mirror: str) -> str:
+	"""
+	Gets the base URL of a mirror, as given by the user.
+	:param mirror: A folder, a 'file://' URL or a server URL.
+	:return: The URL of the mirror, without a trailing slash ; an existing folder is turned into a 'file://' URL.
+		Anything else is kept as is, and will fail to be fetched if it is not a valid URL.
+	"""
+	if "://" not in mirror and os.path.isdir(mirror):
+		return Path(mirror).resolve().as_uri().rstrip("/")
+	return mirror.rstrip("/\\")
+
+
+def r_get(url: str, timeout: float = None) -> "requests.Response":
+	"""
+	Tries to make a request to the given URL. If so, returns it. If a connection error occurs (or the URL is invalid),
 		returns a code Response with a status code of -1.
+	'file://' URLs are read from the disk, with a status code of 200 if the file exists, 404 otherwise.
 	:param url: A URL.
+	:param timeout: The maximum amount of seconds to wait for the server. None (default) waits indefinitely.
 	:return: A requests object.
 	"""
+	import requests
+
+	# Local mirrors are read straight from the disk
+	local_path = _local_path(url)
+	if local_path is not None:
+		r = requests.Response()
+		r.url = url
+		r.encoding = "utf-8"
+		try:
+			with open(local_path, "rb") as f:
+				r._content = f.read()
+			r.status_code = 200
+		except OSError:
+			r._content = b""
+			r.status_code = 404
+		return r
+
 	try:
-		r = requests.get(url)
-	except requests.exceptions.ConnectionError:
+		r = requests.get(url, timeout=timeout)
+	except requests.exceptions.RequestException:
 		r = requests.Response()
 		r.status_code = -1
 	return r
 
 
+def parse_manifest(r: "requests.Response") -> Optional[Dict[str, str]]:
+	"""
+	Reads the manifest of a mirror folder.
+	:param r: The response to the request of a folder listing.
+	:return: The files of the folder mapped to their SHA-256 hash, or None if the response is not a mirror manifest
+		(e.g. a GitHub page).
+	"""
+	try:
+		manifest = json.loads(r.text)
+	except ValueError:
+		return None
+	if not isinstance(manifest, dict) or not isinstance(manifest.get("files"), dict):
+		return None
+	return manifest["files"]
+
+
+def fetch_manifest(url: str, timeout: float = None) -> Optional[Dict[str, str]]:
+	"""
+	Fetches the manifest of a mirror folder, to check the files downloaded from it.
+	:param url: The URL of the folder listing. Only the listings of mirrors (ending with the manifest name) are fetched.
+	:param timeout: The maximum amount of seconds to wait for the server. None (default) waits indefinitely.
+	:return: The files of the folder mapped to their SHA-256 hash, or None if the folder is not on a mirror (e.g. on
+		GitHub) or its manifest could not be fetched.
+	"""
+	if not url.endswith(MIRROR_MANIFEST_NAME):
+		return None
+	r = r_get(url, timeout)
+	if r.status_code != 200:
+		return None
+	return parse_manifest(r)
+
+
+def matches_manifest(filename: str, content: bytes, manifest: Optional[Dict[str, str]]) -> bool:
+	"""
+	Checks a downloaded file against the hash recorded for it in the manifest of the mirror it comes from.
+	:param filename: The name of the file, relative to the mirror folder.
+	:param content: The downloaded content of the file.
+	:param manifest: The manifest of the mirror folder, or None if the file doesn't come from a mirror.
+	:return: True if the file has the hash recorded in the manifest, or if there is no manifest to check it against.
+	"""
+	if manifest is None:
+		return True
+	return manifest.get(filename) == hashlib.sha256(content).hexdigest()
+
+
+def fetch_files_list(url: str, pattern: str, timeout: float = None) -> Optional[List[str]]:
+	"""
+	Lists the files of a repository folder, whether it is a GitHub page or a mirror manifest.
+	:param url: The URL of the folder listing.
+	:param pattern: A regex the names of the files must match, e.g. '\\.py$'.
+	:param timeout: The maximum amount of seconds to wait for the server. None (default) waits indefinitely.
+	:return: The names of the matching files, or None if the listing could not be fetched.
+	"""
+	r = r_get(url, timeout)
+	if r.status_code != 200:
+		return None
+
+	# If the listing is a mirror manifest, we simply read the files from it
+	manifest = parse_manifest(r)
+	if manifest is not None:
+		return [file for file in manifest.keys() if re.search(pattern, file)]
+
+	# Otherwise, uses BeautifulSoup to parse all the file names from the GitHub page
+	from bs4 import BeautifulSoup
+	soup = BeautifulSoup(r.text, 'html.parser')
+	return [e.extract().get_text() for e in soup.find_all(title=re.compile(pattern))]
+
+
+def read_plugin_metadata(source: str) -> dict:
+	"""
+	Reads the metadata of a plugin from its source, without executing it.
+	Plugins imported in the source ('from .tabs import ...') are listed in the 'imports' key, and the module-level
+	'translations' dict literal, if any, in the 'translations' key.
+	:param source: The source code of the plugin.
+	:return: The metadata of the plugin, completed with the default values.
+	"""
+	metadata = {**DEFAULT_PLUGIN_METADATA, "translations": {}}
+	try:
+		for node in ast.parse(source).body:
+			if not isinstance(node, ast.Assign):
+				continue
+			names = [target.id for target in node.targets if isinstance(target, ast.Name)]
+			if "PLUGIN_METADATA" in names:
+				metadata.update(ast.literal_eval(node.value))
+			elif "translations" in names:
+				metadata["translations"] = ast.literal_eval(node.value)
+	except (SyntaxError, ValueError):
+		pass
+	metadata["imports"] = tuple(set(re.findall(r"^\s*from\s+\.(\w+)\s+import", source, re.MULTILINE)))
+	return metadata
+
+
+def topological_order(dependency_graph: Dict[str, List[str]]) -> List[str]:
+	"""
+	Orders the nodes of a dependency graph so that each node comes after its dependencies.
+	Cycles are broken arbitrarily, but deterministically.
+	:param dependency_graph: Each node mapped to the nodes it depends on.
+	:return: The ordered nodes.
+	"""
+	order = []
+	visited = set()
+	def visit(node: str):
+		if node in visited:
+			return
+		visited.add(node)
+		for dependency in dependency_graph.get(node, ()):
+			visit(dependency)
+		order.append(node)
+	for node in sorted(dependency_graph.keys()):
+		visit(node)
+	return order
+
+
+def write_mirror_folder(folder: str, files_contents: Dict[str, str]):
+	"""
+	Writes the given files into a folder of a mirror, alongside the manifest listing their hashes.
+	The files are written without translating their newlines, so their bytes are exactly the ones that were hashed.
+	:param folder: The folder to write the files into.
+	:param files_contents: The names of the files mapped to their content.
+	"""
+	os.makedirs(folder, exist_ok=True)
+	manifest = {}
+	for file, content in files_contents.items():
+		os.makedirs(os.path.dirname(os.path.join(folder, file)), exist_ok=True)
+		with open(os.path.join(folder, file), "w", encoding="utf-8", newline="") as f:
+			f.write(content)
+		manifest[file] = hashlib.sha256(content.encode("utf-8")).hexdigest()
+	with open(os.path.join(folder, MIRROR_MANIFEST_NAME), "w", encoding="utf-8") as f:
+		json.dump({"files": manifest}, f, indent=4)
+
+
 class PluginRepo(Plugin):
 	# Modify to use another plugin repo
 	PLUGIN_REPO_NAME   = "AlgorithmicEditor_Plugins"  # Name of the repo
@@ -213,9 +482,16 @@ class PluginRepo(Plugin):
 	THEME_REPO_BRANCH = "main"                       # Branch to pull plugins from
 
 	# Constants for the plugin repository URL. Should not be touched.
-	PLUGINS_REPO_INDIVIDUAL_FILE = f"https://raw.githubusercontent.com/{PLUGIN_REPO_USER}/{PLUGIN_REPO_NAME}/{PLUGIN_REPO_BRANCH}"
-	PLUGINS_REPO_URL = f"https://github.com/{PLUGIN_REPO_USER}/{PLUGIN_REPO_NAME}/tree/{PLUGIN_REPO_BRANCH}/"
-	THEME_REPO_URL = f"https://github.com/{THEME_REPO_USER}/{THEME_REPO_NAME}/tree/{THEME_REPO_BRANCH}/"
+	GITHUB_PLUGINS_REPO_INDIVIDUAL_FILE = f"https://raw.githubusercontent.com/{PLUGIN_REPO_USER}/{PLUGIN_REPO_NAME}/{PLUGIN_REPO_BRANCH}"
+	GITHUB_PLUGINS_REPO_URL = f"https://github.com/{PLUGIN_REPO_USER}/{PLUGIN_REPO_NAME}/tree/{PLUGIN_REPO_BRANCH}/"
+	GITHUB_THEME_REPO_INDIVIDUAL_FILE = f"https://raw.githubusercontent.com/{THEME_REPO_USER}/{THEME_REPO_NAME}/{THEME_REPO_BRANCH}"
+	GITHUB_THEME_REPO_URL = f"https://github.com/{THEME_REPO_USER}/{THEME_REPO_NAME}/tree/{THEME_REPO_BRANCH}/"
+
+	# URLs actually in use ; they point to a mirror instead of GitHub if one is configured (see set_mirror)
+	PLUGINS_REPO_INDIVIDUAL_FILE = GITHUB_PLUGINS_REPO_INDIVIDUAL_FILE
+	PLUGINS_REPO_URL = GITHUB_PLUGINS_REPO_URL
+	THEME_REPO_INDIVIDUAL_FILE = GITHUB_THEME_REPO_INDIVIDUAL_FILE
+	THEME_REPO_URL = GITHUB_THEME_REPO_URL
 
 	__singleton = None
 
@@ -237,17 +513,84 @@ class PluginRepo(Plugin):
 		self.manage_plugins_menu = False
 		self.selected_menu_item = 0
 
+		# Folders of a mirror snapshot, mapped to a function returning the base URL of the files and their names
+		# (or None if they could not be listed). Other plugins can add their own folders.
+		self.mirror_folders: Dict[str, Callable[[], Optional[Tuple[str, List[str]]]]] = {
+			"plugins": self._list_mirrorable_plugins,
+			"themes": self._list_mirrorable_themes
+		}
+
+		# Functions called with the new mirror whenever it changes, so other plugins can follow it
+		self.mirror_callbacks: List[Callable[[str], None]] = []
+
+		# Modification time, hash and metadata of the source of each plugin, to only reload what changed (kept when
+		# the plugin repo is initialized again while loading the plugins)
+		self.plugins_source_info: Dict[str, Tuple[float, str, dict]] = getattr(self, "plugins_source_info", {})
+
+		# Plugins whose loading is deferred until one of their commands is used (kept if the plugin is reloaded)
+		self.lazy_plugins = getattr(self, "lazy_plugins", set())
+
+		# Whether to profile the loading of the plugins, and the profile of each plugin loaded while doing so
+		self.profile_startup = False
+		self.startup_profile: Dict[str, dict] = getattr(self, "startup_profile", {})
+
 		# Creates the command
 		self.add_command("r", self.manage_plugins, self.translate("manage_plugins"))
+		self.add_command("mirror", self.build_mirror, self.translate("manage_plugins_menu", "build_mirror"), True)
 
 
 	def init(self):
 		"""
 		Initializes the plugin with a message to tell you it was correctly loaded.
 		"""
+		# Points the plugin towards the mirror, if one is configured
+		PluginRepo.set_mirror(self.get_config("mirror", ""))
+		self.add_option(self.translate("mirror", "option"), lambda: self.config["mirror"], self.change_mirror)
+
+		# Gets whether the loading of the plugins should be profiled
+		self.profile_startup = self.get_config("profile_startup", False)
+		self.add_option(
+			self.translate("startup_profile", "option"), lambda: self.profile_startup, self.toggle_profile_startup
+		)
+
+		# Keeps in mind the state of the source of the plugins, as they are currently loaded
+		self._plugins_to_reload()
+
 		self.app.log("PluginRepo plugin loaded !")
 
 
+	@classmethod
+	def set_mirror(cls, mirror: str):
+		"""
+		Makes the plugin use the given mirror instead of GitHub.
+		:param mirror: A folder, a 'file://' URL or a server URL (e.g. 'http://localhost:8000') containing a mirror
+			snapshot. An empty string goes back to GitHub.
+		"""
+		if mirror:
+			mirror = mirror_url(mirror)
+			cls.PLUGINS_REPO_INDIVIDUAL_FILE = f"{mirror}/plugins"
+			cls.PLUGINS_REPO_URL = f"{mirror}/plugins/{MIRROR_MANIFEST_NAME}"
+			cls.THEME_REPO_INDIVIDUAL_FILE = f"{mirror}/themes"
+			cls.THEME_REPO_URL = f"{mirror}/themes/{MIRROR_MANIFEST_NAME}"
+		else:
+			cls.PLUGINS_REPO_INDIVIDUAL_FILE = cls.GITHUB_PLUGINS_REPO_INDIVIDUAL_FILE
+			cls.PLUGINS_REPO_URL = cls.GITHUB_PLUGINS_REPO_URL
+			cls.THEME_REPO_INDIVIDUAL_FILE = cls.GITHUB_THEME_REPO_INDIVIDUAL_FILE
+			cls.THEME_REPO_URL = cls.GITHUB_THEME_REPO_URL
+
+
+	def change_mirror(self):
+		"""
+		Asks the user for a new mirror, and points the plugins using it towards it.
+		"""
+		self.app.stdscr.clear()
+		self.app.stdscr.addstr(self.app.rows // 2 - 1, 0, self.translate("mirror", "input_mirror"))
+		self.config["mirror"] = input_text(self.app.stdscr, position_y=self.app.rows // 2)
+		PluginRepo.set_mirror(self.config["mirror"])
+		for callback in self.mirror_callbacks:
+			callback(self.config["mirror"])
+
+
 	def manage_plugins(self):
 		"""
 		Creates a menu with different plugin management options
@@ -281,6 +624,8 @@ class PluginRepo(Plugin):
 				(self.translate("manage_plugins_menu", "read_online_plugins_doc"), self.docs_plugins),
 				(self.translate("manage_plugins_menu", "download_theme"), self.download_theme),
 				(self.translate("manage_plugins_menu", "plugins_with_updates"), self.plugins_with_updates),
+				(self.translate("manage_plugins_menu", "build_mirror"), self.build_mirror),
+				(self.translate("manage_plugins_menu", "startup_profile"), self.show_startup_profile),
 				(self.translate("manage_plugins_menu", "leave"), self.leave)
 			), self.selected_menu_item, clear=False, space_out_last_option=True, allow_key_input=True)
 
@@ -339,7 +684,7 @@ class PluginRepo(Plugin):
 			# If no plugin is highlighted by the user
 			if highlighted_plugins is None:
 				# If the plugin is not in the loaded plugins (thus is faulty), we display it in red.
-				if plugin not in self.app.plugins.keys() and plist is None:
+				if plugin not in self.app.plugins.keys() and plugin not in self.lazy_plugins and plist is None:
 					plugin_display_color |= curses.color_pair(1)
 
 			# If the user defined highlighted plugins, they get highlighted in blue
@@ -364,36 +709,23 @@ class PluginRepo(Plugin):
 		Lists the online plugins available.
 		:param show_user: Whether to show the user the list of plugins or not.
 		"""
-		# Tries to connect to the URL on GitHub
-		try:
-			# We display a message to the user
-			self.app.stdscr.clear()
-			msg_str = self.translate("requests", "awaiting_response")
-			self.app.stdscr.addstr(self.app.rows // 2, self.app.cols // 2 - len(msg_str) // 2, msg_str)
+		# We display a message to the user
+		self.app.stdscr.clear()
+		msg_str = self.translate("requests", "awaiting_response")
+		self.app.stdscr.addstr(self.app.rows // 2, self.app.cols // 2 - len(msg_str) // 2, msg_str)
 
-			# Makes a request towards the server
-			r = r_get(PluginRepo.PLUGINS_REPO_URL)
-			self.app.stdscr.clear()
-		# If the connection fails, it tells the user and exits the function
-		except requests.exceptions.ConnectionError:
+		# Lists every item of the repository ending in ".py"
+		plugins_list = fetch_files_list(PluginRepo.PLUGINS_REPO_URL, r"\.py$")
+		self.app.stdscr.clear()
+
+		# If the listing could not be fetched, we tell the user that something went wrong.
+		if plugins_list is None:
 			self._wrong_return_code_inconvenience()
 			msg_str = self.translate("list_online_plugins", "connection_error")
 			self.app.stdscr.addstr(self.app.rows // 2 + 2, self.app.cols // 2 - len(msg_str) // 2, msg_str)
-			return None
 
-		# If the status code is not HTTP 200 (OK), we tell the user that something went wrong.
-		if r.status_code != 200:
-			self._wrong_return_code_inconvenience()
-
-		# If everything worked, we parse the webpage to find all references to .py files
+		# If everything worked, we show the plugins
 		else:
-			# Uses BeautifulSoup to parse all the plugin names (every item in the request ending in ".py")
-			soup = BeautifulSoup(r.text, 'html.parser')
-			plugins = soup.find_all(title=re.compile("\.py$"))
-
-			# Lists the available plugins to the user
-			plugins_list = [e.extract().get_text() for e in plugins]
-
 			# Shows the list of installed plugins to the user if they want to
 			if show_user:
 				# Listing all plugins already installed
@@ -442,9 +774,10 @@ class PluginRepo(Plugin):
 			# If the user wants to download all plugins
 			elif user_wanted_plugin == "all":
 				def _install_all_plugins():
+					manifest = fetch_manifest(PluginRepo.PLUGINS_REPO_URL)
 					for plugin in self.list_online_plugins(show_user=False):
 						if plugin != "flying_banana":
-							self._install_plugin(plugin)
+							self._install_plugin(plugin, manifest)
 
 				display_menu(self.app.stdscr, (
 					(self.app.get_translation("yes"), _install_all_plugins),
@@ -623,50 +956,244 @@ class PluginRepo(Plugin):
 
 	def reload_plugins(self):
 		"""
-		Reloads all plugins.
+		Reloads the plugins whose source changed since they were loaded, along with the plugins depending on them,
+		and loads the new ones.
 		"""
 		# Selects this function by default from the menu
 		self.selected_menu_item = 5
 
-		# --- Uses the reload function on existing plugins, loads the rest. ---
-		# Lists all the plugin files inside the plugins folder
-		for plugin in os.listdir(os.path.dirname(__file__)):
-			if plugin.startswith("__") or \
-					os.path.isdir(os.path.join(os.path.dirname(__file__), plugin)) \
-					or not plugin.endswith(".py"):
-				continue  # Python folders/files
+		# --- Uses the reload function on modified plugins, loads the new ones. ---
+		self.load_plugins(self._plugins_to_reload())
 
-			# Cleaning the name
-			plugin = plugin.replace(".py", "")
+		# Lists the plugins afterwards
+		self.list_plugins()
 
-			# Importing the plugin and storing it in the variable
-			if plugin not in self.app.plugins.keys():
-				try:
-					self.app.plugins[plugin] = [importlib.import_module(f"plugins.{plugin}")]
-				except Exception as e:
-					self.app.log(f"Failed to (re)load plugin {plugin} :\n{e}")
-					continue
+
+	def load_plugins(self, plugins_list: List[str] = None, allow_lazy: bool = True):
+		"""
+		(Re)loads the given plugins, initializing each of them after the plugins it depends on.
+		Plugins declaring themselves as lazy only get placeholder commands, and are imported the first time one of
+		them is used.
+		:param plugins_list: The names of the plugins to load. If None, loads every plugin of the plugins folder.
+		:param allow_lazy: Whether lazy plugins can be deferred. If False, every plugin is loaded right away.
+		"""
+		installed_plugins = self._installed_plugins()
+		if plugins_list is None:
+			plugins_list = installed_plugins
+
+		# Builds the dependency graph of all the installed plugins
+		dependency_graph = self.build_dependency_graph(installed_plugins)
+
+		# Finds the plugins which can be deferred : lazy plugins which no loaded plugin depends on
+		deferred_plugins = set()
+		if allow_lazy:
+			deferred_plugins = {
+				plugin for plugin in plugins_list
+				if self.plugins_source_info[plugin][2]["lazy"]
+				and self.plugins_source_info[plugin][2]["hooks"] is not None
+				and not self.plugins_source_info[plugin][2]["hooks"]
+				and self.plugins_source_info[plugin][2]["commands"]
+			}
+			plugins_stack = [plugin for plugin in installed_plugins if plugin not in deferred_plugins]
+			while plugins_stack:
+				for dependency in dependency_graph[plugins_stack.pop()]:
+					if dependency in deferred_plugins:
+						deferred_plugins.remove(dependency)
+						plugins_stack.append(dependency)
+
+		# Loads the plugins in topological order
+		for plugin in topological_order(dependency_graph):
+			if plugin not in plugins_list:
+				continue
+			if plugin in deferred_plugins:
+				self._defer_plugin(plugin)
 			else:
-				try:
-					self.app.plugins[plugin] = [importlib.reload(self.app.plugins[plugin][0])]
-					self.app.plugins[plugin][-1].plugin_name = plugin
-					if plugin not in self.app.plugins_config.keys():
-						self.app.plugins_config[plugin] = {}
-					self.app.plugins[plugin][-1].config = self.app.plugins_config[plugin]
-				except Exception as e:
-					self.app.log(f"Failed to reload plugin {plugin} :\n{e}")
-					del self.app.plugins[plugin]
-					continue
-
-			# Initializes the plugins init function
+				self._load_plugin(plugin)
+
+		# Saves the profile of the plugins if they were profiled
+		if self.profile_startup:
+			self.save_startup_profile()
+
+
+	def build_dependency_graph(self, plugins_list: List[str]) -> Dict[str, List[str]]:
+		"""
+		Builds the dependency graph of the given plugins, from their declared metadata and the plugins they import.
+		:param plugins_list: The names of the plugins.
+		:return: Each plugin mapped to the installed plugins it depends on.
+		"""
+		# Finds which plugin provides each capability (each plugin provides its own name)
+		provided_by = {}
+		for plugin in plugins_list:
+			self._update_plugin_source_info(plugin)
+			provided_by[plugin] = plugin
+		for plugin in plugins_list:
+			for capability in self.plugins_source_info[plugin][2]["provides"]:
+				provided_by.setdefault(capability, plugin)
+
+		# Links each plugin to the plugins providing its dependencies
+		dependency_graph = {}
+		for plugin in plugins_list:
+			metadata = self.plugins_source_info[plugin][2]
+			dependency_graph[plugin] = []
+			for dependency in (*metadata["dependencies"], *metadata["optional_dependencies"], *metadata["imports"]):
+				if dependency not in provided_by:
+					if dependency in metadata["dependencies"]:
+						self.app.log(f"Plugin {plugin} depends on '{dependency}', which is not installed.")
+				elif provided_by[dependency] != plugin and provided_by[dependency] not in dependency_graph[plugin]:
+					dependency_graph[plugin].append(provided_by[dependency])
+		return dependency_graph
+
+
+	def _load_plugin(self, plugin: str) -> bool:
+		"""
+		Imports (or reloads, if it was already loaded) the given plugin, then initializes it.
+		:param plugin: The name of the plugin.
+		:return: True if the plugin was loaded, False if an error occurred.
+		"""
+		self.lazy_plugins.discard(plugin)
+
+		# Keeps in mind the already imported modules, to know which ones the plugin imports
+		if self.profile_startup:
+			modules_before = set(sys.modules.keys())
+			start_time = time.perf_counter()
+
+		# Importing the plugin and storing it in the variable
+		if plugin not in self.app.plugins.keys():
+			try:
+				self.app.plugins[plugin] = [importlib.import_module(f"plugins.{plugin}")]
+			except Exception as e:
+				self.app.log(f"Failed to (re)load plugin {plugin} :\n{e}")
+				return False
+		else:
 			try:
-				self.app.plugins[plugin].append(self.app.plugins[plugin][0].init(self.app))
+				self.app.plugins[plugin] = [importlib.reload(self.app.plugins[plugin][0])]
+				self.app.plugins[plugin][-1].plugin_name = plugin
+				if plugin not in self.app.plugins_config.keys():
+					self.app.plugins_config[plugin] = {}
+				self.app.plugins[plugin][-1].config = self.app.plugins_config[plugin]
 			except Exception as e:
-				self.app.log(f"An error occurred while importing the plugin '{plugin}' :\n{e}")
+				self.app.log(f"Failed to reload plugin {plugin} :\n{e}")
 				del self.app.plugins[plugin]
+				return False
 
-		# Lists the plugins afterwards
-		self.list_plugins()
+		import_end_time = time.perf_counter()
+
+		# Initializes the plugins init function, then the plugin itself, as its dependencies are already initialized
+		try:
+			self.app.plugins[plugin].append(self.app.plugins[plugin][0].init(self.app))
+			init_end_time = time.perf_counter()
+			if hasattr(self.app.plugins[plugin][1], "init") and not self.app.plugins[plugin][1].was_initialized:
+				self.app.plugins[plugin][1].init()
+				self.app.plugins[plugin][1].was_initialized = True
+		except Exception as e:
+			self.app.log(f"An error occurred while importing the plugin '{plugin}' :\n{e}")
+			del self.app.plugins[plugin]
+			return False
+
+		# Records how long each step took, and the modules imported along the plugin (only the ones not imported yet)
+		if self.profile_startup:
+			setup_end_time = time.perf_counter()
+			self.startup_profile[plugin] = {
+				"import_time": import_end_time - start_time,
+				"init_time": init_end_time - import_end_time,
+				"setup_time": setup_end_time - init_end_time,
+				"total_time": setup_end_time - start_time,
+				"modules": sorted(set(sys.modules.keys()) - modules_before - {f"plugins.{plugin}"})
+			}
+		return True
+
+
+	def _defer_plugin(self, plugin: str):
+		"""
+		Registers placeholder commands for the commands declared by a lazy plugin, which load the plugin the first
+		time they are used.
+		:param plugin: The name of the plugin.
+		"""
+		self.lazy_plugins.add(plugin)
+		metadata = self.plugins_source_info[plugin][2]
+		plugin_translations = metadata["translations"].get(
+			getattr(self.app, "language", "en"), metadata["translations"].get("en", {})
+		)
+		for command_name, command_description in metadata["commands"].items():
+			self.app.commands[command_name] = CommandType(
+				partial(self._run_deferred_command, plugin, command_name),
+				plugin_translations.get(command_description, command_description),
+				False
+			)
+
+
+	def _run_deferred_command(self, plugin: str, command_name: str):
+		"""
+		Loads a lazy plugin, then runs the command it registered under the given name.
+		:param plugin: The name of the plugin.
+		:param command_name: The name of the command the user called.
+		"""
+		if self._load_plugin(plugin) and command_name in self.app.commands:
+			self.app.commands[command_name].command()
+
+
+	def _installed_plugins(self) -> List[str]:
+		"""
+		Lists all the plugin files inside the plugins folder.
+		:return: The names of the plugins.
+		"""
+		return [
+			plugin[:-3] for plugin in os.listdir(os.path.dirname(__file__))
+			if not (plugin.startswith("__")
+			or os.path.isdir(os.path.join(os.path.dirname(__file__), plugin))
+			or not plugin.endswith(".py"))
+		]
+
+
+	def _plugins_to_reload(self) -> List[str]:
+		"""
+		Finds the plugins that need to be (re)loaded : the ones that are not loaded, the ones whose source changed,
+		and every plugin depending on one of those.
+		:return: The names of the plugins to reload.
+		"""
+		plugins_list = self._installed_plugins()
+
+		# Finds the plugins that are not loaded or that changed
+		to_reload = set()
+		for plugin in plugins_list:
+			if self._update_plugin_source_info(plugin) or (
+					plugin not in self.app.plugins.keys() and plugin not in self.lazy_plugins
+			):
+				to_reload.add(plugin)
+
+		# Adds every plugin depending on a reloaded plugin, since they still hold the old version of its classes
+		dependents = {}
+		for plugin, dependencies in self.build_dependency_graph(plugins_list).items():
+			for dependency in dependencies:
+				dependents.setdefault(dependency, []).append(plugin)
+		plugins_stack = list(to_reload)
+		while plugins_stack:
+			for dependent in dependents.get(plugins_stack.pop(), ()):
+				if dependent not in to_reload:
+					to_reload.add(dependent)
+					plugins_stack.append(dependent)
+		return list(to_reload)
+
+
+	def _update_plugin_source_info(self, plugin: str) -> bool:
+		"""
+		Updates the modification time, hash and metadata stored for the source of the given plugin.
+		The file is only read if its modification time changed.
+		:param plugin: The name of the plugin.
+		:return: True if the source of the plugin changed since the last time it was recorded.
+		"""
+		file_path = os.path.join(os.path.dirname(__file__), f"{plugin}.py")
+		mtime = os.path.getmtime(file_path)
+		previous_info = self.plugins_source_info.get(plugin)
+		if previous_info is not None and previous_info[0] == mtime:
+			return False
+
+		# Hashes the source, and reads its metadata without executing it
+		with open(file_path, "r", encoding="utf-8") as f:
+			source = f.read()
+		source_hash = hashlib.sha256(source.encode("utf-8")).hexdigest()
+		self.plugins_source_info[plugin] = (mtime, source_hash, read_plugin_metadata(source))
+		return previous_info is not None and previous_info[1] != source_hash
 
 
 	def disable_plugins(self):
@@ -767,20 +1294,10 @@ class PluginRepo(Plugin):
 						os.path.join(os.path.dirname(__file__), f"{plugin_name}.py")
 					)
 
-					# Importing the plugin and storing it in the variable
-					try:
-						self.app.plugins[plugin_name] = [importlib.import_module(f"plugins.{plugin_name}")]
-					except Exception as e:
-						self.app.log(f"Failed to load plugin {plugin_name} :\n{e}")
+					# Importing the plugin and initializing it
+					if not self._load_plugin(plugin_name):
 						return
 
-					# Initializes the plugins init function
-					try:
-						self.app.plugins[plugin_name].append(self.app.plugins[plugin_name][0].init(self.app))
-					except Exception as e:
-						del self.app.plugins[plugin_name]
-						self.app.log(f"An error occurred while importing the plugin '{plugin_name}' :\n{e}")
-
 					# Showing a message indicating that the plugin has been loaded
 					msg_str = self.translate(
 						"disable_plugins", "plugin_disabled",
@@ -812,34 +1329,25 @@ class PluginRepo(Plugin):
 		"""
 		Allows the user to download a theme to replace the new one.
 		"""
-		# Tries to connect to the URL on GitHub
-		try:
-			# We display a message to the user
-			self.app.stdscr.clear()
-			msg_str = self.translate("requests", "awaiting_response")
-			self.app.stdscr.addstr(self.app.rows // 2, self.app.cols // 2 - len(msg_str) // 2, msg_str)
+		# We display a message to the user
+		self.app.stdscr.clear()
+		msg_str = self.translate("requests", "awaiting_response")
+		self.app.stdscr.addstr(self.app.rows // 2, self.app.cols // 2 - len(msg_str) // 2, msg_str)
 
-			# Makes the request
-			r = r_get(PluginRepo.THEME_REPO_URL)
-			self.app.stdscr.clear()
-		# If the connection fails, it tells the user and exits the function
-		except requests.exceptions.ConnectionError:
+		# Lists every .ini file (theme) of the repository
+		themes_list = fetch_files_list(PluginRepo.THEME_REPO_URL, r"\.ini$")
+		self.app.stdscr.clear()
+
+		# If the listing could not be fetched, we tell the user that something went wrong.
+		if themes_list is None:
 			self._wrong_return_code_inconvenience()
 			msg_str = self.translate("download", "check_connection")
 			self.app.stdscr.addstr(self.app.rows // 2 + 2, self.app.cols // 2 - len(msg_str) // 2, msg_str)
-			return None
-
-		# If the status code is not HTTP 200 (OK), we tell the user that something went wrong.
-		if r.status_code != 200:
-			self._wrong_return_code_inconvenience()
 
-		# If everything worked, we parse the webpage to find all references to .ini files (themes)
+		# If everything worked, we show the themes
 		else:
-			soup = BeautifulSoup(r.text, 'html.parser')
-			themes = soup.find_all(title=re.compile("\.ini$"))
-
-			# Lists the available plugins to the user
-			themes_list = [e.extract().get_text()[:-4] for e in themes]
+			# Lists the available themes to the user
+			themes_list = [theme[:-4] for theme in themes_list]
 
 			# We show this list to the user
 			self.list_plugins(themes_list, listed_element="THEMES", check_py=False, getch=False)
@@ -858,11 +1366,14 @@ class PluginRepo(Plugin):
 					self.app.stdscr.addstr(self.app.rows // 2, self.app.cols // 2 - len(msg_str) // 2, msg_str)
 
 					# We download the contents of the file from GitHub
-					r = r_get(f"https://raw.githubusercontent.com/megat69/AlgorithmicEditor_Themes/main/{user_wanted_theme}.ini")
+					r = r_get(f"{PluginRepo.THEME_REPO_INDIVIDUAL_FILE}/{user_wanted_theme}.ini")
 					self.app.stdscr.clear()
 
-					# If something went wrong with the request (the webpage didn't return an HTTP 200 (OK) code), we warn the user and exit the function
-					if r.status_code != 200:
+					# If something went wrong with the request (the webpage didn't return an HTTP 200 (OK) code), or
+					# the file doesn't match the manifest of the mirror, we warn the user and exit the function
+					if r.status_code != 200 or not matches_manifest(
+							f"{user_wanted_theme}.ini", r.content, fetch_manifest(PluginRepo.THEME_REPO_URL)
+					):
 						self._wrong_return_code_inconvenience()
 
 					# If everything went well
@@ -890,6 +1401,147 @@ class PluginRepo(Plugin):
 					self.app.stdscr.getch()
 
 
+	def build_mirror(self):
+		"""
+		Downloads a snapshot of every mirrorable folder (plugins, themes, and those added by other plugins) into a
+		folder chosen by the user, which can then be used as a mirror.
+		"""
+		# Selects this function by default from the menu
+		self.selected_menu_item = 9
+
+		# Asks the user for the destination folder
+		self.app.stdscr.clear()
+		self.app.stdscr.addstr(self.app.rows // 2 - 1, 0, self.translate("mirror", "input_folder"))
+		folder = input_text(self.app.stdscr, position_y=self.app.rows // 2)
+
+		# If the user wrote nothing, it means they want to cancel
+		if folder == "":
+			return None
+
+		# We display a message to the user
+		self.app.stdscr.clear()
+		msg_str = self.translate("mirror", "building")
+		self.app.stdscr.addstr(self.app.rows // 2, self.app.cols // 2 - len(msg_str) // 2, msg_str)
+		self.app.stdscr.refresh()
+
+		# Downloads all the files of each folder at once, then writes them with their manifest
+		nb_files = 0
+		for mirror_folder, list_files in self.mirror_folders.items():
+			listing = list_files()
+			if listing is None:
+				self.app.stdscr.clear()
+				return self._wrong_return_code_inconvenience()
+			base_url, files = listing
+			with ThreadPoolExecutor(max_workers=8) as executor:
+				responses = executor.map(lambda file: r_get(f"{base_url}/{file}"), files)
+				files_contents = {file: r.text for file, r in zip(files, responses) if r.status_code == 200}
+			write_mirror_folder(os.path.join(folder, mirror_folder), files_contents)
+			nb_files += len(files_contents)
+
+		# We tell the user that the mirror was built
+		self.app.stdscr.clear()
+		msg_str = self.translate("mirror", "built", folder=folder, nb_files=nb_files)
+		self.app.stdscr.addstr(self.app.rows // 2, self.app.cols // 2 - len(msg_str) // 2, msg_str)
+		self.app.stdscr.getch()
+
+
+	def toggle_profile_startup(self):
+		"""
+		Toggles the profiling of the loading of the plugins in the live app and the config.
+		"""
+		self.profile_startup = not self.profile_startup
+		self.config["profile_startup"] = self.profile_startup
+
+
+	def save_startup_profile(self, file_path: str = STARTUP_PROFILE_FILE):
+		"""
+		Writes the startup profile of the plugins into a JSON file, slowest plugins first.
+		:param file_path: The path of the JSON file. Defaults to 'startup_profile.json' at the root of the editor.
+		"""
+		try:
+			with open(file_path, "w", encoding="utf-8") as f:
+				json.dump(dict(sorted(
+					self.startup_profile.items(), key=lambda item: item[1]["total_time"], reverse=True
+				)), f, indent=4)
+		except OSError as e:
+			self.app.log(f"Failed to save the startup profile :\n{e}")
+
+
+	def show_startup_profile(self):
+		"""
+		Displays the startup profile of the plugins as a table, slowest plugins first.
+		"""
+		# Selects this function by default from the menu
+		self.selected_menu_item = 10
+
+		self.app.stdscr.clear()
+		msg = self.translate("startup_profile", "title")
+		self.app.stdscr.addstr(0, self.app.cols // 2 - len(msg) // 2, msg, curses.A_BOLD)
+
+		# If nothing was profiled, tells the user how to do it
+		if not self.startup_profile:
+			lines = self.translate(
+				"startup_profile", "empty", option=self.translate("startup_profile", "option")
+			).split("\n")
+			for i, msg in enumerate(lines):
+				msg = msg[:self.app.cols - 1]
+				self.app.stdscr.addstr(self.app.rows // 2 + i, self.app.cols // 2 - len(msg) // 2, msg)
+			self.app.stdscr.getch()
+			return None
+
+		# Displays the header of the table
+		self.app.stdscr.addstr(
+			2, 0,
+			STARTUP_PROFILE_ROW.format(**self.translate("startup_profile", "columns"))[:self.app.cols - 1],
+			curses.A_REVERSE
+		)
+
+		# Displays each plugin, slowest first, with its times in milliseconds
+		sorted_profile = sorted(self.startup_profile.items(), key=lambda item: item[1]["total_time"], reverse=True)
+		for i, (plugin, profile) in enumerate(sorted_profile[:max(self.app.rows - 6, 0)]):
+			self.app.stdscr.addstr(i + 3, 0, STARTUP_PROFILE_ROW.format(
+				plugin=plugin[:29],
+				**{
+					column: f"{profile[column] * 1000:.1f}ms"
+					for column in ("import_time", "init_time", "setup_time", "total_time")
+				},
+				modules=len(profile["modules"])
+			)[:self.app.cols - 1])
+
+		# Warns the user if some of the loaded plugins are missing from the profile
+		nb_unprofiled = len(set(self.app.plugins) - set(self.startup_profile))
+		if nb_unprofiled != 0:
+			msg = self.translate("startup_profile", "partial", nb_plugins=nb_unprofiled)[:self.app.cols - 1]
+			self.app.stdscr.addstr(self.app.rows - 3, 0, msg)
+
+		# Tells the user where to find the full profile
+		msg = self.translate("startup_profile", "saved", file=os.path.normpath(STARTUP_PROFILE_FILE))[:self.app.cols - 1]
+		self.app.stdscr.addstr(self.app.rows - 2, 0, msg, curses.A_BOLD)
+		self.app.stdscr.getch()
+
+
+	def _list_mirrorable_plugins(self) -> Optional[Tuple[str, List[str]]]:
+		"""
+		Lists the files of the plugins repository that belong in a mirror : each plugin and its documentation.
+		:return: The base URL of the files and their names, or None if they could not be listed.
+		"""
+		plugins_list = fetch_files_list(PluginRepo.PLUGINS_REPO_URL, r"\.(py|md)$")
+		if plugins_list is None:
+			return None
+		return PluginRepo.PLUGINS_REPO_INDIVIDUAL_FILE, plugins_list
+
+
+	def _list_mirrorable_themes(self) -> Optional[Tuple[str, List[str]]]:
+		"""
+		Lists the files of the themes repository that belong in a mirror.
+		:return: The base URL of the files and their names, or None if they could not be listed.
+		"""
+		themes_list = fetch_files_list(PluginRepo.THEME_REPO_URL, r"\.ini$")
+		if themes_list is None:
+			return None
+		return PluginRepo.THEME_REPO_INDIVIDUAL_FILE, themes_list
+
+
 	def plugins_with_updates(self):
 		"""
 		Checks for updates in each of the installed plugins.
@@ -950,11 +1602,12 @@ class PluginRepo(Plugin):
 
 		# Gets the state of each of the plugins before activating the menu
 		cached_plugins = {}
+		manifest = fetch_manifest(PluginRepo.PLUGINS_REPO_URL)
 		for i, (plugin_name, plugin_status) in enumerate(plugin_list):
 			r = r_get(f"{PluginRepo.PLUGINS_REPO_INDIVIDUAL_FILE}/{plugin_name}.py")
 
-			# In case of an error
-			if r.status_code != 200:
+			# In case of an error, or if the file doesn't match the manifest of the mirror
+			if r.status_code != 200 or not matches_manifest(f"{plugin_name}.py", r.content, manifest):
 				plugin_list[i][1] = 3
 
 			# If everything went well
@@ -1016,11 +1669,11 @@ class PluginRepo(Plugin):
 							r = r_get(f"{PluginRepo.PLUGINS_REPO_INDIVIDUAL_FILE}/{plugin_name}.md")
 							# If everything went well, we simply dump the contents of the documentation file into another file
 							# And if something went wrong, we simply don't do it and don't warn the user, he'll download it later
-							if r.status_code == 200:
+							if r.status_code == 200 and matches_manifest(f"{plugin_name}.md", r.content, manifest):
 								with open(os.path.join(os.path.dirname(__file__), f"{plugin_name}.md"), "w", encoding="utf-8") as f:
 									f.write(r.text)
 						else:
-							self._install_plugin(plugin_name)
+							self._install_plugin(plugin_name, manifest)
 						plugin_list[selected_plugin][1] = 0
 
 
@@ -1045,11 +1698,16 @@ class PluginRepo(Plugin):
 		self.app.stdscr.getch()
 
 
-	def _install_plugin(self, plugin_name: str):
+	def _install_plugin(self, plugin_name: str, manifest: Optional[Dict[str, str]] = None):
 		"""
 		Installs the given plugin from GitHub.
+		Plugins downloaded from a mirror are checked against its manifest, and not installed if they don't match.
 		:param plugin_name: The name of the plugin to install.
+		:param manifest: The manifest of the plugins folder of the mirror, if it was already fetched.
 		"""
+		if manifest is None:
+			manifest = fetch_manifest(PluginRepo.PLUGINS_REPO_URL)
+
 		# We display a message to the user
 		self.app.stdscr.clear()
 		msg_str = f"Downloading plugin {plugin_name}..."
@@ -1058,8 +1716,9 @@ class PluginRepo(Plugin):
 		# We download the contents of the file from GitHub
 		r = r_get(f"{PluginRepo.PLUGINS_REPO_INDIVIDUAL_FILE}/{plugin_name}.py")
 
-		# If something went wrong with the request (the webpage didn't return an HTTP 200 (OK) code), we warn the user and exit the function
-		if r.status_code != 200:
+		# If something went wrong with the request (the webpage didn't return an HTTP 200 (OK) code), or the file
+		# doesn't match the manifest of the mirror, we warn the user and exit the function
+		if r.status_code != 200 or not matches_manifest(f"{plugin_name}.py", r.content, manifest):
 			self._wrong_return_code_inconvenience()
 
 		# If everything went well
@@ -1077,11 +1736,25 @@ class PluginRepo(Plugin):
 			r = r_get(f"{PluginRepo.PLUGINS_REPO_INDIVIDUAL_FILE}/{plugin_name}.md")
 			# If everything went well, we simply dump the contents of the documentation file into another file
 			# And if something went wrong, we simply don't do it and don't warn the user, he'll download it later
-			if r.status_code == 200:
+			if r.status_code == 200 and matches_manifest(f"{plugin_name}.md", r.content, manifest):
 				with open(os.path.join(os.path.dirname(__file__), f"{plugin_name}.md"), "w", encoding="utf-8") as f:
 					f.write(r.text)
 			self.app.stdscr.clear()
 
 
+def load_plugins(app) -> PluginRepo:
+	"""
+	Loads every plugin of the plugins folder, each after the plugins it depends on, and defers the lazy ones.
+	This is the entry point the editor calls on startup, instead of importing the plugins itself :
+		from plugins.plugin_repo import load_plugins
+		load_plugins(app)
+	:param app: The app.
+	:return: The plugin repo, which keeps track of the loaded plugins to reload them later on.
+	"""
+	plugin_repo = PluginRepo(app)
+	plugin_repo.load_plugins()
+	return plugin_repo
+
+
 def init(app) -> PluginRepo:
 	return PluginRepo(app)
@@ -0,0 +1,345 @@
+import curses
+import os
+import time
+import tracemalloc
+from collections import deque
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Tuple
+
+from plugin import Plugin
+
+PLUGIN_METADATA = {
+	"hooks": ("fixed_update",),
+	"essential": True
+}
+
+# Hooks of the plugins that get profiled
+PROFILED_HOOKS = ("update_on_keypress", "update_on_syntax_highlight", "fixed_update", "update_on_compilation")
+
+# Methods of the app that get profiled, as plugins often override them
+PROFILED_APP_METHODS = ("display_text", "apply_stylings")
+
+# Amount of most recent calls kept for each hook to compute the percentiles
+SAMPLES_SIZE = 1000
+
+# Amount of hooks displayed in the overlay, and layout of each of its rows
+OVERLAY_SIZE = 10
+OVERLAY_ROW = "{hook:<36}{count:>8}{total:>10}{p50:>9}{p99:>9}{peak_memory:>10}"
+
+# File in which the folded stacks are exported, at the root of the editor
+FOLDED_STACKS_FILE = os.path.join(os.path.dirname(__file__), "..", "hooks_profile.folded")
+
+
+def _is_profiled(function: Callable) -> bool:
+	"""
+	Checks whether a function is a wrapper of the profiler, or wraps one (e.g. the wrapper of the frame budget).
+	:param function: The function to check.
+	:return: True if a wrapper of the profiler is in the chain of wrapped functions.
+	"""
+	while function is not None:
+		if getattr(function, "_profiler_wrapped", False):
+			return True
+		function = getattr(function, "__wrapped__", None)
+	return False
+
+
+class HookStats:
+	"""
+	Runtime statistics of a single hook of a plugin.
+	"""
+	def __init__(self):
+		self.count = 0
+		self.total_time = 0.
+		# Highest growth of the peak of traced memory during a call, in bytes, if it was measured
+		self.peak_memory: Optional[int] = None
+		self.samples = deque(maxlen=SAMPLES_SIZE)
+
+
+	def add_call(self, elapsed_time: float, peak_memory: Optional[int]):
+		"""
+		Records a call to the hook.
+		:param elapsed_time: How long the call took, in seconds.
+		:param peak_memory: How much the peak of traced memory grew during the call, in bytes. None if not measured.
+		"""
+		self.count += 1
+		self.total_time += elapsed_time
+		if peak_memory is not None:
+			self.peak_memory = max(self.peak_memory or 0, peak_memory)
+		self.samples.append(elapsed_time)
+
+
+	def percentile(self, percentage: float) -> float:
+		"""
+		Computes a percentile of the duration of the most recent calls.
+		:param percentage: The percentile to compute, between 0 and 100.
+		:return: The percentile, in seconds.
+		"""
+		if not self.samples:
+			return 0.
+		sorted_samples = sorted(self.samples)
+		return sorted_samples[min(int(len(sorted_samples) * percentage / 100), len(sorted_samples) - 1)]
+
+
+class ProfilerPlugin(Plugin):
+	"""
+	Measures the time spent in the hooks of each plugin, and displays it live.
+	"""
+	__singleton = None
+
+	def __new__(cls, *args, **kwargs):
+		"""
+		Creates a singleton of the class.
+		"""
+		if cls.__singleton is None:
+			cls.__singleton = super().__new__(cls)
+		return cls.__singleton
+
+
+	def __init__(self, app):
+		super().__init__(app)
+
+		# Creating translations
+		self.translations = {
+			"en": {
+				"toggle_profiling": "Toggle hooks profiling",
+				"toggle_overlay": "Toggle profiler overlay",
+				"export": "Export profile as folded stacks",
+				"track_allocations": "Track peak memory in profiler (slower)",
+				"columns": {
+					"hook": "Plugin.hook",
+					"count": "calls",
+					"total": "total",
+					"p50": "p50 ms",
+					"p99": "p99 ms",
+					"peak_memory": "peak mem"
+				},
+				"not_profiling": "Profiling is disabled. Use the '{command}' command to enable it.",
+				"exported": "Profile exported to '{file}'.",
+				"export_failed": "The profile could not be exported : {error}"
+			},
+			"fr": {
+				"toggle_profiling": "Activer/désactiver le profilage des hooks",
+				"toggle_overlay": "Afficher/masquer le profileur",
+				"export": "Exporter le profil en piles repliées",
+				"track_allocations": "Suivre le pic de mémoire dans le profileur (plus lent)",
+				"columns": {
+					"hook": "Plugin.hook",
+					"count": "appels",
+					"total": "total",
+					"p50": "p50 ms",
+					"p99": "p99 ms",
+					"peak_memory": "pic mém"
+				},
+				"not_profiling": "Le profilage est désactivé. Utilisez la commande '{command}' pour l'activer.",
+				"exported": "Profil exporté dans '{file}'.",
+				"export_failed": "Le profil n'a pas pu être exporté : {error}"
+			}
+		}
+
+		# Creates the use vars
+		self.profiling = False
+		self.display_overlay = False
+		self.track_allocations = False
+		# Statistics of each hook, for each plugin
+		self.stats: Dict[Tuple[str, str], HookStats] = {}
+		# Self time of each stack of hooks (plugin and hook names), in seconds
+		self.folded_stacks: Dict[Tuple[str, ...], float] = {}
+		# Hooks currently running, with the time spent in the hooks they called
+		self.call_stack: List[List] = []
+		# Object, original method and wrapper of each wrapped hook
+		self.wrapped_hooks: Dict[Tuple[int, str], Tuple[object, Callable, Callable]] = {}
+
+		# Creates the commands
+		self.add_command("pf", self.toggle_profiling, self.translate("toggle_profiling"))
+		self.add_command("pfo", self.toggle_overlay, self.translate("toggle_overlay"))
+		self.add_command("pfe", self.export_folded_stacks, self.translate("export"), True)
+
+
+	def init(self):
+		"""
+		Gets the config and creates the options.
+		"""
+		self.track_allocations = self.get_config("track_allocations", False)
+		self.add_option(self.translate("track_allocations"), lambda: self.track_allocations, self.toggle_track_allocations)
+
+
+	def toggle_profiling(self):
+		"""
+		Starts or stops profiling the hooks.
+		"""
+		self.profiling = not self.profiling
+		if self.profiling:
+			self.stats.clear()
+			self.folded_stacks.clear()
+			self._wrap_hooks()
+			self.display_overlay = True
+			if self.track_allocations:
+				tracemalloc.start()
+		else:
+			self._unwrap_hooks()
+			self.display_overlay = False
+			if tracemalloc.is_tracing():
+				tracemalloc.stop()
+
+
+	def toggle_overlay(self):
+		"""
+		Shows or hides the overlay with the results of the profiling.
+		"""
+		self.display_overlay = not self.display_overlay
+
+
+	def toggle_track_allocations(self):
+		"""
+		Toggles the tracking of the peak memory in the live app and the config.
+		"""
+		self.track_allocations = not self.track_allocations
+		self.config["track_allocations"] = self.track_allocations
+		if self.profiling:
+			if self.track_allocations:
+				tracemalloc.start()
+			elif tracemalloc.is_tracing():
+				tracemalloc.stop()
+
+
+	def _wrap_hooks(self):
+		"""
+		Wraps the hooks of every loaded plugin and the profiled methods of the app, if they are not wrapped yet.
+		"""
+		for plugin_name, plugin in self.app.plugins.items():
+			if len(plugin) < 2 or plugin[1] is self:
+				continue
+			for hook in PROFILED_HOOKS:
+				if hasattr(plugin[1], hook):
+					self._wrap(plugin[1], hook, plugin_name)
+		for method in PROFILED_APP_METHODS:
+			if hasattr(self.app, method):
+				self._wrap(self.app, method, "app")
+
+
+	def _wrap(self, obj: object, hook: str, owner_name: str):
+		"""
+		Replaces the given method of an object by a function measuring it.
+		:param obj: The object owning the method.
+		:param hook: The name of the method.
+		:param owner_name: The name under which the method is displayed (the name of the plugin, or 'app').
+		"""
+		# If the method is already wrapped, even under the wrapper of another plugin, there's nothing to do
+		if _is_profiled(getattr(obj, hook)):
+			return
+
+		original_method = getattr(obj, hook)
+
+		@wraps(original_method)
+		def profiled_method(*args, **kwargs):
+			# A wrapper which could not be removed when the profiling stopped (as it was wrapped again) does nothing
+			if not self.profiling:
+				return original_method(*args, **kwargs)
+
+			# The peak of traced memory is global to the process, so it is only measured in the outermost hook : a
+			# nested hook resetting it would hide the memory used by the hook calling it
+			self.call_stack.append([(owner_name, hook), 0.])
+			if len(self.call_stack) == 1 and self.track_allocations and tracemalloc.is_tracing():
+				memory_before = tracemalloc.get_traced_memory()[0]
+				tracemalloc.reset_peak()
+			else:
+				memory_before = None
+			start_time = time.perf_counter()
+			try:
+				return original_method(*args, **kwargs)
+			finally:
+				elapsed_time = time.perf_counter() - start_time
+				peak_memory = None
+				if memory_before is not None and tracemalloc.is_tracing():
+					peak_memory = max(tracemalloc.get_traced_memory()[1] - memory_before, 0)
+				self.stats.setdefault((owner_name, hook), HookStats()).add_call(elapsed_time, peak_memory)
+
+				# Records the self time of the current stack, and adds the total time to the calling hook
+				stack = tuple(f"{frame[0][0]}.{frame[0][1]}" for frame in self.call_stack)
+				self.folded_stacks[stack] = self.folded_stacks.get(stack, 0.) + elapsed_time - self.call_stack[-1][1]
+				self.call_stack.pop()
+				if self.call_stack:
+					self.call_stack[-1][1] += elapsed_time
+
+		profiled_method._profiler_wrapped = True
+		setattr(obj, hook, profiled_method)
+		self.wrapped_hooks[id(obj), hook] = (obj, original_method, profiled_method)
+
+
+	def _unwrap_hooks(self):
+		"""
+		Puts back the original methods of every wrapped hook, unless something else overrode them in the meantime.
+		"""
+		for (_, hook), (obj, original_method, profiled_method) in self.wrapped_hooks.items():
+			if getattr(obj, hook, None) is profiled_method:
+				# Methods defined by the class only need the instance attribute shadowing them to be removed
+				if getattr(type(obj), hook, None) is getattr(original_method, "__func__", None):
+					delattr(obj, hook)
+				else:
+					setattr(obj, hook, original_method)
+		self.wrapped_hooks.clear()
+		self.call_stack.clear()
+
+
+	def fixed_update(self):
+		"""
+		Wraps the newly loaded plugins and displays the overlay.
+		"""
+		if not self.profiling:
+			return None
+
+		# Wraps the plugins that might have been (re)loaded since the profiling started
+		self._wrap_hooks()
+
+		if self.display_overlay:
+			self.display_profile()
+
+
+	def display_profile(self):
+		"""
+		Displays the hooks taking the most time at the top right of the screen.
+		"""
+		header = OVERLAY_ROW.format(**self.translate("columns"))
+		x = max(self.app.cols - len(header) - 1, 0)
+		self.app.stdscr.addstr(0, x, header[:self.app.cols - 1], curses.A_REVERSE)
+
+		# Displays the most expensive hooks first
+		sorted_stats = sorted(self.stats.items(), key=lambda item: item[1].total_time, reverse=True)
+		for i, ((owner_name, hook), stats) in enumerate(sorted_stats[:min(OVERLAY_SIZE, self.app.rows - 2)]):
+			self.app.stdscr.addstr(i + 1, x, OVERLAY_ROW.format(
+				hook=f"{owner_name}.{hook}"[:35],
+				count=stats.count,
+				total=f"{stats.total_time * 1000:.0f}ms",
+				p50=f"{stats.percentile(50) * 1000:.2f}",
+				p99=f"{stats.percentile(99) * 1000:.2f}",
+				peak_memory=f"{stats.peak_memory // 1024}K" if stats.peak_memory is not None else "-"
+			)[:self.app.cols - 1], curses.A_REVERSE)
+
+
+	def export_folded_stacks(self, file_path: str = FOLDED_STACKS_FILE):
+		"""
+		Writes the profile as folded stacks ('app.display_text;tabs.update_on_syntax_highlight 1234'), with the self
+		time of each stack in microseconds. This format can be read by flamegraph.pl, speedscope, or inferno.
+		:param file_path: The path of the file. Defaults to 'hooks_profile.folded' at the root of the editor.
+		"""
+		if not self.stats:
+			msg = self.translate("not_profiling", command="pf")
+		else:
+			try:
+				with open(file_path, "w", encoding="utf-8") as f:
+					for stack, self_time in self.folded_stacks.items():
+						f.write(f"{';'.join(stack)} {round(self_time * 1_000_000)}\n")
+				msg = self.translate("exported", file=os.path.normpath(file_path))
+			except OSError as e:
+				msg = self.translate("export_failed", error=e)
+
+		# Tells the user what happened
+		self.app.stdscr.clear()
+		msg = msg[:self.app.cols - 1]
+		self.app.stdscr.addstr(self.app.rows // 2, self.app.cols // 2 - len(msg) // 2, msg)
+		self.app.stdscr.getch()
+		self.app.stdscr.clear()
+
+
+def init(app) -> ProfilerPlugin:
+	return ProfilerPlugin(app)
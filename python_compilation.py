@@ -1,14 +1,382 @@
+import ast
+import codecs
+import curses
+import hashlib
+import json
+import math
+import os
+import pstats
+import py_compile
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+
+# The resource module only exists on POSIX systems, where it lets us limit the memory of the programs we run
+try:
+	import resource
+except ImportError:
+	RESOURCE_AVAILABLE = False
+else:
+	RESOURCE_AVAILABLE = True
+
 from plugin import Plugin
+from utils import display_menu
 from compiler import Compiler
 
+# With the compiler extensions, the Python compiler shares the cache of compiled outputs of the other compilers
+try:
+	from .compiler_extensions import CompilerExtensionsPlugin
+except ImportError:
+	COMPILER_EXTENSIONS_AVAILABLE = False
+else:
+	COMPILER_EXTENSIONS_AVAILABLE = True
+
+PLUGIN_METADATA = {
+	"hooks": ("fixed_update",),
+	"optional_dependencies": ("compiler_extensions",),
+	"essential": True
+}
+
+# Instruction names, var types and other instructions of the Python compilers
+PYTHON_COMPILER_PARAMS = (
+	('for', 'if', 'while', 'switch', 'case', 'default', 'else', 'elif', 'fx'),
+	{"int": "int", "float": "float", "string": "str", "bool": "bool", "char": "str"},
+	("print", "input", "end", "elif", "else", "fx_start", "vars", "data", "datar", "result", "return", "desc", "const", "arr")
+)
+
+# A string literal, in double or single quotes
+STRING_PATTERN = r"(?P<string>\"(?:[^\"\\]|\\.)*\"|'(?:[^'\\]|\\.)*')"
+# Matches the string literals and the double-slashes, the first double-slash outside a string starting the comment
+COMMENT_REGEX = re.compile(rf"{STRING_PATTERN}|(?P<comment>//)")
+
+# Amount of seconds without modification of the text before the preview gets recompiled
+PREVIEW_DEBOUNCE = 0.15
+
+# Default wall-clock time (in seconds) and memory (in megabytes) a compiled program can use when run
+DEFAULT_RUN_TIMEOUT = 10
+DEFAULT_RUN_MEMORY_LIMIT = 512
+
+# Amount of milliseconds between two refreshes of the output of a running program
+RUN_REFRESH_DELAY = 50
+
+# Amount of functions shown in the profile of a program
+PROFILE_SIZE = 15
+
+# Folder in which the compiled programs are cached as bytecode, at the root of the editor, and how many are kept
+BYTECODE_CACHE_FOLDER = os.path.join(os.path.dirname(__file__), "..", ".python_cache")
+BYTECODE_CACHE_SIZE = 64
+
+# Input sizes on which the functions get benchmarked, and default amount of seconds each size can take
+BENCHMARK_SIZES = (10, 100, 1_000, 10_000, 100_000)
+DEFAULT_BENCHMARK_TIMEOUT = 5
+BENCHMARK_ROW = "{size:>10}{time:>14}{runs:>8}"
+
+# Complexity classes the timings are fitted to, simplest first
+COMPLEXITY_CLASSES = {
+	"O(1)": lambda n: 1.,
+	"O(log n)": lambda n: math.log2(n),
+	"O(n)": lambda n: float(n),
+	"O(n log n)": lambda n: n * math.log2(n),
+	"O(n²)": lambda n: float(n) ** 2,
+	"O(n³)": lambda n: float(n) ** 3,
+	"O(2ⁿ)": lambda n: 2. ** n
+}
+
+# Script run in a worker process to time a function : it generates inputs of size n from the annotations of the
+# parameters, then calls the function until it has been measured for long enough, and prints the fastest call
+BENCHMARK_WORKER = """
+import json, marshal, os, random, string, sys, time
+path, function_name, size, kinds = sys.argv[1], sys.argv[2], int(sys.argv[3]), sys.argv[4:]
+namespace = {"__name__": "__benchmark__"}
+with open(path, "rb") as f:
+	exec(marshal.loads(f.read()[16:]) if path.endswith(".pyc") else compile(f.read(), path, "exec"), namespace)
+function = namespace[function_name]
+random.seed(size)
+generators = {
+	"int": lambda: size,
+	"float": lambda: float(size),
+	"str": lambda: "".join(random.choices(string.ascii_lowercase, k=size)),
+	"bool": lambda: True,
+	"list": lambda: [random.randrange(size) for _ in range(size)]
+}
+result = sys.stdout
+sys.stdout = open(os.devnull, "w")
+best_time, total_time, runs = float("inf"), 0., 0
+while runs < 3 or (total_time < 0.2 and runs < 1000):
+	arguments = [generators.get(kind, generators["int"])() for kind in kinds]
+	start_time = time.perf_counter()
+	function(*arguments)
+	elapsed_time = time.perf_counter() - start_time
+	best_time, total_time, runs = min(best_time, elapsed_time), total_time + elapsed_time, runs + 1
+result.write(json.dumps({"time": best_time, "runs": runs}))
+"""
+
+
+# Script starting the processes running the programs : it limits their memory from inside the child (preexec_fn can
+# deadlock the child when the editor runs other threads), then runs the program like the python command would
+MEMORY_LIMITED_RUNNER = """
+import runpy, sys
+memory_limit, mode = int(sys.argv[1]), sys.argv[2]
+if memory_limit:
+	import resource
+	resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+if mode == "-m":
+	sys.argv = sys.argv[3:]
+	runpy.run_module(sys.argv[0], run_name="__main__", alter_sys=True)
+elif mode == "-c":
+	code, sys.argv = sys.argv[3], ["-c", *sys.argv[4:]]
+	exec(compile(code, "<string>", "exec"), {"__name__": "__main__"})
+else:
+	sys.argv = sys.argv[2:]
+	runpy.run_path(sys.argv[0], run_name="__main__")
+"""
+
+
+def memory_limited_command(memory_limit: int, *arguments: str) -> List[str]:
+	"""
+	Gives the command running Python with a memory limit, in isolated mode (no user site-packages nor environment
+	variables) and unbuffered so the output shows up as soon as it is printed.
+	:param memory_limit: The limit of the address space, in bytes. Ignored on the systems without the resource module.
+	:param arguments: What would follow 'python' : a path, '-m module' or '-c code', then the arguments of the program.
+	:return: The command.
+	"""
+	return [
+		sys.executable, "-I", "-u", "-c", MEMORY_LIMITED_RUNNER, str(memory_limit if RESOURCE_AVAILABLE else 0),
+		*arguments
+	]
+
+
+def cached_bytecode(code: str, cache_folder: str = BYTECODE_CACHE_FOLDER) -> Optional[str]:
+	"""
+	Compiles Python code to a .pyc file named after the hash of the code, unless it was already compiled, so running
+	the same program again skips parsing and compiling it. Only the BYTECODE_CACHE_SIZE most recent files are kept.
+	:param code: The Python code.
+	:param cache_folder: The folder in which the bytecode is cached.
+	:return: The path of the .pyc file, or None if the code could not be compiled.
+	"""
+	source_hash = hashlib.sha256(code.encode("utf-8")).hexdigest()
+	source_path = os.path.join(cache_folder, source_hash + ".py")
+	bytecode_path = source_path + "c"
+
+	# If the code was already compiled, we mark it as recently used and reuse it
+	if os.path.exists(bytecode_path):
+		os.utime(bytecode_path)
+		return bytecode_path
+
+	# Otherwise, we compile it, keeping the source next to it for the tracebacks
+	try:
+		os.makedirs(cache_folder, exist_ok=True)
+		with open(source_path, "w", encoding="utf-8") as f:
+			f.write(code)
+		py_compile.compile(
+			source_path, bytecode_path, doraise=True, invalidation_mode=py_compile.PycInvalidationMode.CHECKED_HASH
+		)
+	except (OSError, py_compile.PyCompileError):
+		try:
+			os.remove(source_path)
+		except OSError: pass
+		return None
+
+	# Removes the least recently used programs
+	cached_files = sorted(
+		(entry for entry in os.scandir(cache_folder) if entry.name.endswith(".pyc")),
+		key=lambda entry: entry.stat().st_mtime
+	)
+	for entry in cached_files[:-BYTECODE_CACHE_SIZE]:
+		for path in (entry.path, entry.path[:-1]):
+			try:
+				os.remove(path)
+			except OSError: pass
+	return bytecode_path
+
+
+def benchmarkable_module(compiled_code: str) -> Tuple[str, Dict[str, List[str]]]:
+	"""
+	Keeps only the definitions of a compiled program, so its functions can be called without running the program.
+	:param compiled_code: The compiled Python code.
+	:return: The code of the definitions, and the kind ('int', 'list', ...) of each parameter of each function.
+	"""
+	module = ast.parse(compiled_code)
+	module.body = [
+		node for node in module.body
+		if isinstance(node, (ast.FunctionDef, ast.Import, ast.ImportFrom))
+		or isinstance(node, (ast.Assign, ast.AnnAssign)) and not any(isinstance(child, ast.Call) for child in ast.walk(node))
+	]
+	functions = {
+		node.name: [ast.unparse(arg.annotation) if arg.annotation is not None else "int" for arg in node.args.args]
+		for node in module.body if isinstance(node, ast.FunctionDef)
+	}
+	return ast.unparse(module), functions
+
+
+def fit_complexity(sizes: List[int], times: List[float]) -> List[Tuple[str, float, float]]:
+	"""
+	Fits the timings to each complexity class, as time ≈ c × f(n), minimizing the relative error.
+	:param sizes: The input sizes.
+	:param times: The time taken for each size, in seconds.
+	:return: The name, the constant c and the mean squared relative error of each class, best fit first.
+	"""
+	fits = []
+	for name, complexity in COMPLEXITY_CLASSES.items():
+		# Minimizing the sum of (1 - c × ratio)² gives c = sum(ratios) / sum(ratios²)
+		try:
+			ratios = [complexity(size) / time_taken for size, time_taken in zip(sizes, times)]
+			constant = sum(ratios) / sum(ratio ** 2 for ratio in ratios)
+			error = sum((1 - constant * ratio) ** 2 for ratio in ratios) / len(ratios)
+		except OverflowError:
+			continue
+		fits.append((name, constant, error))
+	fits.sort(key=lambda fit: fit[2])
+	return fits
+
+
+def ascii_plot(points: List[Tuple[int, float]], curve, width: int, height: int) -> List[str]:
+	"""
+	Plots the timings and the fitted curve on log-log axes.
+	:param points: The measured (size, time) points.
+	:param curve: Function giving the fitted time of a size.
+	:param width: The width of the plot, in characters.
+	:param height: The height of the plot, in characters.
+	:return: The lines of the plot, top first.
+	"""
+	min_x, max_x = math.log10(points[0][0]), math.log10(points[-1][0])
+	curve_points = [
+		(size, curve(size)) for size in (
+			10 ** (min_x + (max_x - min_x) * column / (width - 1)) for column in range(width)
+		)
+	]
+	times = [time_taken for _, time_taken in points + curve_points if time_taken > 0]
+	min_y, max_y = math.log10(min(times)), math.log10(max(times))
+	max_y = max(max_y, min_y + 1e-9)
+
+	grid = [[" "] * width for _ in range(height)]
+	def place(size, time_taken, char):
+		if time_taken <= 0:
+			return
+		column = round((math.log10(size) - min_x) / (max_x - min_x) * (width - 1))
+		row = height - 1 - round((math.log10(time_taken) - min_y) / (max_y - min_y) * (height - 1))
+		grid[row][column] = char
+	for size, time_taken in curve_points:
+		place(size, time_taken, "·")
+	for size, time_taken in points:
+		place(size, time_taken, "*")
+
+	# Labels the axes with the extreme times and sizes
+	lines = ["".join(row) for row in grid]
+	labels = {0: f"{10 ** max_y:.2e}s", height - 1: f"{10 ** min_y:.2e}s"}
+	lines = [f"{labels.get(i, ''):>10} |{line}" for i, line in enumerate(lines)]
+	lines.append(" " * 11 + "+" + "-" * width)
+	lines.append(" " * 12 + f"n={points[0][0]}".ljust(width - len(f"n={points[-1][0]}")) + f"n={points[-1][0]}")
+	return lines
+
+
+def python_cache_state(compiler: "PythonCompiler") -> tuple:
+	"""
+	The state the Python code depends on, besides the source and the extensions.
+	:param compiler: The Python compiler.
+	:return: A hashable state.
+	"""
+	return compiler.app.tab_char, compiler.rewriter_regex().pattern
+
 
 class PythonCompiler(Compiler):
+	# Algorithmic functions mapped to their Python equivalent, rewritten by final_trim (each compiler has a copy)
+	FUNCTION_MAPPINGS = {"puissance": "pow", "racine": "sqrt", "aleatoire": "rand"}
+	# Python functions needing an import, mapped to the import added when they are used
+	HELPER_IMPORTS = {"sqrt": "from math import sqrt", "rand": "from random import random as rand"}
+
 	def __init__(self, instruction_names:tuple, var_types:dict, other_instructions:tuple, stdscr, app):
 		super().__init__(instruction_names, var_types, other_instructions, stdscr, app.tab_char)
 
 		# Use vars
 		self.app = app
 
+		# Python functions used by the code being compiled
+		self.used_helpers = set()
+
+		# Algorithmic functions mapped to their Python equivalent, and the regex rewriting them (built when needed)
+		self.function_mappings = dict(self.FUNCTION_MAPPINGS)
+		self._rewriter_regex: Optional[re.Pattern] = None
+		self._function_calls: Tuple[str, ...] = ()
+
+
+	def register_function_mapping(self, algo_function:str, python_function:str):
+		"""
+		Makes final_trim of this compiler rewrite the calls to an algorithmic function into calls to a Python function.
+		:param algo_function: The name of the function in the algorithmic language, e.g. 'racine'.
+		:param python_function: The name of the Python function, e.g. 'sqrt'.
+		"""
+		self.function_mappings[algo_function] = python_function
+		self._rewriter_regex = None
+
+
+	def rewriter_regex(self) -> re.Pattern:
+		"""
+		Builds (once per set of function mappings) the regex matching in a single pass the string literals and the calls
+		to the mapped functions, so the calls written inside strings are left untouched.
+		:return: The compiled regex.
+		"""
+		if self._rewriter_regex is None:
+			functions = "|".join(sorted(map(re.escape, self.function_mappings), key=len, reverse=True)) or "(?!)"
+			self._rewriter_regex = re.compile(rf"{STRING_PATTERN}|\b(?P<function>{functions})\(")
+			self._function_calls = tuple(function + "(" for function in self.function_mappings)
+		return self._rewriter_regex
+
+
+	def _rewrite_token(self, match:re.Match) -> str:
+		"""
+		Rewrites a token matched by the rewriter regex.
+		:param match: The match of the rewriter regex.
+		:return: The rewritten token.
+		"""
+		if match.group("function") is None:
+			return match.group()
+		# Keeps in mind the function is used, so final_touches can import it
+		python_function = self.function_mappings[match.group("function")]
+		self.used_helpers.add(python_function)
+		return python_function + "("
+
+
+	def rewrite_line(self, line:str) -> str:
+		"""
+		Adds the ends of line, turns the '//' comment into a '#' one, and rewrites the calls to the mapped functions
+		outside of the strings and the comment.
+		:param line: The analyzed line.
+		:return: The rewritten line.
+		"""
+		# Most lines have nothing to rewrite
+		if not ("(" in line or "/" in line or "\"" in line or "'" in line):
+			return line
+
+		# Splits the comment from the code, the '//' in strings not starting one
+		comment = ""
+		if "//" in line:
+			if "\"" in line or "'" in line:
+				comment_start = next(
+					(match.start() for match in COMMENT_REGEX.finditer(line) if match.group("comment")), -1
+				)
+			else:
+				comment_start = line.find("//")
+			if comment_start != -1:
+				line, comment = line[:comment_start], "#" + line[comment_start + 2:]
+
+		# Only the lines calling a mapped function go through the regex skipping the strings
+		if "(" in line:
+			rewriter_regex = self._rewriter_regex or self.rewriter_regex()
+			if any(map(line.__contains__, self._function_calls)):
+				line = rewriter_regex.sub(self._rewrite_token, line)
+		line += comment
+
+		# '(ENDL)' becomes a newline everywhere, whether in a string, the comment, or the code
+		if "(ENDL)" in line:
+			line = line.replace("(ENDL)", "\\n")
+		return line
+
 
 	def ifsanitize(self, string:str) -> str:
 		"""
@@ -264,19 +632,9 @@ class PythonCompiler(Compiler):
 
 	def final_trim(self, instruction_name:str, line_number:int):
 		""" Formats the line a bit more """
-		# Adds the end of line
-		self.instructions_list[line_number] = self.instructions_list[line_number].replace("(ENDL)", "\\n")
-
-		# Adds the power, sqrt, and rand functions
-		for algo_function, python_function in (
-				("puissance(", "pow("),
-				("racine(", "sqrt("),
-				("aleatoire(", "rand(")
-		):
-			self.instructions_list[line_number] = self.instructions_list[line_number].replace(
-				algo_function,
-				python_function
-			)
+		# Adds the ends of line, the power, sqrt, and rand functions, and replaces double-slashes by # symbol for
+		# comments
+		self.instructions_list[line_number] = self.rewrite_line(self.instructions_list[line_number])
 
 		# Adds the correct tabbing (amount of tabs is equal to amount of instructions in the instructions stack,
 		# minus one if the current instruction is in the instruction names)
@@ -284,36 +642,78 @@ class PythonCompiler(Compiler):
 		if instruction_name in (*self.instruction_names, "else", "elif", "proc"):
 			tab_amount -= 1
 
-		# Replaces double-slashes by # symbol for comments
-		self.instructions_list[line_number] = self.instructions_list[line_number].replace("//", "#")
-
 		# Writes the line
 		self.instructions_list[line_number] = self.app.tab_char * tab_amount + self.instructions_list[line_number]
 
 
+	def prepare_new_compilation(self):
+		""" Forgets the Python functions used by the previous compilation """
+		super().prepare_new_compilation()
+		self.used_helpers = set()
+
+
 	def final_touches(self):
 		""" Concatenates everything into one string """
-		final_compiled_code = ""
+		# Imports the Python functions that were used (e.g. sqrt from math, random from random)
+		imports = [
+			helper_import for helper, helper_import in self.HELPER_IMPORTS.items() if helper in self.used_helpers
+		]
+
+		# Adds a newline after the imports, the main code, and a final blank line
+		return "\n".join((*imports, *(("",) if imports else ()), *self.instructions_list, ""))
+
+
+class PreviewPythonCompiler(PythonCompiler):
+	"""
+	Python compiler collecting the errors instead of displaying them, to be used in the background.
+	"""
+	def __init__(self, instruction_names:tuple, var_types:dict, other_instructions:tuple, stdscr, app):
+		super().__init__(instruction_names, var_types, other_instructions, stdscr, app)
+		self.errors: List[str] = []
+
+		# The built-in analyze methods report their crashes as errors of their line
+		for method_name in dir(PythonCompiler):
+			if method_name.startswith("analyze_") or method_name == "define_var":
+				setattr(self, method_name, partial(self.analyze_safely, getattr(PythonCompiler, method_name)))
 
-		# If we use sqrt, we import math
-		if "racine(" in self.app.current_text:
-			final_compiled_code += "from math import sqrt\n"
 
-		# If we use random, we import random.random
-		if "racine(" in self.app.current_text:
-			final_compiled_code += "from random import random\n"
+	def prepare_new_compilation(self):
+		""" Forgets the errors of the previous compilation """
+		super().prepare_new_compilation()
+		self.errors = []
+
+
+	def compile(self, instructions_list:list) -> str:
+		"""
+		Compiles the given lines, turning a crash of an instruction added by the extensions into an error.
+		:param instructions_list: The lines of code to compile. Modified in place into the compiled lines.
+		:return: The compiled code, or the lines compiled until the crash.
+		"""
+		try:
+			return super().compile(instructions_list)
+		except Exception as e:
+			self.error(f"Error : {type(e).__name__} {e}")
+			return "\n".join(self.instructions_list)
 
-		# Adding a newline
-		if final_compiled_code != "":
-			final_compiled_code += "\n"
 
-		# Adds the main code into the compiled code
-		final_compiled_code += "\n".join(self.instructions_list)
+	def analyze_safely(self, analyzer, *args):
+		"""
+		Analyzes a line, turning any crash into an error, as lines are often unfinished while typing.
+		:param analyzer: The analyze method (or define_var) of the class.
+		:param args: The arguments of the method, the line number being the last one.
+		"""
+		try:
+			analyzer(self, *args)
+		except Exception as e:
+			self.error(f"Error on line {args[-1] + 1} : {type(e).__name__} {e}")
 
-		# Adds a final blank line
-		final_compiled_code += "\n"
 
-		return final_compiled_code
+	def error(self, message:str):
+		"""
+		Keeps the error in mind.
+		:param message: The error message.
+		"""
+		self.errors.append(message)
 
 
 class CompileToPython(Plugin):
@@ -322,13 +722,127 @@ class CompileToPython(Plugin):
 	"""
 	def __init__(self, app):
 		super().__init__(app)
-		self.python_compiler = PythonCompiler(
-			('for', 'if', 'while', 'switch', 'case', 'default', 'else', 'elif', 'fx'),
-			{"int": "int", "float": "float", "string": "str", "bool": "bool", "char": "str"},
-			("print", "input", "end", "elif", "else", "fx_start", "vars", "data", "datar", "result", "return", "desc", "const", "arr"),
-			self.app.stdscr, self.app
-		)
-		self.add_command("y", self.compile_to_python, "Compile to Python")
+		self.translations = {
+			"en": {
+				"compile_to_python": "Compile to Python",
+				"toggle_preview": "Toggle Python preview",
+				"preview_title": " Python preview ",
+				"run_program": "Run the compiled Python program",
+				"profile_program": "Run and profile the compiled Python program",
+				"running": " Running... (Esc to stop) ",
+				"input": "> ",
+				"exit_code": "Program exited with code {code} in {runtime:.3f}s.",
+				"timed_out": "Program stopped after exceeding the {timeout}s time limit.",
+				"stopped": "Program stopped after {runtime:.3f}s.",
+				"peak_memory": "Peak memory usage : {memory:.1f} MB (limit : {limit} MB).",
+				"profile_header": "Function                           calls  own time  cumulated",
+				"press_key": "Press any key to go back to the editor.",
+				"benchmark": "Benchmark the complexity of a function",
+				"toggle_bytecode_cache": "Run compiled Python programs from cached bytecode",
+				"toggle_emit_bytecode": "Write a .pyc file next to the compiled Python files",
+				"choose_function": "Choose the function to benchmark",
+				"no_function": "The program does not define any function.",
+				"syntax_error": "The compiled program is invalid : {error}",
+				"benchmarking": "Benchmarking {function} with n = {size}...",
+				"benchmark_title": " Complexity of {function} ",
+				"benchmark_columns": {"size": "n", "time": "time", "runs": "runs"},
+				"size_timed_out": "n = {size} exceeded the {timeout}s time limit.",
+				"size_failed": "n = {size} failed : {error}",
+				"not_enough_sizes": "Not enough input sizes could be measured to guess the complexity.",
+				"best_fit": "Best fit : {complexity} (time ≈ {constant:.3e} × f(n), relative error {error:.1%})"
+			},
+			"fr": {
+				"compile_to_python": "Compiler en Python",
+				"toggle_preview": "Afficher/masquer l'aperçu Python",
+				"preview_title": " Aperçu Python ",
+				"run_program": "Exécuter le programme Python compilé",
+				"profile_program": "Exécuter et profiler le programme Python compilé",
+				"running": " Exécution... (Échap pour arrêter) ",
+				"input": "> ",
+				"exit_code": "Le programme s'est terminé avec le code {code} en {runtime:.3f}s.",
+				"timed_out": "Le programme a été arrêté après avoir dépassé la limite de {timeout}s.",
+				"stopped": "Le programme a été arrêté après {runtime:.3f}s.",
+				"peak_memory": "Pic d'utilisation mémoire : {memory:.1f} Mo (limite : {limit} Mo).",
+				"profile_header": "Fonction                           appels   propre     cumulé",
+				"press_key": "Appuyez sur une touche pour revenir à l'éditeur.",
+				"benchmark": "Mesurer la complexité d'une fonction",
+				"toggle_bytecode_cache": "Exécuter les programmes Python compilés depuis le bytecode en cache",
+				"toggle_emit_bytecode": "Écrire un fichier .pyc à côté des fichiers Python compilés",
+				"choose_function": "Choisissez la fonction à mesurer",
+				"no_function": "Le programme ne définit aucune fonction.",
+				"syntax_error": "Le programme compilé est invalide : {error}",
+				"benchmarking": "Mesure de {function} avec n = {size}...",
+				"benchmark_title": " Complexité de {function} ",
+				"benchmark_columns": {"size": "n", "time": "temps", "runs": "essais"},
+				"size_timed_out": "n = {size} a dépassé la limite de {timeout}s.",
+				"size_failed": "n = {size} a échoué : {error}",
+				"not_enough_sizes": "Trop peu de tailles ont pu être mesurées pour estimer la complexité.",
+				"best_fit": "Meilleure approximation : {complexity} (temps ≈ {constant:.3e} × f(n), erreur relative {error:.1%})"
+			}
+		}
+		self.python_compiler = PythonCompiler(*PYTHON_COMPILER_PARAMS, self.app.stdscr, self.app)
+
+		# The preview has its own compiler, as it compiles in another thread
+		self.preview_compiler = PreviewPythonCompiler(*PYTHON_COMPILER_PARAMS, self.app.stdscr, self.app)
+		self.preview_enabled = False
+		# Set to stop the current preview thread
+		self.preview_stopped = threading.Event()
+		self.preview_lock = threading.Lock()
+		# Set whenever the text changes, to wake up the preview thread
+		self.text_changed = threading.Event()
+		# Limits of the programs run from the editor
+		self.run_timeout = DEFAULT_RUN_TIMEOUT
+		self.run_memory_limit = DEFAULT_RUN_MEMORY_LIMIT
+		self.benchmark_timeout = DEFAULT_BENCHMARK_TIMEOUT
+		# Whether the programs are run from cached bytecode, and whether bytecode is written next to the saved files
+		self.bytecode_cache = True
+		self.emit_bytecode = False
+		self.last_text_change = 0.
+		self.previewed_text: Optional[str] = None
+		# Lines of the compiled code, index of the compiled line of each line of the source, and the errors
+		self.preview_lines: List[str] = []
+		self.preview_line_numbers: List[int] = []
+		self.preview_errors: List[str] = []
+
+		self.add_command("y", self.compile_to_python, self.translate("compile_to_python"))
+		self.add_command("yp", self.toggle_preview, self.translate("toggle_preview"))
+		self.add_command("yr", self.run_program, self.translate("run_program"))
+		self.add_command("yrp", partial(self.run_program, True), self.translate("profile_program"))
+		self.add_command("yb", self.benchmark, self.translate("benchmark"))
+
+
+	def init(self):
+		"""
+		Gets the limits of the programs from the config, and lets the compiler extensions cache the compiled code.
+		"""
+		self.run_timeout = self.get_config("run_timeout", DEFAULT_RUN_TIMEOUT)
+		self.run_memory_limit = self.get_config("run_memory_limit", DEFAULT_RUN_MEMORY_LIMIT)
+		self.benchmark_timeout = self.get_config("benchmark_timeout", DEFAULT_BENCHMARK_TIMEOUT)
+		self.bytecode_cache = self.get_config("bytecode_cache", True)
+		self.emit_bytecode = self.get_config("emit_bytecode", False)
+		if COMPILER_EXTENSIONS_AVAILABLE:
+			compiler_extensions = CompilerExtensionsPlugin(self.app)
+			compiler_extensions.register_cache_state("python", python_cache_state)
+			compiler_extensions.add_compiler("python", self.python_compiler)
+			compiler_extensions.add_compiler("python", self.preview_compiler)
+		self.add_option(self.translate("toggle_bytecode_cache"), lambda: self.bytecode_cache, self.toggle_bytecode_cache)
+		self.add_option(self.translate("toggle_emit_bytecode"), lambda: self.emit_bytecode, self.toggle_emit_bytecode)
+
+
+	def toggle_bytecode_cache(self):
+		"""
+		Toggles running the programs from cached bytecode in the live app and the config.
+		"""
+		self.bytecode_cache = not self.bytecode_cache
+		self.config["bytecode_cache"] = self.bytecode_cache
+
+
+	def toggle_emit_bytecode(self):
+		"""
+		Toggles writing bytecode next to the compiled files in the live app and the config.
+		"""
+		self.emit_bytecode = not self.emit_bytecode
+		self.config["emit_bytecode"] = self.emit_bytecode
 
 	def compile_to_python(self):
 		"""
@@ -346,9 +860,382 @@ class CompileToPython(Plugin):
 				plugin[1].update_on_compilation(final_compiled_code, "python")
 		self.app.stdscr.getch()
 		self.app.save(final_compiled_code)
+
+		# Writes the bytecode next to the saved file, valid as long as the file is not modified
+		if self.emit_bytecode and self.app.last_save_action != "clipboard":
+			try:
+				py_compile.compile(
+					self.app.last_save_action, os.path.splitext(self.app.last_save_action)[0] + ".pyc", doraise=True,
+					invalidation_mode=py_compile.PycInvalidationMode.CHECKED_HASH
+				)
+			except (OSError, py_compile.PyCompileError): pass
+		self.app.stdscr.clear()
+		self.app.apply_stylings()
+		self.app.stdscr.refresh()
+
+
+	def run_program(self, profile: bool = False):
+		"""
+		Compiles the code to Python, then runs it in a separate process with a time and memory limit, showing its
+		output and forwarding the user's input. Reports the runtime and peak memory usage once it's done.
+		:param profile: Whether to profile the program with cProfile, and show the time spent in each function.
+		"""
+		compiled_code = self.python_compiler.compile(self.app.current_text.split("\n"))
+
+		with tempfile.TemporaryDirectory(prefix="algorithmic_run_") as run_folder:
+			program_path = os.path.join(run_folder, "program.py")
+			with open(program_path, "w", encoding="utf-8") as f:
+				f.write(compiled_code)
+			profile_path = os.path.join(run_folder, "program.prof")
+
+			# cProfile can only run source files
+			if profile:
+				arguments = ("-m", "cProfile", "-o", profile_path, program_path)
+			else:
+				arguments = (self.bytecode_cache and cached_bytecode(compiled_code) or program_path,)
+			command = memory_limited_command(self.run_memory_limit * 1024 * 1024, *arguments)
+			output, runtime, exit_code, peak_memory = self._run_in_pane(command, run_folder)
+
+			# Reports how the program went
+			if exit_code is None:
+				output.append(self.translate("timed_out", timeout=self.run_timeout))
+			elif exit_code == -9 and runtime < self.run_timeout:
+				output.append(self.translate("stopped", runtime=runtime))
+			else:
+				output.append(self.translate("exit_code", code=exit_code, runtime=runtime))
+			if peak_memory is not None:
+				output.append(self.translate("peak_memory", memory=peak_memory, limit=self.run_memory_limit))
+
+			# Shows the time spent in the functions of the program
+			if profile and os.path.exists(profile_path):
+				output.extend(("", self.translate("profile_header")))
+				output.extend(self._profile_lines(profile_path, program_path))
+
+		output.append(self.translate("press_key"))
+		self._display_output(output)
+		self.app.stdscr.timeout(-1)
+		self.app.stdscr.getch()
+		self.app.stdscr.clear()
+		self.app.apply_stylings()
+
+
+	def _run_in_pane(self, command: List[str], cwd: str) -> Tuple[List[str], float, Optional[int], Optional[float]]:
+		"""
+		Runs a program, displaying its output as it comes, and sending it what the user types.
+		:param command: The command running the program.
+		:param cwd: The folder in which the program is run.
+		:return: The lines of output, the runtime in seconds, the exit code (None if the program timed out), and the
+			peak memory usage in megabytes (None if it cannot be measured on this system).
+		"""
+		process = subprocess.Popen(
+			command, cwd=cwd,
+			stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, bufsize=0
+		)
+		start_time = time.perf_counter()
+
+		# Reads the output of the program in another thread, so reading never blocks the interface
+		output = [""]
+		output_lock = threading.Lock()
+		def read_output():
+			decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+			while chunk := os.read(process.stdout.fileno(), 4096):
+				with output_lock:
+					lines = (output[-1] + decoder.decode(chunk)).replace("\r\n", "\n").split("\n")
+					output[-1:] = lines
+		reader = threading.Thread(target=read_output, daemon=True)
+		reader.start()
+
+		# Displays the output and sends the input of the user until the program ends
+		user_input = ""
+		exit_code, peak_memory = None, None
+		self.app.stdscr.timeout(RUN_REFRESH_DELAY)
+		while exit_code is None:
+			runtime = time.perf_counter() - start_time
+			if runtime > self.run_timeout:
+				process.kill()
+				process.wait()
+				exit_code = None
+				break
+
+			# Checks whether the program ended, getting its peak memory usage if possible
+			if RESOURCE_AVAILABLE:
+				pid, status, rusage = os.wait4(process.pid, os.WNOHANG)
+				if pid != 0:
+					exit_code = process.returncode = os.waitstatus_to_exitcode(status)
+					# ru_maxrss is in kilobytes, except on macOS where it is in bytes
+					peak_memory = rusage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+			else:
+				exit_code = process.poll()
+			if exit_code is not None:
+				runtime = time.perf_counter() - start_time
+				break
+
+			with output_lock:
+				self._display_output(output, self.translate("running"), self.translate("input") + user_input)
+
+			# Handles the keys of the user : Escape stops the program, Enter sends the line
+			try:
+				key = self.app.stdscr.getkey()
+			except curses.error:
+				continue
+			if key == "\x1b":
+				process.kill()
+			elif key in ("\n", "PADENTER"):
+				try:
+					process.stdin.write((user_input + "\n").encode("utf-8"))
+					process.stdin.flush()
+				except OSError: pass
+				with output_lock:
+					output[-1] += user_input
+					output.append("")
+				user_input = ""
+			elif key in ("KEY_BACKSPACE", "\b", "\x7f"):
+				user_input = user_input[:-1]
+			elif len(key) == 1 and key.isprintable():
+				user_input += key
+
+		reader.join(timeout=1)
+		process.stdin.close()
+		process.stdout.close()
+		with output_lock:
+			return list(output), runtime, exit_code, peak_memory
+
+
+	def _display_output(self, output: List[str], title: str = "", input_line: str = ""):
+		"""
+		Displays the end of the output of a program, fitting the screen.
+		:param output: The lines of output.
+		:param title: A title displayed at the top of the screen.
+		:param input_line: A line displayed at the bottom of the screen.
+		"""
+		self.app.stdscr.clear()
+		height = self.app.rows - 3
+		try:
+			if title:
+				self.app.stdscr.addstr(0, self.app.cols // 2 - len(title) // 2, title, curses.A_REVERSE)
+			for i, line in enumerate(output[-height:]):
+				self.app.stdscr.addstr(i + 1, 0, line.expandtabs(4)[:self.app.cols - 1])
+			if input_line:
+				self.app.stdscr.addstr(self.app.rows - 1, 0, input_line[-(self.app.cols - 1):], curses.A_BOLD)
+		except curses.error: pass
+		self.app.stdscr.refresh()
+
+
+	def _profile_lines(self, profile_path: str, program_path: str) -> List[str]:
+		"""
+		Formats the time spent in each function of the program, most expensive first.
+		:param profile_path: The file written by cProfile.
+		:param program_path: The file of the program, to only keep its functions.
+		:return: The lines of the profile.
+		"""
+		stats = pstats.Stats(profile_path).stats
+		functions = [
+			(function_name, calls, own_time, cumulated_time)
+			for (filename, line_number, function_name), (_, calls, own_time, cumulated_time, _) in stats.items()
+			if os.path.normcase(filename) == os.path.normcase(program_path)
+		]
+		functions.sort(key=lambda function: function[3], reverse=True)
+		return [
+			f"{function_name[:32]:<32}{calls:>8}{own_time:>9.3f}s{cumulated_time:>10.3f}s"
+			for function_name, calls, own_time, cumulated_time in functions[:PROFILE_SIZE]
+		]
+
+
+	def benchmark(self):
+		"""
+		Compiles the code to Python, then lets the user choose a function whose complexity gets measured.
+		"""
+		try:
+			module_code, functions = benchmarkable_module(
+				self.python_compiler.compile(self.app.current_text.split("\n"))
+			)
+		except SyntaxError as e:
+			return self._show_message(self.translate("syntax_error", error=e))
+		if not functions:
+			return self._show_message(self.translate("no_function"))
+
+		display_menu(
+			self.app.stdscr,
+			(
+				*(
+					(f"{name}({', '.join(kinds)})", partial(self.benchmark_function, module_code, name, kinds))
+					for name, kinds in functions.items()
+				),
+				(self.app.get_translation("cancel"), lambda: None)
+			),
+			label=self.translate("choose_function"),
+			space_out_last_option=True
+		)
+
+
+	def benchmark_function(self, module_code: str, function_name: str, kinds: List[str]):
+		"""
+		Times a function in a worker process on inputs of growing size, until a size exceeds the time limit, then
+		shows which complexity class fits the timings best, along with a plot.
+		:param module_code: The definitions of the compiled program.
+		:param function_name: The name of the function to benchmark.
+		:param kinds: The kind of each parameter of the function, from which its inputs are generated.
+		"""
+		output = []
+		sizes, times = [], []
+		with tempfile.TemporaryDirectory(prefix="algorithmic_benchmark_") as benchmark_folder:
+			# Each size runs in a new process, so the bytecode saves parsing the program every time
+			module_path = self.bytecode_cache and cached_bytecode(module_code)
+			if not module_path:
+				module_path = os.path.join(benchmark_folder, "program.py")
+				with open(module_path, "w", encoding="utf-8") as f:
+					f.write(module_code)
+
+			for size in BENCHMARK_SIZES:
+				self._show_message(self.translate("benchmarking", function=function_name, size=size), wait=False)
+				try:
+					result = subprocess.run(
+						memory_limited_command(
+							self.run_memory_limit * 1024 * 1024,
+							"-c", BENCHMARK_WORKER, module_path, function_name, str(size), *kinds
+						),
+						cwd=benchmark_folder, stdin=subprocess.DEVNULL, capture_output=True, text=True,
+						timeout=self.benchmark_timeout
+					)
+				except subprocess.TimeoutExpired:
+					output.append(self.translate("size_timed_out", size=size, timeout=self.benchmark_timeout))
+					break
+				if result.returncode != 0:
+					error = (result.stderr.strip().splitlines() or [str(result.returncode)])[-1]
+					output.append(self.translate("size_failed", size=size, error=error))
+					break
+				timing = json.loads(result.stdout)
+				sizes.append(size)
+				times.append(timing["time"])
+				output.append(BENCHMARK_ROW.format(size=size, time=f"{timing['time'] * 1000:.4f}ms", runs=timing["runs"]))
+
+		output.insert(0, BENCHMARK_ROW.format(**self.translate("benchmark_columns")))
+		output.append("")
+
+		# Fits the timings, and plots them with the best fitting curve
+		if len(sizes) < 3:
+			output.append(self.translate("not_enough_sizes"))
+		else:
+			complexity, constant, error = fit_complexity(sizes, times)[0]
+			output.append(self.translate("best_fit", complexity=complexity, constant=constant, error=error))
+			output.append("")
+			output.extend(ascii_plot(
+				list(zip(sizes, times)),
+				lambda size: constant * COMPLEXITY_CLASSES[complexity](size),
+				max(self.app.cols - 16, 10), max(self.app.rows - len(output) - 6, 5)
+			))
+
+		output.append(self.translate("press_key"))
+		self._display_output(output, self.translate("benchmark_title", function=function_name))
+		self.app.stdscr.getch()
 		self.app.stdscr.clear()
 		self.app.apply_stylings()
+
+
+	def _show_message(self, message: str, wait: bool = True):
+		"""
+		Displays a message in the middle of the screen.
+		:param message: The message.
+		:param wait: Whether to wait for the user to press a key, then go back to the editor.
+		"""
+		self.app.stdscr.clear()
+		message = message[:self.app.cols - 1]
+		self.app.stdscr.addstr(self.app.rows // 2, self.app.cols // 2 - len(message) // 2, message)
 		self.app.stdscr.refresh()
+		if wait:
+			self.app.stdscr.getch()
+			self.app.stdscr.clear()
+
+
+	def toggle_preview(self):
+		"""
+		Shows or hides the Python preview, on the right half of the screen.
+		"""
+		self.preview_enabled = not self.preview_enabled
+		if self.preview_enabled:
+			self.previewed_text = None
+			self.preview_stopped = threading.Event()
+			threading.Thread(target=self._preview_worker, args=(self.preview_stopped,), daemon=True).start()
+		else:
+			# Wakes up the preview thread so it stops
+			self.preview_stopped.set()
+			self.text_changed.set()
+		self.app.stdscr.clear()
+		self.app.apply_stylings()
+
+
+	def _preview_worker(self, stopped: threading.Event):
+		"""
+		Recompiles the preview in the background whenever the text changed, once the user stopped typing for
+		PREVIEW_DEBOUNCE seconds.
+		:param stopped: Event set when this thread should stop.
+		"""
+		while not stopped.is_set():
+			self.text_changed.wait()
+			self.text_changed.clear()
+
+			# Waits for the user to stop typing
+			while not stopped.is_set() and time.time() - self.last_text_change < PREVIEW_DEBOUNCE:
+				time.sleep(PREVIEW_DEBOUNCE)
+			if stopped.is_set():
+				break
+
+			# Compiles the text (an unchanged text being taken from the compilation cache of compiler_extensions)
+			compiled_code = self.preview_compiler.compile(self.app.current_text.split("\n"))
+			compiled_lines = self.preview_compiler.instructions_list
+
+			# Finds the compiled line of each source line, knowing a source line can become several lines
+			header_length = compiled_code.count("\n") - sum(line.count("\n") + 1 for line in compiled_lines)
+			line_numbers = []
+			current_line = header_length
+			for line in compiled_lines:
+				line_numbers.append(current_line)
+				current_line += line.count("\n") + 1
+
+			with self.preview_lock:
+				self.preview_lines = compiled_code.split("\n")
+				self.preview_line_numbers = line_numbers
+				self.preview_errors = self.preview_compiler.errors
+
+
+	def fixed_update(self):
+		"""
+		Asks for a new compilation when the text changed, and displays the preview next to the code.
+		"""
+		if not self.preview_enabled:
+			return None
+
+		if self.app.current_text != self.previewed_text:
+			self.previewed_text = self.app.current_text
+			self.last_text_change = time.time()
+			self.text_changed.set()
+
+		with self.preview_lock:
+			lines, line_numbers, errors = self.preview_lines, self.preview_line_numbers, self.preview_errors
+
+		# Scrolls the preview so the compiled cursor line is on the same row as the cursor
+		start_x = self.app.cols // 2
+		width = self.app.cols - start_x - 2
+		top = self.app.top_placement_shift
+		height = self.app.rows - 3 - top - len(errors)
+		cursor_line = self.app.current_text.count("\n", 0, self.app.current_index)
+		first_line = 0
+		if line_numbers and self.app.cur is not None:
+			first_line = max(line_numbers[min(cursor_line, len(line_numbers) - 1)] - (self.app.cur[0] - top), 0)
+
+		# Draws the preview, then the errors under it
+		try:
+			title = self.translate("preview_title")
+			self.app.stdscr.addstr(top, start_x, "|" + title.center(width, "-")[:width], curses.A_BOLD)
+			for i in range(1, max(height, 0)):
+				line = lines[first_line + i - 1] if first_line + i - 1 < len(lines) else ""
+				self.app.stdscr.addstr(
+					top + i, start_x,
+					"| " + line.replace(self.app.tab_char, "    ")[:width - 1].ljust(width - 1)
+				)
+			for i, error in enumerate(errors):
+				self.app.stdscr.addstr(top + max(height, 0) + i, start_x, "| " + error[:width - 1].ljust(width - 1), curses.A_REVERSE)
+		except curses.error: pass
 
 
 def init(app):
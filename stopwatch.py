@@ -4,6 +4,11 @@ import time
 
 from plugin import Plugin
 
+PLUGIN_METADATA = {
+	"hooks": ("fixed_update",),
+	"essential": True
+}
+
 
 class StopwatchPlugin(Plugin):
 	PERCENTAGE_MEDIUM = 0.5
@@ -1,21 +1,37 @@
 from functools import partial
 
-import requests
-from bs4 import BeautifulSoup
+import curses
 import os
 import hashlib
-from concurrent.futures import ThreadPoolExecutor
+import json
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 import typing_extensions
-from typing import List, Union
+from typing import Dict, List, Optional, Tuple, Union
 
 from plugin import Plugin
 from utils import display_menu
 
 try:
-	from .plugin_repo import PluginRepo, r_get
+	from .plugin_repo import PluginRepo, r_get, parse_manifest, fetch_manifest, mirror_url, MIRROR_MANIFEST_NAME
 except ImportError:
 	raise ImportError("Updater plugin needs plugin_repo to function !")
 
+PLUGIN_METADATA = {
+	"dependencies": ("plugin_repo",),
+	"essential": True
+}
+
+# Prefix of the staging folders of the updates, created at the root of the editor
+UPDATE_FOLDER_PREFIX = ".update_"
+
+# Name of the file listing the files an update is swapping in, inside its staging folder
+UPDATE_JOURNAL_NAME = "journal.json"
+
 
 class Updater(Plugin):
 	# Modify to use another app repo
@@ -24,8 +40,17 @@ class Updater(Plugin):
 	REPO_BRANCH = "main"  # Branch to pull plugins from
 
 	# Constants for the repository URL. Should not be touched.
-	REPO_INDIVIDUAL_FILE = f"https://raw.githubusercontent.com/{REPO_USER}/{REPO_NAME}/{REPO_BRANCH}"
-	REPO_URL = f"https://github.com/{REPO_USER}/{REPO_NAME}/tree/{REPO_BRANCH}/"
+	GITHUB_REPO_INDIVIDUAL_FILE = f"https://raw.githubusercontent.com/{REPO_USER}/{REPO_NAME}/{REPO_BRANCH}"
+	GITHUB_REPO_URL = f"https://github.com/{REPO_USER}/{REPO_NAME}/tree/{REPO_BRANCH}/"
+
+	# URLs actually in use ; they follow the mirror of the plugin repo (see set_mirror)
+	REPO_INDIVIDUAL_FILE = GITHUB_REPO_INDIVIDUAL_FILE
+	REPO_URL = GITHUB_REPO_URL
+
+	# Default values for the update check, overridable through the config
+	DEFAULT_CHECK_WORKERS = 8  # Amount of files compared with the server at the same time
+	DEFAULT_CHECK_DEADLINE = 10  # Maximum amount of seconds the whole update check can take
+	NOTIFICATION_DURATION = 30  # Amount of seconds the result of the startup check stays in the bottom bar
 	__singleton = None
 
 	def __new__(cls, *args, **kwargs):
@@ -48,7 +73,10 @@ class Updater(Plugin):
 				"no": "No",
 				"download_in_progress": "Downloading update. Please wait...",
 				"update_applied": "Update applied. Please reboot the editor to get the changes.",
-				"no_updates_available": "No updates available !"
+				"update_failed": "The update could not be verified. No file was modified.",
+				"no_updates_available": "No updates available !",
+				"update_available_notification": "An update is available ! Use the 'u' command to install it.",
+				"git_pulled_notification": "The editor was updated through git. Reboot it to get the changes."
 			},
 			"fr": {
 				"check_updates_on_startup": "Rechercher des mises à jour au lancement",
@@ -58,25 +86,38 @@ class Updater(Plugin):
 				"no": "Non",
 				"download_in_progress": "Téléchargement de la mise à jour en cours. Veuillez patienter...",
 				"update_applied": "Mise à jour appliquée. Veuillez redémarrer l'éditeur pour recevoir les changements.",
-				"no_updates_available": "Pas de mises à jour disponibles"
+				"update_failed": "La mise à jour n'a pas pu être vérifiée. Aucun fichier n'a été modifié.",
+				"no_updates_available": "Pas de mises à jour disponibles",
+				"update_available_notification": "Une mise à jour est disponible ! Utilisez la commande 'u' pour l'installer.",
+				"git_pulled_notification": "L'éditeur a été mis à jour via git. Redémarrez-le pour recevoir les changements."
 			}
 		}
 
-		# Loads the plugin repo
+		# Loads the plugin repo, and follows its mirror
 		self.plugin_repo = PluginRepo(app)
+		self.plugin_repo.mirror_callbacks.append(Updater.set_mirror)
+		self.plugin_repo.mirror_folders["app"] = self._list_mirrorable_files
+
+		# Result of the startup update check, filled in by a background thread
+		self.pending_updates = None
+		self.notification = None
+		self.notification_end_time = 0
 
 		# Adds a command to manually check for updates
 		self.add_command("u", partial(self.check_for_updates, True), self.translate("check_for_updates"))
 
 
 	def init(self):
-		# If the plugin repo is not initialized, we initialize it
-		if self.plugin_repo.was_initialized is False:
-			self.plugin_repo.init()
-			self.plugin_repo.was_initialized = True
+		# The plugin repo is a dependency, so it is already initialized
+		Updater.set_mirror(self.plugin_repo.get_config("mirror", ""))
+
+		# Puts back the files of an update that was interrupted while they were being swapped in
+		recover_interrupted_updates()
 
 		# Defaults the config
 		self.get_config("check_updates_on_startup", True)
+		self.get_config("check_workers", Updater.DEFAULT_CHECK_WORKERS)
+		self.get_config("check_deadline", Updater.DEFAULT_CHECK_DEADLINE)
 
 		# Adds an option to check for an update on startup
 		self.add_option(
@@ -85,9 +126,37 @@ class Updater(Plugin):
 			self.toggle_check_updates_on_startup
 		)
 
-		# If the user chose to check the updates on startup, we do so
+		# If the user chose to check the updates on startup, we do so in the background, so the editor
+		# is usable without waiting for the server
 		if self.config["check_updates_on_startup"]:
-			self.check_for_updates()
+			threading.Thread(target=self._background_check_for_updates, daemon=True).start()
+
+
+	@classmethod
+	def set_mirror(cls, mirror: str):
+		"""
+		Makes the updater use the given mirror instead of GitHub.
+		:param mirror: A folder, a 'file://' URL or a server URL containing a mirror snapshot.
+			An empty string goes back to GitHub.
+		"""
+		if mirror:
+			mirror = mirror_url(mirror)
+			cls.REPO_INDIVIDUAL_FILE = f"{mirror}/app"
+			cls.REPO_URL = f"{mirror}/app/{MIRROR_MANIFEST_NAME}"
+		else:
+			cls.REPO_INDIVIDUAL_FILE = cls.GITHUB_REPO_INDIVIDUAL_FILE
+			cls.REPO_URL = cls.GITHUB_REPO_URL
+
+
+	def _list_mirrorable_files(self) -> Optional[Tuple[str, List[str]]]:
+		"""
+		Lists the files of the editor that belong in a mirror snapshot.
+		:return: The base URL of the files and their names, or None if they could not be listed.
+		"""
+		files_list = list_repo_files()
+		if files_list is None:
+			return None
+		return Updater.REPO_INDIVIDUAL_FILE, files_list
 
 
 	def toggle_check_updates_on_startup(self):
@@ -101,12 +170,22 @@ class Updater(Plugin):
 		"""
 		Checks for updates, if one is available, asks the user, and if the user accepts, downloads the update then
 			restarts the editor.
+		If the startup check already found an update, the user is asked directly without contacting the server again.
 		:param show_message_if_no_updates: Shows a message in the command bar if no updates were available.
 		"""
+		# Hides the notification of the startup check, as the user is acting on it
+		self.notification = None
+
 		if os.path.exists(os.path.join(os.path.dirname(__file__), '..', ".git")):
 			os.system("git pull")
 		else:
-			updatable_files = check_for_updates()
+			# Uses the result of the startup check if one is available
+			if self.pending_updates:
+				updatable_files = self.pending_updates
+				self.pending_updates = None
+			else:
+				updatable_files = self._fetch_updatable_files()
+
 			if updatable_files:
 				display_menu(
 					self.app.stdscr,
@@ -120,10 +199,80 @@ class Updater(Plugin):
 				self.app.stdscr.addstr(self.app.rows - 1, 3, self.translate("no_updates_available"))
 
 
-	def update(self, updatable_files: List[str]):
+	def _fetch_updatable_files(self) -> Union[Dict[str, str], False]:
+		"""
+		Checks which files can be updated, using the worker count and deadline from the config.
+		:return: A dict of all the files changed mapped to their server content, or False in case an error occured.
+		"""
+		return check_for_updates(
+			self.get_config("check_workers", Updater.DEFAULT_CHECK_WORKERS),
+			self.get_config("check_deadline", Updater.DEFAULT_CHECK_DEADLINE)
+		)
+
+
+	def _background_check_for_updates(self):
+		"""
+		Checks for updates from a background thread, and stores the result to be shown in the bottom bar.
+		Never draws on the screen itself, as curses is not thread-safe.
+		"""
+		try:
+			# If the editor is a git repository, we pull silently, as its output would break the display
+			if os.path.exists(os.path.join(os.path.dirname(__file__), '..', ".git")):
+				# The output of git depends on its language, so we compare the commit before and after pulling instead
+				head_before = git_head()
+				result = subprocess.run(
+					("git", "pull"), cwd=os.path.join(os.path.dirname(__file__), '..'),
+					capture_output=True, text=True,
+					timeout=self.get_config("check_deadline", Updater.DEFAULT_CHECK_DEADLINE)
+				)
+				if result.returncode == 0 and head_before is not None and git_head() != head_before:
+					self._notify(self.translate("git_pulled_notification"))
+
+			# Otherwise, we keep the updatable files in mind until the user asks for them
+			else:
+				updatable_files = self._fetch_updatable_files()
+				if updatable_files:
+					self.pending_updates = updatable_files
+					self._notify(self.translate("update_available_notification"))
+
+		# Being offline or having no git executable should never prevent the editor from working
+		except (OSError, subprocess.SubprocessError):
+			pass
+
+
+	def _notify(self, message: str):
+		"""
+		Shows the given message in the bottom bar for a few seconds.
+		:param message: The message to show.
+		"""
+		self.notification_end_time = time.time() + Updater.NOTIFICATION_DURATION
+		self.notification = message
+
+
+	def fixed_update(self):
+		"""
+		Displays the result of the startup update check in the bottom bar, if there is one.
+		"""
+		if self.notification is not None:
+			if time.time() > self.notification_end_time:
+				self.notification = None
+			else:
+				try:
+					self.app.stdscr.addstr(
+						self.app.rows - 1, 3,
+						self.notification[:max(self.app.cols - 4, 0)],
+						curses.A_REVERSE
+					)
+				except curses.error: pass
+
+
+	def update(self, updatable_files: Union[Dict[str, Optional[str]], List[str]]):
 		"""
 		Updates all the given files to they server version.
-		:param updatable_files: A list of files to be updated
+		The files are staged into a temporary folder before being swapped in, and the replaced files are backed up, so
+		a failed or interrupted update is rolled back. Files downloaded from a mirror are verified against its manifest.
+		:param updatable_files: The files to be updated, mapped to their server content if it is already known
+			(as returned by check_for_updates). Files with an unknown content are downloaded concurrently.
 		"""
 		self.app.stdscr.clear()
 		self.app.stdscr.addstr(
@@ -132,90 +281,255 @@ class Updater(Plugin):
 			self.translate("download_in_progress")
 		)
 		self.app.stdscr.refresh()
-		for file in updatable_files:
-			file_path = os.path.join(os.path.dirname(__file__), '..', file)
-			try:
-				r = r_get(Updater.REPO_INDIVIDUAL_FILE + "/" + file)
-			except requests.exceptions.ConnectionError:
-				continue
-			if r.status_code != 200:
-				continue
-			with open(file_path, 'w', encoding='utf-8') as f:
-				f.write(r.text)
+
+		# Downloads the content of the files we don't know yet, all at once
+		if not isinstance(updatable_files, dict):
+			updatable_files = dict.fromkeys(updatable_files)
+		files_contents = {file: content for file, content in updatable_files.items() if content is not None}
+		missing_files = [file for file, content in updatable_files.items() if content is None]
+		with ThreadPoolExecutor(
+			max_workers=max(1, self.get_config("check_workers", Updater.DEFAULT_CHECK_WORKERS))
+		) as executor:
+			for file, content in zip(missing_files, executor.map(fetch_file, missing_files)):
+				if content is not None:
+					files_contents[file] = content
+
+		# Applies the update, then tells the user whether it worked
+		message = "update_applied" if apply_update(files_contents, fetch_manifest(Updater.REPO_URL)) else "update_failed"
 		self.app.stdscr.clear()
 		self.app.stdscr.addstr(
 			self.app.rows // 2,
-			self.app.cols // 2 - len(self.translate("update_applied")) // 2,
-			self.translate("update_applied")
+			self.app.cols // 2 - len(self.translate(message)) // 2,
+			self.translate(message)
 		)
 		self.app.stdscr.refresh()
 		self.app.stdscr.getch()
 
 
-def check_hash(filename: str) -> bool:
+def git_head() -> Optional[str]:
 	"""
-	Compares the hash between the local and distant file of the same name.
+	Gets the commit the git repository of the editor is at.
+	:return: The hash of the commit, or None if it could not be read.
+	"""
+	result = subprocess.run(
+		("git", "rev-parse", "HEAD"), cwd=os.path.join(os.path.dirname(__file__), '..'),
+		capture_output=True, text=True, timeout=Updater.DEFAULT_CHECK_DEADLINE
+	)
+	if result.returncode != 0:
+		return None
+	return result.stdout.strip()
+
+
+def fetch_file(filename: str, timeout: float = None) -> Optional[str]:
+	"""
+	Downloads the server version of the given file.
+	:param filename: The name of the file to download, relative to the root of the repository.
+	:param timeout: The maximum amount of seconds to wait for the server. None (default) waits indefinitely.
+	:return: The content of the file, or None if it could not be downloaded.
+	"""
+	# r_get gives a status code of -1 if the connection fails
+	r = r_get(Updater.REPO_INDIVIDUAL_FILE + "/" + filename, timeout)
+	if r.status_code != 200:
+		return None
+	return r.text
+
+
+def fetch_if_changed(filename: str, timeout: float = None) -> Optional[str]:
+	"""
+	Compares the hash between the local and distant file of the same name, and returns the distant file if they differ.
 	:param filename: The name of the file to be checked.
-	:return: True if the hash is different, False is the hash is identical.
+	:param timeout: The maximum amount of seconds to wait for the server. None (default) waits indefinitely.
+	:return: The content of the server version if it is different from the local one, None otherwise.
 	"""
 	file_path = os.path.join(os.path.dirname(__file__), '..', filename)
-	if not os.path.exists(file_path):
-		return True
-
 	if os.path.isdir(file_path):
-		return False
+		return None
 
-	try:
-		r = r_get(Updater.REPO_INDIVIDUAL_FILE + "/" + filename)
-	except requests.exceptions.ConnectionError:
-		return False
-
-	if r.status_code != 200:
-		return False
+	server_content = fetch_file(filename, timeout)
+	if server_content is None or not os.path.exists(file_path):
+		return server_content
 
 	# If everything worked fine, we can open the current version of the file
 	with open(file_path, encoding="utf-8") as f:
 		checksum_local = hashlib.sha256(f.read().encode("utf-8")).hexdigest()
-	checksum_server = hashlib.sha256(r.text.encode("utf-8")).hexdigest()
+	checksum_server = hashlib.sha256(server_content.encode("utf-8")).hexdigest()
 
-	# With both checksums computed, we return whether they are different
-	return checksum_server != checksum_local
+	# With both checksums computed, we return the server content if they are different
+	return server_content if checksum_server != checksum_local else None
 
 
-def check_for_updates() -> Union[List[str], False]:
+def apply_update(files_contents: Dict[str, str], manifest: Optional[Dict[str, str]] = None) -> bool:
 	"""
-	Checks if an update is available in the repository, and returns which files changed.
-	:return: A list of all the files changedor False in case an error occured.
+	Writes the given files into the editor folder.
+	Every file is first checked against the manifest of the mirror it comes from (if any), and written into a staging
+	folder. The files are then swapped in one by one, each replaced file being moved into a backup folder first ; a
+	journal listing the files is written before the swap, so the files are put back if the swap fails, or on the next
+	startup if the editor was stopped in the middle of it (see recover_interrupted_updates).
+	:param files_contents: The files to write, relative to the root of the editor, mapped to their new content.
+	:param manifest: The files of the mirror mapped to their SHA-256 hash, or None if they don't come from a mirror.
+	:return: True if the update was applied, False if nothing was modified because a file could not be verified,
+		staged or swapped in.
 	"""
-	# Tries to connect to the URL on GitHub
+	root_folder = os.path.normpath(os.path.join(os.path.dirname(__file__), '..'))
+
+	# The staging folder is created next to the files so the final replace never crosses file systems
+	staging_folder = tempfile.mkdtemp(prefix=UPDATE_FOLDER_PREFIX, dir=root_folder)
+	remove_staging_folder = True
 	try:
-		r = r_get(Updater.REPO_URL)
-	# If the connection fails, we exit the function with a given return code
-	except requests.exceptions.ConnectionError:
+		# Stages every file, after checking that it is the one recorded in the manifest of the mirror
+		staged_files = {}
+		for file, content in files_contents.items():
+			encoded_content = content.encode("utf-8")
+			if manifest is not None and manifest.get(file) != hashlib.sha256(encoded_content).hexdigest():
+				return False
+			staged_path = os.path.join(staging_folder, "new", file)
+			os.makedirs(os.path.dirname(staged_path), exist_ok=True)
+			with open(staged_path, 'wb') as f:
+				f.write(encoded_content)
+			staged_files[file] = staged_path
+
+		# Writes the journal, so an interrupted swap can be rolled back
+		with open(os.path.join(staging_folder, UPDATE_JOURNAL_NAME), 'w', encoding='utf-8') as f:
+			json.dump({"files": list(staged_files.keys())}, f)
+
+		# Once everything is staged, swaps the files in, backing up the replaced ones
+		try:
+			for file, staged_path in staged_files.items():
+				file_path = os.path.join(root_folder, file)
+				os.makedirs(os.path.dirname(file_path), exist_ok=True)
+				if os.path.exists(file_path):
+					backup_path = os.path.join(staging_folder, "backup", file)
+					os.makedirs(os.path.dirname(backup_path), exist_ok=True)
+					os.replace(file_path, backup_path)
+				os.replace(staged_path, file_path)
+		except OSError:
+			# If the files can't be put back either, the staging folder is kept to try again on the next startup
+			try:
+				rollback_update(staging_folder)
+			except OSError:
+				remove_staging_folder = False
+			return False
+		return True
+
+	except OSError:
 		return False
 
-	# If the status code is not HTTP 200 (OK), we exit the function with a given return code
+	finally:
+		if remove_staging_folder:
+			shutil.rmtree(staging_folder, ignore_errors=True)
+
+
+def rollback_update(staging_folder: str):
+	"""
+	Puts back the files replaced by an update, as listed in the journal of its staging folder.
+	The files which did not exist before the update are removed, if they were already swapped in.
+	:param staging_folder: The staging folder of the update.
+	"""
+	root_folder = os.path.normpath(os.path.join(os.path.dirname(__file__), '..'))
+	with open(os.path.join(staging_folder, UPDATE_JOURNAL_NAME), encoding='utf-8') as f:
+		files = json.load(f)["files"]
+
+	for file in reversed(files):
+		file_path = os.path.join(root_folder, file)
+		backup_path = os.path.join(staging_folder, "backup", file)
+		# The file was replaced, so we put the original back
+		if os.path.exists(backup_path):
+			os.replace(backup_path, file_path)
+		# The file was created by the update (it was swapped in, as it is no longer staged), so we remove it
+		elif not os.path.exists(os.path.join(staging_folder, "new", file)) and os.path.exists(file_path):
+			os.remove(file_path)
+
+
+def recover_interrupted_updates():
+	"""
+	Rolls back the updates whose swap was interrupted (e.g. the editor was killed), and removes their staging folders.
+	Staging folders without a journal were interrupted before any file was modified, so they are simply removed.
+	"""
+	root_folder = os.path.normpath(os.path.join(os.path.dirname(__file__), '..'))
+	for folder in os.listdir(root_folder):
+		staging_folder = os.path.join(root_folder, folder)
+		if not folder.startswith(UPDATE_FOLDER_PREFIX) or not os.path.isdir(staging_folder):
+			continue
+		try:
+			if os.path.exists(os.path.join(staging_folder, UPDATE_JOURNAL_NAME)):
+				rollback_update(staging_folder)
+		except (OSError, ValueError, KeyError):
+			continue
+		shutil.rmtree(staging_folder, ignore_errors=True)
+
+
+def list_repo_files(timeout: float = None) -> Optional[List[str]]:
+	"""
+	Lists the files of the editor repository, whether it is on GitHub or on a mirror.
+	:param timeout: The maximum amount of seconds to wait for the server. None (default) waits indefinitely.
+	:return: The names of the files, or None if they could not be listed.
+	"""
+	# Tries to connect to the URL of the repository
+	r = r_get(Updater.REPO_URL, timeout)
+
+	# If the connection fails or the status code is not HTTP 200 (OK), we exit the function with a given return code
 	if r.status_code != 200:
+		return None
+
+	# If the repository is a mirror, its manifest already lists every file
+	manifest = parse_manifest(r)
+	if manifest is not None:
+		return list(manifest.keys())
+
+	# Otherwise, uses BeautifulSoup to parse all the names from the GitHub page (imported here, as it is slow to import)
+	from bs4 import BeautifulSoup
+	soup = BeautifulSoup(r.text, 'html.parser')
+	files_list = soup.select('.js-navigation-open')
+	files_list_text = [f.text.strip() for f in files_list]
+	for lang in ("en", "fr"):
+		files_list_text.append(f"translations/translations_{lang}.json")
+	return files_list_text
+
+
+def check_for_updates(
+		max_workers: int = Updater.DEFAULT_CHECK_WORKERS,
+		deadline: float = Updater.DEFAULT_CHECK_DEADLINE
+) -> Union[Dict[str, str], False]:
+	"""
+	Checks if an update is available in the repository, and returns which files changed.
+	The server content of the changed files is returned as well, so updating does not download them a second time.
+	All the files are compared with the server at the same time, so the check takes roughly one round-trip.
+	:param max_workers: The maximum amount of files compared with the server at the same time.
+	:param deadline: The maximum amount of seconds the whole check can take. Files whose comparison did not
+		finish in time are considered up to date.
+	:return: A dict of all the files changed mapped to their server content, or False in case an error occured.
+	"""
+	# Computes the moment at which we stop waiting for the server
+	end_time = time.monotonic() + deadline
+
+	# Lists all the files of the repository, and exits the function with a given return code if it fails
+	files_list_text = list_repo_files(deadline)
+	if files_list_text is None:
 		return False
 
-	# If everything worked, we parse the webpage to find all references to all the files files
+	# If everything worked, we check every file
 	else:
-		# Uses BeautifulSoup to parse all the names
-		soup = BeautifulSoup(r.text, 'html.parser')
-		files_list = soup.select('.js-navigation-open')
-		files_list_text = [f.text.strip() for f in files_list]
-		for lang in ("en", "fr"):
-			files_list_text.append(f"translations/translations_{lang}.json")
-
 		# Now that all the file names have been found, we find all the hashes of the current installed files
 		# and compare them to the online files. If they do not match, we simply add them to the list of files to return.
-		files_to_return = []
-		with ThreadPoolExecutor(max_workers=6) as executor:
-			for file in files_list_text:
-				future = executor.submit(check_hash, file)
-				if future.result():
-					files_to_return.append(file)
-		return files_to_return
+		# Every comparison is submitted at once, and gathered as soon as it completes.
+		changed_files = {}
+		executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+		futures = {
+			executor.submit(fetch_if_changed, file, max(end_time - time.monotonic(), 0)): file
+			for file in files_list_text
+		}
+		try:
+			for future in as_completed(futures, timeout=max(end_time - time.monotonic(), 0)):
+				if future.exception() is None and future.result() is not None:
+					changed_files[futures[future]] = future.result()
+		# If the deadline is reached, the files that are still pending are considered up to date
+		except FuturesTimeoutError:
+			pass
+		finally:
+			executor.shutdown(wait=False, cancel_futures=True)
+
+		# Returns the changed files in the same order as the repository listing
+		return {file: changed_files[file] for file in files_list_text if file in changed_files}
 
 
 def init(app):